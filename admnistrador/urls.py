@@ -14,12 +14,14 @@ urlpatterns = [
     path('admin/turmas_crud/turmas/', views.listar_turmas, name='listar_turmas'),
     
     # CRUD - PROFESSOR
+    path('admin/professor_crud/professores/exportar/', views.exportar_professores, name='exportar_professores'),
     path('admin/professor_crud/professores/novo/', views.cadastrar_professor, name='cadastrar_professor'),
     path('admin/professor_crud/professores/<int:professor_id>/ver/', views.ver_detalhes_professor, name='ver_detalhes_professor'),
     path('admin/professor_crud/professores/<int:professor_id>/editar/', views.editar_professor, name='editar_professor'),
     path('admin/professor_crud/professores/<int:professor_id>/remover/', views.remover_professor, name='remover_professor'),
     
     # CRUD - ALUNO
+    path('admin/aluno_crud/alunos/exportar/', views.exportar_alunos, name='exportar_alunos'),
     path('admin/aluno_crud/alunos/novo/', views.cadastrar_aluno, name='cadastrar_aluno'),
     path('admin/aluno_crud/alunos/<int:aluno_id>/editar/', views.editar_aluno, name='editar_aluno'),
     path('admin/aluno_crud/alunos/<int:aluno_id>/remover/', views.remover_aluno, name='remover_aluno'),
@@ -38,4 +40,8 @@ urlpatterns = [
     # CRUD - TURMA
     path('admin/turmas_crud/cursos/<int:curso_id>/turmas/', views.listar_turmas_por_curso, name='listar_turmas_por_curso'),
     path('admin/turmas_crud/turmas/<int:turma_id>/', views.detalhar_turma, name='detalhar_turma'),
+    path('admin/turmas_crud/promocao/', views.promover_alunos, name='promover_alunos'),
+    path('admin/historico/', views.listar_historico, name='listar_historico'),
+    path('admin/historico/<int:historico_id>/', views.detalhes_historico, name='detalhes_historico'),
+    path('admin/turmas_crud/turmas/<int:turma_id>/notas/exportar/', views.exportar_notas_turma, name='exportar_notas_turma'),
 ]
\ No newline at end of file
@@ -1,9 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from collections import defaultdict
+from django.db.models import Prefetch, Q
+from django.core.paginator import Paginator
+from collections import defaultdict, Counter
 from core.decorators import role_required
-from core.models import CustomUser, ProfessorMateriaAnoCursoModalidade, Curso, Turma, Materia
+from core.models import CustomUser, ProfessorMateriaAnoCursoModalidade, Curso, Turma, Materia, Estagio, Nota, AlunoTurma, HistoricoArquivado
+from core.exportacao import resposta_csv, formatar_turma, EXPORTACAO_CHUNK_SIZE
+from core.promocao import (
+    planejar_promocao, aplicar_promocao, assinatura_do_plano, sugerir_ano_letivo, SITUACOES, PromocaoDesatualizada,
+)
+from core.arquivamento import anos_letivos_encerrados
 from autenticacao.forms import (
     ProfessorCreateForm,
     ProfessorMateriaAnoCursoModalidadeFormSet,
@@ -23,10 +30,31 @@ def admin_dashboard_view(request):
 @login_required
 @role_required('admin')
 def gerenciar_professores(request):
-    professores = CustomUser.objects.filter(tipo='professor').order_by('first_name', 'last_name') 
+    professores = _professores_queryset()
     return render(request, 'admin/professor_crud/gerenciar_professores.html', {'professores': professores})
 
 
+def _professores_queryset():
+    # Mesma base da listagem e da exportação, para as duas mostrarem os mesmos professores
+    return CustomUser.objects.filter(tipo='professor').order_by('first_name', 'last_name')
+
+
+@login_required
+@role_required('admin')
+def exportar_professores(request):
+    # Uma linha por vínculo, lida direto do cursor (sem montar objetos)
+    linhas = _professores_queryset().values_list(
+        'numero_matricula', 'first_name', 'last_name', 'email',
+        'professormateriaanocursomodalidade__materia__nome',
+        'professormateriaanocursomodalidade__curso__nome',
+        'professormateriaanocursomodalidade__ano_modulo',
+        'professormateriaanocursomodalidade__modalidade',
+    ).order_by('first_name', 'last_name', 'id').iterator(chunk_size=EXPORTACAO_CHUNK_SIZE)
+
+    cabecalho = ['Matrícula', 'Nome', 'Sobrenome', 'Email', 'Matéria', 'Curso', 'Ano/Módulo', 'Modalidade']
+    return resposta_csv('professores.csv', cabecalho, linhas)
+
+
 @login_required
 @role_required('admin')
 def ver_detalhes_professor(request, professor_id):
@@ -118,10 +146,41 @@ def remover_professor(request, professor_id):
 @login_required
 @role_required('admin')
 def gerenciar_alunos(request):
-    alunos = CustomUser.objects.filter(tipo='aluno').prefetch_related('alunoturma_set__turma').order_by('first_name', 'last_name')
+    alunos = _alunos_queryset().prefetch_related(
+        Prefetch('alunoturma_set', queryset=AlunoTurma.objects.filter(ativo=True).select_related('turma__curso'))
+    )
     return render(request, 'admin/aluno_crud/gerenciar_alunos.html', {'alunos': alunos})
 
 
+def _alunos_queryset():
+    return CustomUser.objects.filter(tipo='aluno').order_by('first_name', 'last_name')
+
+
+@login_required
+@role_required('admin')
+def exportar_alunos(request):
+    status_estagio = dict(Estagio.STATUS_GERAL_CHOICES)
+
+    linhas_db = _alunos_queryset().values_list(
+        'numero_matricula', 'first_name', 'last_name', 'email',
+        'alunoturma__turma__ano_modulo', 'alunoturma__turma__curso__nome',
+        'alunoturma__turma__turno', 'alunoturma__turma__turma', 'alunoturma__turma__modalidade',
+        'alunoturma__ano_letivo', 'estagio__status_geral',
+    ).order_by('first_name', 'last_name', 'id').iterator(chunk_size=EXPORTACAO_CHUNK_SIZE)
+
+    def linhas():
+        for matricula, nome, sobrenome, email, ano_modulo, curso, turno, turma, modalidade, ano_letivo, status in linhas_db:
+            yield [
+                matricula, nome, sobrenome, email,
+                formatar_turma(ano_modulo, curso, turno, turma, modalidade),
+                ano_letivo or '',
+                status_estagio.get(status, 'Não Iniciado'),
+            ]
+
+    cabecalho = ['Matrícula', 'Nome', 'Sobrenome', 'Email', 'Turma', 'Ano Letivo', 'Status do Estágio']
+    return resposta_csv('alunos.csv', cabecalho, linhas())
+
+
 @login_required
 @role_required('admin')
 def cadastrar_aluno(request):
@@ -196,8 +255,9 @@ def editar_aluno(request, aluno_id):
     else:
         form = AlunoCreateForm(instance=aluno)
 
-        if hasattr(aluno, 'alunoturma_set') and aluno.alunoturma_set.exists():
-            turma_atual = aluno.alunoturma_set.first().turma
+        matricula_atual = aluno.alunoturma_set.filter(ativo=True).first()
+        if matricula_atual:
+            turma_atual = matricula_atual.turma
             turmas_queryset = Turma.objects.filter(
                 curso=turma_atual.curso,
                 ano_modulo=turma_atual.ano_modulo,
@@ -233,7 +293,8 @@ def remover_aluno(request, aluno_id):
 def ver_detalhes_aluno(request, aluno_id):
     aluno = get_object_or_404(CustomUser, id=aluno_id, tipo='aluno')
     turmas = aluno.alunoturma_set.all()
-    return render(request, 'admin/aluno_crud/detalhes_aluno.html', {'aluno': aluno, 'turmas': turmas})
+    historicos = aluno.historicos.defer('dados')
+    return render(request, 'admin/aluno_crud/detalhes_aluno.html', {'aluno': aluno, 'turmas': turmas, 'historicos': historicos})
 
 # === CRUD - SERVIDORES ===
 
@@ -356,9 +417,99 @@ def listar_turmas_por_curso(request, curso_id):
 @role_required('admin')
 def detalhar_turma(request, turma_id):
     turma = get_object_or_404(Turma, id=turma_id)
-    alunos = CustomUser.objects.filter(alunoturma__turma=turma, tipo='aluno')
+    alunos = CustomUser.objects.filter(alunoturma__turma=turma, alunoturma__ativo=True, tipo='aluno')
     return render(request, 'admin/turmas_crud/detalhar_turma.html', {'turma': turma, 'alunos': alunos})
 
+
+@login_required
+@role_required('admin')
+def exportar_notas_turma(request, turma_id):
+    turma = get_object_or_404(Turma, id=turma_id)
+
+    linhas = Nota.objects.filter(turma=turma).values_list(
+        'aluno__numero_matricula', 'aluno__first_name', 'aluno__last_name', 'materia__nome',
+        'nota_1', 'nota_2', 'nota_3', 'nota_recuperacao', 'media_final', 'status_final',
+    ).order_by('aluno__first_name', 'aluno__last_name', 'materia__nome').iterator(chunk_size=EXPORTACAO_CHUNK_SIZE)
+
+    cabecalho = ['Matrícula', 'Nome', 'Sobrenome', 'Matéria', 'N1', 'N2', 'N3', 'Recuperação', 'Média', 'Situação']
+    return resposta_csv(f'notas_turma_{turma.id}.csv', cabecalho, linhas)
+
+@login_required
+@role_required('admin')
+def promover_alunos(request):
+    cursos = Curso.objects.all().order_by('nome')
+    curso = None
+    curso_id = request.POST.get('curso') or request.GET.get('curso')
+    if curso_id:
+        curso = get_object_or_404(Curso, id=curso_id)
+    ano_letivo = (request.POST.get('ano_letivo') or request.GET.get('ano_letivo') or sugerir_ano_letivo()).strip()
+
+    # O plano é sempre recalculado no servidor: a prévia e a aplicação usam a mesma regra
+    plano = planejar_promocao(curso)
+    assinatura = assinatura_do_plano(plano, ano_letivo)
+
+    if request.method == 'POST':
+        # Só aplica o plano que foi exibido: um segundo envio (duplo clique, F5)
+        # ou matrículas alteradas depois da prévia mudam a assinatura
+        try:
+            if request.POST.get('assinatura') != assinatura:
+                raise PromocaoDesatualizada
+            promovidos, concluintes = aplicar_promocao(plano, ano_letivo)
+        except PromocaoDesatualizada:
+            messages.warning(request, "As matrículas mudaram desde a prévia (ou a promoção já foi aplicada). Revise a prévia abaixo antes de aplicar.")
+            plano = planejar_promocao(curso)
+            assinatura = assinatura_do_plano(plano, ano_letivo)
+        else:
+            messages.success(request, f"Promoção aplicada: {promovidos} aluno(s) promovido(s) e {concluintes} concluinte(s).")
+            return redirect('listar_turmas')
+
+    contagem = Counter(item['situacao'] for item in plano)
+    return render(request, 'admin/turmas_crud/promover_alunos.html', {
+        'cursos': cursos,
+        'curso': curso,
+        'ano_letivo': ano_letivo,
+        'plano': plano,
+        'assinatura': assinatura,
+        'resumo': [(SITUACOES[situacao], contagem[situacao]) for situacao in SITUACOES if contagem[situacao]],
+    })
+
+# === HISTÓRICO ARQUIVADO ===
+
+@login_required
+@role_required('admin')
+def listar_historico(request):
+    """ Consulta somente-leitura dos anos letivos arquivados. """
+    historicos = HistoricoArquivado.objects.select_related('aluno').defer('dados')
+
+    ano_letivo = request.GET.get('ano_letivo', '')
+    busca = request.GET.get('q', '').strip()
+    if ano_letivo:
+        historicos = historicos.filter(ano_letivo=ano_letivo)
+    if busca:
+        historicos = historicos.filter(
+            Q(aluno__first_name__icontains=busca) | Q(aluno__last_name__icontains=busca) | Q(aluno__numero_matricula=busca)
+        )
+
+    pagina = Paginator(historicos, 50).get_page(request.GET.get('page'))
+    return render(request, 'admin/historico/listar_historico.html', {
+        'pagina': pagina,
+        'anos_letivos': HistoricoArquivado.objects.values_list('ano_letivo', flat=True).distinct().order_by('-ano_letivo'),
+        'anos_para_arquivar': anos_letivos_encerrados(),
+        'ano_letivo': ano_letivo,
+        'busca': busca,
+    })
+
+@login_required
+@role_required('admin')
+def detalhes_historico(request, historico_id):
+    historico = get_object_or_404(HistoricoArquivado.objects.select_related('aluno'), id=historico_id)
+    context = {'historico': historico}
+    if historico.tipo == 'ESTAGIO':
+        context['estagio'], context['documentos'] = historico.restaurar_estagio()
+    else:
+        context['dados'] = historico.conteudo
+    return render(request, 'admin/historico/detalhes_historico.html', context)
+
 # === CRUD - MATÉRIAS ===
 
 @login_required
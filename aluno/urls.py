@@ -17,4 +17,7 @@ urlpatterns = [
     path('aluno/estagio/documento/<int:documento_id>/assinar/', views.assinar_documento_aluno, name='assinar_documento_aluno'),
     path('estagio/documento/<int:documento_id>/upload-anexo/', views.upload_arquivo_anexo, name='upload_arquivo_anexo'),
     path('estagio/documento/<int:documento_id>/remover-anexo/', views.remover_arquivo_anexo, name='remover_arquivo_anexo'),
+    path('estagio/documento/<int:documento_id>/upload-partes/', views.iniciar_upload_em_partes, name='iniciar_upload_em_partes'),
+    path('estagio/upload/<uuid:upload_id>/parte/', views.enviar_parte_upload, name='enviar_parte_upload'),
+    path('estagio/upload/<uuid:upload_id>/concluir/', views.concluir_upload_em_partes, name='concluir_upload_em_partes'),
 ]
\ No newline at end of file
@@ -1,10 +1,18 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.urls import reverse
 from django.utils.timezone import now
 import datetime
 from core.decorators import role_required
-from core.models import Nota, Estagio, DocumentoEstagio
+from core.models import Nota, Estagio, DocumentoEstagio, UploadParcial
+from core.eventos import registrar_criacao_em_lote
+from core.pipeline import contar_documentos_criados
+from core.uploads import ErroUpload, iniciar_upload, gravar_parte, concluir_upload
+from core.pdfs import PdfInvalido, validar_pdf, enfileirar_pdf
 from autenticacao.forms import TermoCompromissoForm, FichaIdentificacaoForm, FichaPessoalForm
 
 # === DASHBOARD ===
@@ -61,6 +69,8 @@ def gestao_estagio_aluno(request):
             )
             
         DocumentoEstagio.objects.bulk_create(documentos_para_criar)
+        registrar_criacao_em_lote(documentos_para_criar, ator=request.user)
+        contar_documentos_criados(documentos_para_criar)
         messages.info(request, "Seu Dossiê de Estágio foi criado. Por favor, preencha os documentos necessários.")
 
     return redirect('detalhes_estagio_aluno')
@@ -70,17 +80,9 @@ def gestao_estagio_aluno(request):
 @role_required('aluno')
 def detalhes_estagio_aluno(request):
     estagio = get_object_or_404(Estagio, aluno=request.user)
+    # Só leitura: o status geral é mantido por core.dossies a cada transição
     documentos_qs = DocumentoEstagio.objects.filter(estagio=estagio)
-    
-    existe_pendencia = documentos_qs.exclude(status='CONCLUIDO').exists()
-    
-    # Se NÃO houver pendências (tudo verde) E houver documentos na lista
-    if not existe_pendencia and documentos_qs.exists():
-        # Se o status geral ainda não for APROVADO, atualiza agora
-        if estagio.status_geral != 'APROVADO':
-            estagio.status_geral = 'APROVADO'
-            estagio.save()
-    
+
     ordem_desejada = [
         'TERMO_COMPROMISSO', 'FICHA_IDENTIFICACAO', 'FICHA_PESSOAL',
         'AVALIACAO_ORIENTADOR', 'AVALIACAO_SUPERVISOR', 
@@ -189,13 +191,8 @@ def visualizar_documento_estagio(request, documento_id):
                     dados_reais['data_fim'] = datas_validas[-1]
         except: pass
 
-    # 5. Verificação de Arquivos Anexos (PDF Assinado)
-    pdf_existe = False
-    if documento.pdf_supervisor_assinado:
-        try:
-            pdf_existe = documento.pdf_supervisor_assinado.storage.exists(documento.pdf_supervisor_assinado.name)
-        except Exception:
-            pdf_existe = False 
+    # 5. Verificação de Arquivos Anexos (PDF Assinado), pelos metadados gravados no upload
+    pdf_existe = documento.arquivo_presente('pdf_supervisor_assinado')
 
     context = {
         'documento': documento,
@@ -210,25 +207,52 @@ def visualizar_documento_estagio(request, documento_id):
     return render(request, template_name, context)
 
 
+async def _documento_do_aluno(request, documento_id):
+    usuario = await request.auser()
+    return await aget_object_or_404(DocumentoEstagio, id=documento_id, estagio__aluno=usuario)
+
+
+async def _arquivos_enviados(request):
+    # O ASGI já recebeu o corpo sem bloquear; só a leitura do multipart é síncrona
+    if request.method != 'POST':
+        return {}
+    return await sync_to_async(lambda: request.FILES)()
+
+
+def _salvar_pdf(documento, campo, arquivo):
+    # Valida antes de gravar (PdfInvalido para a mensagem); a recompressão fica para o processar_pdfs
+    validar_pdf(arquivo)
+    setattr(documento, campo, arquivo)
+    documento.save()
+    enfileirar_pdf(documento, campo)
+
+
+# Os uploads e remoções são async: sob o ASGI, um aluno com conexão lenta não
+# prende uma thread; o ORM e o disco rodam em sync_to_async só pelo tempo da gravação.
+
 @login_required
 @role_required('aluno')
-def upload_arquivo_anexo(request, documento_id):
+async def upload_arquivo_anexo(request, documento_id):
     """
     Função genérica para fazer upload no campo 'arquivo_anexo' (RG, CPF, etc.)
     Diferente do 'upload_pdf_assinado' que é para documentos gerados pelo sistema.
     """
-    documento = get_object_or_404(DocumentoEstagio, id=documento_id, estagio__aluno=request.user)
+    documento = await _documento_do_aluno(request, documento_id)
+    arquivos = await _arquivos_enviados(request)
 
-    if request.method == 'POST' and 'arquivo_anexo' in request.FILES:
-        file = request.FILES['arquivo_anexo']
+    if 'arquivo_anexo' in arquivos:
+        file = arquivos['arquivo_anexo']
         
         # Validação simples de extensão (opcional)
         if not file.name.lower().endswith('.pdf'):
              messages.error(request, "Apenas arquivos PDF são permitidos.")
              return redirect('visualizar_documento_estagio', documento_id=documento.id)
 
-        documento.arquivo_anexo = file
-        documento.save()
+        try:
+            await sync_to_async(_salvar_pdf)(documento, 'arquivo_anexo', file)
+        except PdfInvalido as erro:
+            messages.error(request, str(erro))
+            return redirect('visualizar_documento_estagio', documento_id=documento.id)
         messages.success(request, 'Arquivo anexado com sucesso!')
     else:
         messages.error(request, 'Nenhum arquivo selecionado.')
@@ -237,12 +261,12 @@ def upload_arquivo_anexo(request, documento_id):
 
 @login_required
 @role_required('aluno')
-def remover_arquivo_anexo(request, documento_id):
-    documento = get_object_or_404(DocumentoEstagio, id=documento_id, estagio__aluno=request.user)
+async def remover_arquivo_anexo(request, documento_id):
+    documento = await _documento_do_aluno(request, documento_id)
 
     if request.method == 'POST':
         if documento.arquivo_anexo:
-            documento.arquivo_anexo.delete(save=True)
+            await sync_to_async(documento.arquivo_anexo.delete)(save=True)
             messages.success(request, "Arquivo removido com sucesso.")
         else:
             messages.warning(request, "Nenhum arquivo para remover.")
@@ -251,12 +275,16 @@ def remover_arquivo_anexo(request, documento_id):
 
 @login_required
 @role_required('aluno')
-def upload_pdf_assinado(request, documento_id):
-    documento = get_object_or_404(DocumentoEstagio, id=documento_id, estagio__aluno=request.user)
+async def upload_pdf_assinado(request, documento_id):
+    documento = await _documento_do_aluno(request, documento_id)
+    arquivos = await _arquivos_enviados(request)
 
-    if request.method == 'POST' and 'pdf_supervisor_assinado' in request.FILES:
-        documento.pdf_supervisor_assinado = request.FILES['pdf_supervisor_assinado']
-        documento.save()
+    if 'pdf_supervisor_assinado' in arquivos:
+        try:
+            await sync_to_async(_salvar_pdf)(documento, 'pdf_supervisor_assinado', arquivos['pdf_supervisor_assinado'])
+        except PdfInvalido as erro:
+            messages.error(request, str(erro))
+            return redirect('visualizar_documento_estagio', documento_id=documento.id)
         messages.success(request, 'PDF anexado com sucesso!')
     else:
         messages.error(request, 'Nenhum arquivo foi selecionado.')
@@ -265,18 +293,94 @@ def upload_pdf_assinado(request, documento_id):
 
 @login_required
 @role_required('aluno')
-def remover_pdf_assinado(request, documento_id):
-    documento = get_object_or_404(DocumentoEstagio, id=documento_id, estagio__aluno=request.user)
+async def remover_pdf_assinado(request, documento_id):
+    documento = await _documento_do_aluno(request, documento_id)
 
     if request.method == 'POST':
         if documento.pdf_supervisor_assinado:
-            documento.pdf_supervisor_assinado.delete(save=True) 
+            await sync_to_async(documento.pdf_supervisor_assinado.delete)(save=True) 
             messages.success(request, "O PDF anexado foi removido com sucesso.")
         else:
             messages.warning(request, "Nenhum PDF estava anexado a este documento.")
 
     return redirect('visualizar_documento_estagio', documento_id=documento.id)
 
+# === UPLOAD EM PARTES (static/js/upload_em_partes.js) ===
+
+def _erro_upload(erro):
+    return JsonResponse({'erro': str(erro), 'recebido': erro.recebido}, status=erro.status)
+
+
+async def _upload_do_aluno(request, upload_id):
+    usuario = await request.auser()
+    return await aget_object_or_404(UploadParcial.objects.select_related('documento'), id=upload_id, aluno=usuario)
+
+
+@login_required
+@role_required('aluno')
+async def iniciar_upload_em_partes(request, documento_id):
+    """ POST campo, nome, tamanho, sha256 -> {upload_id, urls, recebido, tamanho_parte}. Retoma o upload do mesmo arquivo, se houver. """
+    if request.method != 'POST':
+        return JsonResponse({'erro': "Ação inválida."}, status=405)
+
+    documento = await _documento_do_aluno(request, documento_id)
+    tamanho = request.POST.get('tamanho', '')
+    try:
+        upload = await sync_to_async(iniciar_upload)(
+            await request.auser(), documento, request.POST.get('campo'), request.POST.get('nome'),
+            int(tamanho) if tamanho.isdigit() else 0, request.POST.get('sha256'),
+        )
+    except ErroUpload as erro:
+        return _erro_upload(erro)
+
+    return JsonResponse({
+        'upload_id': str(upload.id),
+        'parte_url': reverse('enviar_parte_upload', args=[upload.id]),
+        'concluir_url': reverse('concluir_upload_em_partes', args=[upload.id]),
+        'recebido': upload.recebido,
+        'tamanho_parte': settings.UPLOAD_TAMANHO_PARTE,
+    })
+
+
+@login_required
+@role_required('aluno')
+async def enviar_parte_upload(request, upload_id):
+    """
+    GET: quanto do arquivo já chegou. POST: o corpo é a parte, que começa em
+    X-Upload-Offset e tem o SHA-256 X-Upload-Checksum.
+    """
+    upload = await _upload_do_aluno(request, upload_id)
+    if request.method == 'GET':
+        return JsonResponse({'recebido': upload.recebido, 'tamanho': upload.tamanho})
+    if request.method != 'POST':
+        return JsonResponse({'erro': "Ação inválida."}, status=405)
+
+    offset = request.headers.get('X-Upload-Offset', '')
+    try:
+        recebido = await sync_to_async(gravar_parte)(
+            upload, int(offset) if offset.isdigit() else -1, request.body, request.headers.get('X-Upload-Checksum'),
+        )
+    except ErroUpload as erro:
+        return _erro_upload(erro)
+    return JsonResponse({'recebido': recebido})
+
+
+@login_required
+@role_required('aluno')
+async def concluir_upload_em_partes(request, upload_id):
+    """ Confere o arquivo montado e anexa ao campo do documento. """
+    if request.method != 'POST':
+        return JsonResponse({'erro': "Ação inválida."}, status=405)
+
+    upload = await _upload_do_aluno(request, upload_id)
+    try:
+        documento = await sync_to_async(concluir_upload)(upload)
+    except ErroUpload as erro:
+        return _erro_upload(erro)
+
+    messages.success(request, 'Arquivo anexado com sucesso!')
+    return JsonResponse({'redirecionar': reverse('visualizar_documento_estagio', args=[documento.id])})
+
 @login_required
 @role_required('aluno')
 def assinar_documento_aluno(request, documento_id):
@@ -393,7 +497,7 @@ def assinar_documento_aluno(request, documento_id):
     else:
         pass 
 
-    documento.save()
+    documento.save(ator=request.user)
     
     # Atualiza o status geral do estágio se for o primeiro envio
     if documento.estagio.status_geral == 'RASCUNHO_ALUNO' or documento.estagio.status_geral == 'PENDENTE_CORRECAO':
@@ -443,7 +547,15 @@ def preencher_documento_estagio(request, documento_id):
             form = FormClass(request.POST, request.FILES)
         
         # O form.is_valid() agora deve passar sempre (devido ao nosso hack no forms.py)
-        if form.is_valid():
+        valido = form.is_valid()
+        if valido and form.cleaned_data.get('anexo_assinaturas'):
+            try:
+                validar_pdf(form.cleaned_data['anexo_assinaturas'])
+            except PdfInvalido as erro:
+                form.add_error('anexo_assinaturas', str(erro))
+                valido = False
+
+        if valido:
             dados_para_json = form.cleaned_data.copy()
             
             # === 1. CONVERSÃO CRÍTICA DE DATAS PARA STRING ===
@@ -534,6 +646,8 @@ def preencher_documento_estagio(request, documento_id):
                  documento.dados_formulario = dados_para_json
 
             documento.save() 
+            if documento.tipo_documento == 'TERMO_COMPROMISSO' and anexo_pdf:
+                enfileirar_pdf(documento, 'pdf_supervisor_assinado')
 
             messages.success(request, f"'{documento.get_tipo_documento_display()}' salvo como Rascunho!")
             return redirect('visualizar_documento_estagio', documento_id=documento.id)
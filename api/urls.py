@@ -7,4 +7,7 @@ urlpatterns = [
     path('api/get-opcoes-turma/', views.get_opcoes_turma, name='get_opcoes_turma'),
     path('debug-log/', views.debug_log, name='debug_log'),
     path('api/get_materias_por_curso/', views.get_materias_por_curso, name='get_materias_por_curso'),
+    path('api/materias/buscar/', views.buscar_materias, name='buscar_materias'),
+    path('api/eventos/', views.eventos_tempo_real, name='eventos_tempo_real'),
+    path('api/caixa/<int:documento_id>/lido/', views.marcar_documento_lido, name='marcar_documento_lido'),
 ]
\ No newline at end of file
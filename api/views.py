@@ -1,10 +1,26 @@
-from django.http import JsonResponse
-from core.models import Turma, Curso
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
+from core.caixa_entrada import marcar_como_lido
+from core.models import Turma, Curso, Materia
+from core.tempo_real import Assinatura, chaves_do_usuario, eventos_do_usuario, ultimo_evento_id
+
+# Quantas sugestões o autocomplete devolve por busca
+LIMITE_AUTOCOMPLETE = 20
+
+# Intervalo do "ping" que mantém a conexão SSE aberta em proxies
+SSE_HEARTBEAT = 15
 
 
 # === VIEWS DE API ===
 
-def get_opcoes_turma(request):
+async def get_opcoes_turma(request):
     curso_id = request.GET.get('curso_id')
     ano_modulo = request.GET.get('ano_modulo')
     turno = request.GET.get('turno')
@@ -17,11 +33,11 @@ def get_opcoes_turma(request):
     if turno: queryset = queryset.filter(turno=turno)
 
     if target == 'ano_modulo':
-        data = list(queryset.order_by('ano_modulo').values_list('ano_modulo', flat=True).distinct())
+        data = [valor async for valor in queryset.order_by('ano_modulo').values_list('ano_modulo', flat=True).distinct()]
         return JsonResponse({'options': data})
 
     if target == 'turno':
-        turnos_existentes = list(queryset.values_list('turno', flat=True).distinct())
+        turnos_existentes = [valor async for valor in queryset.values_list('turno', flat=True).distinct()]
         data = []
         for valor, display in Turma.TURNO_CHOICES:
             if valor in turnos_existentes:
@@ -30,7 +46,7 @@ def get_opcoes_turma(request):
 
     if target == 'turma':
         data = []
-        for turma_obj in queryset.order_by('turma'):
+        async for turma_obj in queryset.order_by('turma'):
             data.append({'id': turma_obj.id, 'display': turma_obj.nome_curto})
         return JsonResponse({'options': data})
 
@@ -45,17 +61,86 @@ def debug_log(request):
     print("===================================\n")
     return JsonResponse({'status': 'ok'})
 
-def get_materias_por_curso(request):
+async def get_materias_por_curso(request):
     curso_id = request.GET.get('curso_id')
     if not curso_id:
         return JsonResponse({'materias': []})
     try:
-        curso = Curso.objects.get(id=curso_id)
+        curso = await Curso.objects.aget(id=curso_id)
         materias = curso.materias.all().order_by('nome')
         
-        materias_list = [{"id": materia.id, "nome": materia.nome} for materia in materias]
+        materias_list = [{"id": materia_id, "nome": nome} async for materia_id, nome in materias.values_list('id', 'nome')]
         
         return JsonResponse({'materias': materias_list})
         
     except Curso.DoesNotExist:
-        return JsonResponse({'materias': []})
\ No newline at end of file
+        return JsonResponse({'materias': []})
+
+
+@login_required
+def buscar_materias(request):
+    """ Autocomplete de matérias: ?q=<trecho do nome>&curso_id=<opcional, restringe à grade do curso> """
+    termo = request.GET.get('q', '').strip()
+    curso_id = request.GET.get('curso_id')
+
+    materias = Materia.objects.all()
+    if curso_id:
+        materias = materias.filter(cursos__id=curso_id)
+    if termo:
+        materias = materias.filter(nome__icontains=termo)
+
+    resultados = [
+        {"id": materia_id, "nome": nome}
+        for materia_id, nome in materias.order_by('nome').values_list('id', 'nome')[:LIMITE_AUTOCOMPLETE]
+    ]
+    return JsonResponse({'materias': resultados})
+
+
+@require_POST
+@login_required
+def marcar_documento_lido(request, documento_id):
+    """ Enviado pela página do documento ao abrir: marca a pendência do usuário como vista. """
+    marcar_como_lido(request.user, documento_id)
+    return HttpResponse(status=204)
+
+
+@login_required
+async def eventos_tempo_real(request):
+    """
+    Server-Sent Events com as mudanças de status dos documentos que interessam
+    ao usuário (e o total de pendências da caixa de entrada). Precisa do ASGI
+    (sgde/asgi.py, ex: uvicorn sgde.asgi:application): no WSGI a resposta
+    ficaria presa a um worker até o fim da conexão, então lá não há stream.
+    """
+    if not isinstance(request, ASGIRequest):
+        # 204 faz o EventSource desistir de reconectar; a página segue funcionando sem tempo real
+        return HttpResponse(status=204)
+
+    usuario = await request.auser()
+    chaves = chaves_do_usuario(usuario)
+    cabecalho = request.headers.get('Last-Event-ID', '')
+    polling = getattr(settings, 'TEMPO_REAL_POLLING', None)
+    duracao = getattr(settings, 'TEMPO_REAL_DURACAO', 300)
+
+    async def fluxo():
+        cursor = int(cabecalho) if cabecalho.isdigit() else await sync_to_async(ultimo_evento_id)()
+        loop = asyncio.get_running_loop()
+        fim = loop.time() + duracao
+        yield "retry: 5000\n\n"
+        with Assinatura(chaves) as assinatura:
+            while loop.time() < fim:
+                avisada = await assinatura.aguardar(polling or SSE_HEARTBEAT)
+                if not (avisada or polling):
+                    yield f"id: {cursor}\n: ping\n\n"
+                    continue
+                cursor, eventos, nao_lidos = await sync_to_async(eventos_do_usuario)(usuario, cursor)
+                for evento in eventos:
+                    yield f"event: documento\ndata: {json.dumps(evento)}\n\n"
+                if nao_lidos is not None:
+                    yield f"event: caixa\ndata: {json.dumps({'nao_lidos': nao_lidos})}\n\n"
+                yield f"id: {cursor}\n\n"
+
+    resposta = StreamingHttpResponse(fluxo(), content_type='text/event-stream')
+    resposta['Cache-Control'] = 'no-cache'
+    resposta['X-Accel-Buffering'] = 'no'
+    return resposta
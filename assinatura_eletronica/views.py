@@ -1,6 +1,6 @@
 from django.shortcuts import render
 import datetime
-from core.models import DocumentoEstagio
+from core.models import DocumentoEstagio, DocumentoArquivado
 
 
 # === QR CODE ===
@@ -9,6 +9,11 @@ def verificar_documento_publico(request, codigo_uuid):
     try:
         documento = DocumentoEstagio.objects.get(codigo_verificador=codigo_uuid)
     except DocumentoEstagio.DoesNotExist:
+        # Dossiês de anos letivos arquivados continuam verificáveis pelo snapshot
+        arquivado = DocumentoArquivado.objects.select_related('historico').filter(codigo_verificador=codigo_uuid).first()
+        documento = arquivado.restaurar() if arquivado else None
+
+    if documento is None:
         return render(request, 'erro_verificacao.html', {
             'mensagem_erro': 'O código verificador não foi encontrado.'
         })
@@ -32,7 +37,7 @@ def verificar_documento_publico(request, codigo_uuid):
         'estagio': estagio,
         'aluno': aluno,
         'dados': dados,
-        'pdf_existe': documento.pdf_supervisor_assinado.storage.exists(documento.pdf_supervisor_assinado.name) if documento.pdf_supervisor_assinado else False,
+        'pdf_existe': documento.arquivo_presente('pdf_supervisor_assinado'),
         'is_public_verification': True, 
     }
     
@@ -2,7 +2,9 @@ from django import forms
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import authenticate, get_user_model
 from django.forms import modelformset_factory, BaseModelFormSet
-from core.models import Turma, AlunoTurma, ProfessorMateriaAnoCursoModalidade, Curso, Estagio
+from django.urls import reverse_lazy
+from core.models import Turma, AlunoTurma, ProfessorMateriaAnoCursoModalidade, Curso, Estagio, Materia
+from core.diretorio import diretorio_orientadores, opcoes_materias, opcoes_cursos
 import datetime
 import random
 
@@ -29,19 +31,77 @@ class EmailAuthenticationForm(AuthenticationForm):
                 )
         return self.cleaned_data
     
+class OpcoesEmCacheIterator(forms.models.ModelChoiceIterator):
+    """ Percorre uma lista [(id, rótulo)] em cache em vez de consultar o queryset. """
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        yield from self.field.opcoes()
+
+    def __len__(self):
+        return len(self.field.opcoes()) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.opcoes())
+
+
+class ModelChoiceFieldEmCache(forms.ModelChoiceField):
+    """
+    ModelChoiceField cujas opções vêm de uma função que devolve [(id, rótulo)] em cache
+    (ver core.diretorio). Vários formulários da mesma página compartilham a lista,
+    em vez de cada select refazer a consulta. A validação continua usando o queryset.
+    """
+    iterator = OpcoesEmCacheIterator
+
+    def __init__(self, *args, opcoes, **kwargs):
+        self.opcoes = opcoes
+        super().__init__(*args, **kwargs)
+
+    def label_from_instance(self, obj):
+        return dict(self.opcoes()).get(obj.pk, str(obj))
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    Select que só renderiza a opção selecionada (e a vazia). As demais são
+    buscadas pelo endpoint em 'data-autocomplete-url' (static/js/autocomplete_materias.js).
+    """
+    def optgroups(self, name, value, attrs=None):
+        selecionados = {str(v) for v in value if v not in (None, '')}
+        todas = self.choices
+        self.choices = [(v, rotulo) for v, rotulo in todas if v == '' or str(v) in selecionados]
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = todas
+
+
 class ProfessorMateriaAnoCursoModalidadeForm(forms.ModelForm):
+    # Catálogos compartilhados por todas as linhas do formset (cache em core.diretorio)
+    materia = ModelChoiceFieldEmCache(
+        queryset=Materia.objects.all(),
+        opcoes=opcoes_materias,
+        label='Matéria',
+        widget=AutocompleteSelect(attrs={
+            'class': 'form-select',
+            'data-autocomplete-url': reverse_lazy('buscar_materias'),
+        }),
+    )
+    curso = ModelChoiceFieldEmCache(
+        queryset=Curso.objects.all(),
+        opcoes=opcoes_cursos,
+        label='Curso',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+
     class Meta:
         model = ProfessorMateriaAnoCursoModalidade
         fields = ['materia', 'curso', 'ano_modulo', 'modalidade']
         labels = {
-            'materia': 'Matéria',
-            'curso': 'Curso',
             'ano_modulo': 'Ano/Módulo',
             'modalidade': 'Modalidade',
         }
         widgets = {
-            'materia': forms.Select(attrs={'class': 'form-select'}),
-            'curso': forms.Select(attrs={'class': 'form-select'}),
             'ano_modulo': forms.Select(attrs={'class': 'form-select'}),
             'modalidade': forms.Select(attrs={'class': 'form-select'}),
         }
@@ -117,7 +177,7 @@ class AlunoCreateForm(forms.ModelForm):
                 pass 
         if self.instance and self.instance.pk:
             try:
-                turma_atual = self.instance.alunoturma_set.first().turma
+                turma_atual = self.instance.alunoturma_set.filter(ativo=True).first().turma
                 if turma_atual:
                     self.fields['curso'].initial = turma_atual.curso
                     
@@ -159,9 +219,16 @@ class AlunoCreateForm(forms.ModelForm):
             aluno.save()
             turma_selecionada = self.cleaned_data.get('turma')
             if turma_selecionada:
+                # Troca de turma: a matrícula atual fica inativa, como na promoção.
+                # A busca é pelo par (aluno, turma), que é único: voltar para uma
+                # turma já cursada reativa a matrícula antiga em vez de duplicá-la
+                AlunoTurma.objects.filter(aluno=aluno, ativo=True).exclude(
+                    turma=turma_selecionada
+                ).update(ativo=False)
                 AlunoTurma.objects.update_or_create(
                     aluno=aluno,
-                    defaults={'turma': turma_selecionada}
+                    turma=turma_selecionada,
+                    defaults={'ativo': True}
                 )
         return aluno
 
@@ -279,22 +346,17 @@ class ServidorCreateForm(forms.ModelForm):
 # é usado para preencher os dados.
 
 
-class ProfessorOrientadorChoiceField(forms.ModelChoiceField):
+class ProfessorOrientadorChoiceField(ModelChoiceFieldEmCache):
     """
     Campo customizado que muda como o nome do professor é exibido.
     Ex: "Alex Barbosa - Informática (Internet)"
+    As opções vêm do diretório de orientadores em cache (core.diretorio),
+    então o select é montado sem consultar um vínculo por professor.
     """
-    def label_from_instance(self, obj):
-        prof_name = obj.get_full_name()
-        
-        vinculo = obj.professormateriaanocursomodalidade_set.select_related('materia', 'curso').first()
-        
-        if vinculo:
-            details = f"{vinculo.materia.nome} ({vinculo.curso.nome})"
-            return f"{prof_name} - {details}"
-        else:
-            return f"{prof_name} - (Sem vínculos cadastrados)"
-        
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('opcoes', diretorio_orientadores)
+        super().__init__(*args, **kwargs)
+
 
 class TermoCompromissoForm(forms.Form):
     """
@@ -342,7 +404,7 @@ class TermoCompromissoForm(forms.Form):
     anexo_assinaturas = forms.FileField(
         label="Anexar PDF (com assinaturas do Supervisor/Responsável)",
         required=False,
-        widget=forms.ClearableFileInput(attrs={'class': 'form-control form-control-sm'})
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control form-control-sm', 'data-upload-campo': 'pdf_supervisor_assinado'})
     )
     
     # MÉTODO __init__
@@ -458,7 +520,7 @@ class FichaIdentificacaoForm(forms.Form):
     
     foto_3x4 = forms.ImageField(
         label="Foto 3x4 (Opcional)",
-        widget=forms.ClearableFileInput(attrs={'class': 'form-control form-control-sm'})
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control form-control-sm', 'data-upload-campo': 'foto_3x4'})
     )
 
     def __init__(self, *args, **kwargs):
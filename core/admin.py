@@ -3,11 +3,21 @@ from django.contrib.auth.admin import UserAdmin
 from .models import (
     CustomUser, Curso, Turma, Materia, 
     ProfessorMateriaAnoCursoModalidade, AlunoTurma, 
-    Nota, Estagio, DocumentoEstagio
+    Nota, Estagio, DocumentoEstagio, EventoDocumento
 )
 
 # --- Configurações para melhorar a exibição no Admin ---
 
+class ComRelacionadosAdmin(admin.ModelAdmin):
+    """
+    O ChangeList do Django ignora 'list_select_related' quando o queryset já vem com
+    select_related (caso dos managers padrão de core.models), então aplicamos aqui.
+    """
+    list_select_related = ()
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(*self.list_select_related)
+
 class CustomUserAdmin(UserAdmin):
     """
     Personaliza a exibição do CustomUser no Admin.
@@ -29,7 +39,7 @@ class CustomUserAdmin(UserAdmin):
         }),
     )
 
-class EstagioAdmin(admin.ModelAdmin):
+class EstagioAdmin(ComRelacionadosAdmin):
     """
     Personaliza a exibição dos Dossiês de Estágio.
     Esta é a configuração que você precisa para corrigir o problema.
@@ -43,16 +53,51 @@ class EstagioAdmin(admin.ModelAdmin):
     
     # IMPORTANTE: Permite que você procure/selecione alunos e orientadores
     autocomplete_fields = ['aluno', 'orientador']
+    list_select_related = ('aluno', 'orientador')
 
-class TurmaAdmin(admin.ModelAdmin):
+class TurmaAdmin(ComRelacionadosAdmin):
     list_display = ('__str__', 'curso', 'ano_modulo', 'turno', 'modalidade')
     list_filter = ('curso__eixo', 'curso', 'ano_modulo', 'turno', 'modalidade')
     search_fields = ('curso__nome',) # Habilita a busca para o autocomplete
+    list_select_related = ('curso',)
 
-class AlunoTurmaAdmin(admin.ModelAdmin):
+class AlunoTurmaAdmin(ComRelacionadosAdmin):
     list_display = ('aluno', 'turma', 'ano_letivo')
     search_fields = ('aluno__first_name', 'turma__curso__nome')
     autocomplete_fields = ['aluno', 'turma'] # Facilita a busca
+    list_select_related = ('aluno', 'turma__curso')
+
+class ProfessorMateriaAnoCursoModalidadeAdmin(ComRelacionadosAdmin):
+    list_display = ('professor', 'materia', 'curso', 'ano_modulo', 'modalidade')
+    list_filter = ('curso', 'ano_modulo', 'modalidade')
+    list_select_related = ('professor', 'materia', 'curso')
+
+class NotaAdmin(ComRelacionadosAdmin):
+    list_display = ('aluno', 'materia', 'turma', 'media_final', 'status_final')
+    list_filter = ('status_final',)
+    search_fields = ('aluno__first_name', 'aluno__last_name', 'materia__nome')
+    list_select_related = ('aluno', 'materia', 'turma__curso')
+
+class DocumentoEstagioAdmin(ComRelacionadosAdmin):
+    list_display = ('__str__', 'tipo_documento', 'status', 'data_upload')
+    list_filter = ('tipo_documento', 'status')
+    list_select_related = ('estagio__aluno',)
+
+class EventoDocumentoAdmin(admin.ModelAdmin):
+    # O log é somente-inclusão: no admin ele só pode ser consultado
+    list_display = ('criado_em', 'tipo_documento', 'status_anterior', 'status_novo', 'ator', 'segundos_no_status_anterior')
+    list_filter = ('status_novo', 'tipo_documento')
+    list_select_related = ('ator',)
+    date_hierarchy = 'criado_em'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 # --- REGISTRO DOS MODELOS ---
 # (Isto é o que faz eles aparecerem na tela)
@@ -61,8 +106,9 @@ admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(Curso)
 admin.site.register(Turma, TurmaAdmin)
 admin.site.register(Materia)
-admin.site.register(ProfessorMateriaAnoCursoModalidade)
+admin.site.register(ProfessorMateriaAnoCursoModalidade, ProfessorMateriaAnoCursoModalidadeAdmin)
 admin.site.register(AlunoTurma, AlunoTurmaAdmin)
-admin.site.register(Nota)
+admin.site.register(Nota, NotaAdmin)
 admin.site.register(Estagio, EstagioAdmin) # <-- O mais importante para você agora
-admin.site.register(DocumentoEstagio)
\ No newline at end of file
+admin.site.register(DocumentoEstagio, DocumentoEstagioAdmin)
+admin.site.register(EventoDocumento, EventoDocumentoAdmin)
\ No newline at end of file
@@ -0,0 +1,163 @@
+# core/arquivamento.py
+import itertools
+
+from django.core import serializers
+from django.db import transaction
+from django.db.models import F
+
+from .models import (
+    AlunoTurma, Nota, Estagio, DocumentoEstagio,
+    HistoricoArquivado, DocumentoArquivado,
+)
+
+# Matrículas arquivadas por transação; cada lote é independente.
+TAMANHO_LOTE_ARQUIVAMENTO = 500
+
+CAMPOS_ARQUIVO_DOCUMENTO = ['arquivo_anexo', 'pdf_supervisor_assinado', 'foto_3x4']
+
+
+def anos_letivos_encerrados():
+    """ Anos letivos que ainda têm matrículas inativas (já promovidas/concluídas) nas tabelas principais. """
+    return list(
+        AlunoTurma.objects.filter(ativo=False).exclude(ano_letivo__isnull=True)
+        .values_list('ano_letivo', flat=True).distinct().order_by('ano_letivo')
+    )
+
+
+def _snapshot_matricula(matricula, notas):
+    turma = matricula.turma
+    return {
+        'turma_id': turma.id,
+        'turma': str(turma),
+        'curso': turma.curso.nome,
+        'ano_modulo': turma.ano_modulo,
+        'data_matricula': matricula.data_matricula,
+        'notas': [
+            {
+                'materia': nota.materia.nome,
+                'nota_1': nota.nota_1,
+                'nota_2': nota.nota_2,
+                'nota_3': nota.nota_3,
+                'nota_recuperacao': nota.nota_recuperacao,
+                'media_final': nota.media_final,
+                'status_final': nota.status_final,
+            }
+            for nota in sorted(notas, key=lambda n: n.materia.nome)
+        ],
+    }
+
+
+def _arquivar_lote(matriculas, ano_letivo):
+    pares = {(m.aluno_id, m.turma_id) for m in matriculas}
+    notas_por_par = {}
+    for nota in Nota.objects.filter(
+        aluno_id__in={a for a, _ in pares}, turma_id__in={t for _, t in pares}
+    ).select_related('materia'):
+        if (nota.aluno_id, nota.turma_id) in pares:
+            notas_por_par.setdefault((nota.aluno_id, nota.turma_id), []).append(nota)
+
+    historicos = [
+        HistoricoArquivado(
+            aluno_id=m.aluno_id,
+            ano_letivo=ano_letivo,
+            tipo='MATRICULA',
+            descricao=str(m.turma)[:255],
+            dados=HistoricoArquivado.compactar(
+                _snapshot_matricula(m, notas_por_par.get((m.aluno_id, m.turma_id), []))
+            ),
+        )
+        for m in matriculas
+    ]
+
+    with transaction.atomic():
+        HistoricoArquivado.objects.bulk_create(historicos)
+        Nota.objects.filter(
+            id__in=[nota.id for notas in notas_por_par.values() for nota in notas]
+        ).delete()
+        AlunoTurma.objects.filter(id__in=[m.id for m in matriculas]).delete()
+
+    return len(historicos), sum(len(notas) for notas in notas_por_par.values())
+
+
+def _arquivar_estagios(alunos_ids, ano_letivo):
+    """
+    Dossiês aprovados de alunos que já não têm matrícula ativa (concluintes).
+    Os arquivos enviados continuam no disco; o snapshot guarda os caminhos.
+    """
+    estagios = list(
+        Estagio.objects.filter(aluno_id__in=alunos_ids, status_geral='APROVADO')
+        .exclude(aluno__alunoturma__ativo=True)
+        .prefetch_related('documentos')
+    )
+
+    for estagio in estagios:
+        documentos = list(estagio.documentos.all())
+        historico = HistoricoArquivado(
+            aluno_id=estagio.aluno_id,
+            ano_letivo=ano_letivo,
+            tipo='ESTAGIO',
+            descricao=estagio.supervisor_empresa[:255],
+            dados=HistoricoArquivado.compactar({
+                'registros': serializers.serialize('python', [estagio] + documentos),
+            }),
+        )
+        with transaction.atomic():
+            historico.save()
+            DocumentoArquivado.objects.bulk_create([
+                DocumentoArquivado(
+                    historico=historico,
+                    tipo_documento=documento.tipo_documento,
+                    codigo_verificador=documento.codigo_verificador,
+                )
+                for documento in documentos
+            ])
+            # Limpa os campos de arquivo antes de apagar, senão o pre_delete
+            # de DocumentoEstagio removeria do disco os arquivos arquivados
+            DocumentoEstagio.objects.filter(estagio=estagio).update(
+                **{campo: '' for campo in CAMPOS_ARQUIVO_DOCUMENTO}
+            )
+            estagio.delete()
+
+    return len(estagios)
+
+
+def arquivar_ano_letivo(ano_letivo, dry_run=False):
+    """
+    Move um ano letivo encerrado para HistoricoArquivado.
+
+    Só as matrículas inativas daquele ano letivo (e as notas delas) saem das tabelas
+    principais; alunos retidos continuam com a matrícula ativa e não são tocados.
+    Os dossiês de estágio aprovados dos concluintes vão junto.
+    Retorna um dicionário com os totais (ou o que seria arquivado, em dry_run).
+    """
+    matriculas = AlunoTurma.objects.filter(ativo=False, ano_letivo=ano_letivo)
+
+    if dry_run:
+        alunos_ids = matriculas.values('aluno_id')
+        return {
+            'matriculas': matriculas.count(),
+            'notas': Nota.objects.filter(
+                aluno__alunoturma__ativo=False,
+                aluno__alunoturma__ano_letivo=ano_letivo,
+                aluno__alunoturma__turma_id=F('turma_id'),
+            ).count(),
+            'estagios': Estagio.objects.filter(aluno_id__in=alunos_ids, status_geral='APROVADO')
+            .exclude(aluno__alunoturma__ativo=True).count(),
+        }
+
+    totais = {'matriculas': 0, 'notas': 0, 'estagios': 0}
+    alunos_ids = set()
+    # Os ids são lidos antes: as linhas são apagadas enquanto os lotes avançam
+    ids = iter(list(matriculas.order_by('id').values_list('id', flat=True)))
+    while True:
+        lote_ids = list(itertools.islice(ids, TAMANHO_LOTE_ARQUIVAMENTO))
+        if not lote_ids:
+            break
+        lote = list(AlunoTurma.objects.filter(id__in=lote_ids).select_related('turma__curso'))
+        arquivadas, notas = _arquivar_lote(lote, ano_letivo)
+        totais['matriculas'] += arquivadas
+        totais['notas'] += notas
+        alunos_ids.update(m.aluno_id for m in lote)
+
+    totais['estagios'] = _arquivar_estagios(alunos_ids, ano_letivo)
+    return totais
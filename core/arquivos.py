@@ -0,0 +1,196 @@
+# core/arquivos.py
+"""
+Metadados dos arquivos de DocumentoEstagio (campo metadados_arquivos):
+{campo: {nome, tamanho, sha256, tipo, paginas, assinado, presente, verificado_em}}.
+
+Gravados no próprio save que guarda o arquivo (lidos do upload, antes de ir
+para o storage), então as telas sabem se o arquivo existe pela linha do
+documento, sem consultar o storage a cada requisição. O comando
+verificar_arquivos confere periodicamente se os arquivos continuam lá.
+"""
+import hashlib
+import mimetypes
+
+from django.utils import timezone
+
+from .arquivamento import CAMPOS_ARQUIVO_DOCUMENTO
+from .models import DocumentoEstagio
+from .pdfs import contar_paginas, tem_assinatura
+
+TAMANHO_LOTE_VERIFICACAO = 500
+
+
+def _tipo(inicio, nome):
+    # Pelo conteúdo, não pela extensão informada pelo navegador
+    if b'%PDF-' in inicio[:1024]:
+        return 'application/pdf'
+    if inicio.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if inicio.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    return mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+
+
+def ler_metadados(arquivo, nome):
+    """ Tamanho, sha256, tipo, páginas e assinatura digital (PDF) lendo o arquivo uma vez, em blocos. """
+    soma = hashlib.sha256()
+    tamanho = 0
+    inicio = b''
+    blocos = []
+    for bloco in arquivo.chunks():
+        if not tamanho:
+            inicio = bloco[:1024]
+        soma.update(bloco)
+        tamanho += len(bloco)
+        if b'%PDF-' in inicio:
+            blocos.append(bloco)  # só PDFs (até PDF_TAMANHO_MAXIMO) ficam na memória para contar as páginas
+    tipo = _tipo(inicio, nome)
+    pdf = b''.join(blocos) if tipo == 'application/pdf' else None
+    return {
+        'tamanho': tamanho,
+        'sha256': soma.hexdigest(),
+        'tipo': tipo,
+        'paginas': contar_paginas(pdf) if pdf is not None else None,
+        'assinado': tem_assinatura(pdf) if pdf is not None else None,
+    }
+
+
+def campos_alterados(documento, update_fields=None):
+    """ Campos de arquivo cujo arquivo atual não é o dos metadados gravados. """
+    metadados = documento.metadados_arquivos or {}
+    return [
+        campo for campo in CAMPOS_ARQUIVO_DOCUMENTO
+        if (update_fields is None or campo in update_fields)
+        and (getattr(documento, campo).name or None) != (metadados.get(campo) or {}).get('nome')
+    ]
+
+
+def atualizar_metadados(documento, campos):
+    """
+    Chamada por DocumentoEstagio.save antes de gravar a linha: um upload ainda
+    não gravado é lido direto do arquivo recebido e então enviado ao storage
+    (o que o FileField faria no pre_save), para registrar o nome definitivo.
+    """
+    metadados = dict(documento.metadados_arquivos or {})
+    agora = timezone.now().isoformat()
+    for campo in campos:
+        arquivo = getattr(documento, campo)
+        if not arquivo:
+            metadados.pop(campo, None)
+            continue
+        if not arquivo._committed:
+            lidos = ler_metadados(arquivo.file, arquivo.name)
+            arquivo.save(arquivo.name, arquivo.file, save=False)
+            lidos['presente'] = True
+        else:
+            lidos = _ler_do_storage(arquivo)
+        metadados[campo] = {'nome': arquivo.name, **lidos, 'verificado_em': agora}
+    documento.metadados_arquivos = metadados
+
+
+def registrar_metadados(documento, campo, lidos):
+    """
+    Para quem já leu o arquivo antes de gravá-lo no storage (core.uploads):
+    registra os metadados do nome atual do campo, e o save do documento não
+    precisa ler o arquivo de volta.
+    """
+    documento.metadados_arquivos = {
+        **(documento.metadados_arquivos or {}),
+        campo: {
+            'nome': getattr(documento, campo).name, **lidos,
+            'presente': True, 'verificado_em': timezone.now().isoformat(),
+        },
+    }
+
+
+def _ler_do_storage(arquivo):
+    try:
+        with arquivo.storage.open(arquivo.name, 'rb') as aberto:
+            return {**ler_metadados(aberto, arquivo.name), 'presente': True}
+    except FileNotFoundError:
+        return {'presente': False}
+
+
+def regravar_metadados(documento_id, campo):
+    """ O conteúdo do arquivo mudou sem trocar de nome (ex: PDF recomprimido pelo processar_pdfs). """
+    documento = DocumentoEstagio.objects.select_related(None).only('id', campo, 'metadados_arquivos').filter(
+        id=documento_id
+    ).first()
+    if documento is None or not getattr(documento, campo):
+        return
+    metadados = dict(documento.metadados_arquivos or {})
+    metadados[campo] = {
+        'nome': getattr(documento, campo).name,
+        **_ler_do_storage(getattr(documento, campo)),
+        'verificado_em': timezone.now().isoformat(),
+    }
+    DocumentoEstagio.objects.filter(id=documento_id).update(metadados_arquivos=metadados)
+
+
+def verificar_arquivos(conferir_conteudo=False):
+    """
+    Confere no storage os arquivos de todos os documentos (comando
+    verificar_arquivos): existência e tamanho, ou também o sha256 com
+    conferir_conteudo. Metadados ausentes ou de outro arquivo são lidos de novo.
+    Só o campo metadados_arquivos é regravado, em lotes.
+
+    Devolve (conferidos, [(documento, campo, problema)]).
+    """
+    sem_arquivo = {campo: '' for campo in CAMPOS_ARQUIVO_DOCUMENTO}
+    documentos = DocumentoEstagio.objects.select_related(None).only(
+        'id', 'metadados_arquivos', *CAMPOS_ARQUIVO_DOCUMENTO
+    ).exclude(**sem_arquivo).order_by('id')
+
+    conferidos = 0
+    problemas = []
+    alterados = []
+    for documento in documentos.iterator(chunk_size=TAMANHO_LOTE_VERIFICACAO):
+        metadados = dict(documento.metadados_arquivos or {})
+        mudou = False
+        for campo in CAMPOS_ARQUIVO_DOCUMENTO:
+            arquivo = getattr(documento, campo)
+            if not arquivo:
+                mudou |= metadados.pop(campo, None) is not None
+                continue
+            conferidos += 1
+            registrado = metadados.get(campo) or {}
+            novo = _conferir(arquivo, registrado, conferir_conteudo)
+            if not novo['presente']:
+                problemas.append((documento, campo, "arquivo não encontrado no storage"))
+            elif novo.get('integro') is False:
+                problemas.append((documento, campo, "conteúdo diferente do registrado no envio"))
+            # verificado_em muda a cada rodada; só ele diferente não justifica regravar
+            if {**novo, 'verificado_em': None} != {**registrado, 'verificado_em': None}:
+                metadados[campo] = novo
+                mudou = True
+        if mudou:
+            documento.metadados_arquivos = metadados
+            alterados.append(documento)
+        if len(alterados) >= TAMANHO_LOTE_VERIFICACAO:
+            DocumentoEstagio.objects.bulk_update(alterados, ['metadados_arquivos'])
+            alterados = []
+    if alterados:
+        DocumentoEstagio.objects.bulk_update(alterados, ['metadados_arquivos'])
+    return conferidos, problemas
+
+
+def _conferir(arquivo, registrado, conferir_conteudo):
+    agora = timezone.now().isoformat()
+    if registrado.get('nome') != arquivo.name or 'sha256' not in registrado:
+        return {'nome': arquivo.name, **_ler_do_storage(arquivo), 'verificado_em': agora}
+
+    conferido = dict(registrado, verificado_em=agora)
+    conferido.pop('integro', None)
+    try:
+        tamanho = arquivo.storage.size(arquivo.name)
+    except FileNotFoundError:
+        conferido['presente'] = False
+        return conferido
+    conferido['presente'] = True
+    if tamanho != registrado.get('tamanho'):
+        conferido['integro'] = False
+    elif conferir_conteudo:
+        with arquivo.storage.open(arquivo.name, 'rb') as aberto:
+            if ler_metadados(aberto, arquivo.name)['sha256'] != registrado['sha256']:
+                conferido['integro'] = False
+    return conferido
@@ -0,0 +1,127 @@
+# core/caixa_entrada.py
+from django.utils.timezone import now
+
+from .models import Estagio, DocumentoEstagio, ItemCaixaEntrada
+
+AVALIACOES = ['AVALIACAO_ORIENTADOR', 'AVALIACAO_SUPERVISOR']
+# A Avaliação do Orientador pode ser assinada ainda em rascunho
+RASCUNHOS_AVALIACAO_ORIENTADOR = ['RASCUNHO', 'RASCUNHO_ORIENTADOR']
+
+
+def destinos_do_estagio(estagio, documentos):
+    """
+    Quem precisa agir agora sobre cada documento do estágio:
+    {(documento_id, papel): (destinatario_id, eixo)}.
+
+    - Orientador: documentos aguardando a assinatura dele (fora a Avaliação do Supervisor)
+      e a Avaliação do Orientador ainda em rascunho, que só entra quando todos os outros
+      documentos estão concluídos (a que já aguarda a assinatura dele entra sempre).
+    - Direção: documentos aguardando a assinatura da direção.
+    - Servidor do eixo do aluno: documentos aguardando a análise final.
+    """
+    em_aberto = any(
+        documento.status != 'CONCLUIDO' and documento.tipo_documento not in AVALIACOES
+        for documento in documentos
+    )
+
+    destinos = {}
+    for documento in documentos:
+        if documento.tipo_documento == 'AVALIACAO_ORIENTADOR':
+            aguarda_orientador = documento.status == 'AGUARDANDO_ASSINATURA_PROF' or (
+                documento.status in RASCUNHOS_AVALIACAO_ORIENTADOR and not em_aberto
+            )
+        else:
+            aguarda_orientador = (
+                documento.status == 'AGUARDANDO_ASSINATURA_PROF'
+                and documento.tipo_documento != 'AVALIACAO_SUPERVISOR'
+            )
+
+        if aguarda_orientador:
+            if estagio.orientador_id:
+                destinos[(documento.id, 'professor')] = (estagio.orientador_id, None)
+        elif documento.status == 'AGUARDANDO_ASSINATURA_DIR':
+            destinos[(documento.id, 'direcao')] = (None, None)
+        elif documento.status == 'AGUARDANDO_VERIFICACAO_ADMIN':
+            destinos[(documento.id, 'servidor')] = (None, estagio.eixo)
+    return destinos
+
+
+def sincronizar_caixa_estagio(estagio_id):
+    """
+    Recalcula as pendências dos documentos de um estágio e grava só a diferença:
+    itens que continuam valendo mantêm a data de criação e a marcação de lido.
+    Chamada por DocumentoEstagio.save e Estagio.save, dentro da mesma transação.
+    """
+    estagio = Estagio.objects.select_related(None).only('id', 'orientador_id', 'eixo').filter(id=estagio_id).first()
+    if estagio is None:
+        return
+
+    documentos = list(
+        DocumentoEstagio.objects.select_related(None).filter(estagio_id=estagio_id).only('id', 'tipo_documento', 'status')
+    )
+    desejados = destinos_do_estagio(estagio, documentos)
+
+    existentes = {
+        (item.documento_id, item.papel): item
+        for item in ItemCaixaEntrada.objects.filter(documento_id__in=[d.id for d in documentos])
+    }
+
+    obsoletos = [
+        chave for chave, item in existentes.items()
+        if desejados.get(chave) != (item.destinatario_id, item.eixo)
+    ]
+    if obsoletos:
+        ItemCaixaEntrada.objects.filter(id__in=[existentes[chave].id for chave in obsoletos]).delete()
+
+    novos = [
+        ItemCaixaEntrada(documento_id=documento_id, papel=papel, destinatario_id=destinatario_id, eixo=eixo)
+        for (documento_id, papel), (destinatario_id, eixo) in desejados.items()
+        if (documento_id, papel) not in existentes or (documento_id, papel) in obsoletos
+    ]
+    if novos:
+        ItemCaixaEntrada.objects.bulk_create(novos)
+
+
+def itens_do_usuario(usuario):
+    """ Pendências que cabem ao usuário: as do orientador são pessoais; as da direção e do servidor, do papel (e do eixo). """
+    itens = ItemCaixaEntrada.objects.all()
+    if usuario.tipo == 'professor':
+        return itens.filter(papel='professor', destinatario=usuario)
+    if usuario.tipo == 'direcao':
+        return itens.filter(papel='direcao')
+    if usuario.tipo == 'servidor' and usuario.eixo:
+        return itens.filter(papel='servidor', eixo=usuario.eixo)
+    return itens.none()
+
+
+def contar_nao_lidos(usuario):
+    return itens_do_usuario(usuario).filter(lido_em__isnull=True).count()
+
+
+def tem_nao_lido(usuario, documento):
+    """ Se o documento ainda é pendência não vista do usuário; a página dele então chama marcar_como_lido. """
+    return itens_do_usuario(usuario).filter(documento=documento, lido_em__isnull=True).exists()
+
+
+def marcar_como_lido(usuario, documento):
+    """
+    Marca a pendência como vista (para todos do mesmo papel). Chamada pelo POST
+    que a página do documento envia ao abrir (api.views.marcar_documento_lido),
+    não pelo GET da página: recarregar ou pré-carregar links não escreve no banco.
+    """
+    return itens_do_usuario(usuario).filter(documento=documento, lido_em__isnull=True).update(lido_em=now())
+
+
+def documentos_da_caixa(usuario):
+    """
+    Os documentos da caixa de entrada do usuário, do aluno A ao Z, cada um com
+    'nao_lido' marcado. Lê só os itens pendentes, com o documento e o aluno no mesmo SELECT.
+    """
+    documentos = []
+    for item in itens_do_usuario(usuario).select_related(
+        'documento__estagio__aluno', 'documento__estagio__orientador'
+    ).order_by('documento__estagio__aluno__first_name', 'documento_id'):
+        documento = item.documento
+        documento.nao_lido = item.lido_em is None
+        documentos.append(documento)
+    return documentos
@@ -0,0 +1,27 @@
+# core/context_processors.py
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+
+from .caixa_entrada import contar_nao_lidos
+
+# Onde cada papel vê a própria caixa de entrada
+DASHBOARD_DA_CAIXA = {
+    'professor': 'professor_dashboard',
+    'direcao': 'servidor_dashboard',
+    'servidor': 'servidor_dashboard',
+}
+
+
+def caixa_entrada(request):
+    """
+    Contador de pendências não lidas para o menu. A contagem (uma consulta
+    indexada em ItemCaixaEntrada) só roda se o template usar a variável.
+    """
+    usuario = getattr(request, 'user', None)
+    if usuario is None or not usuario.is_authenticated or usuario.tipo not in DASHBOARD_DA_CAIXA:
+        return {}
+
+    return {
+        'caixa_entrada_url': reverse(DASHBOARD_DA_CAIXA[usuario.tipo]),
+        'caixa_entrada_nao_lidos': SimpleLazyObject(lambda: contar_nao_lidos(usuario)),
+    }
@@ -0,0 +1,140 @@
+# core/diretorio.py
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import CustomUser, ProfessorMateriaAnoCursoModalidade, Materia, Curso, Turma, AlunoTurma, VersaoCache
+
+CHAVE_DIRETORIO_ORIENTADORES = 'core:diretorio_orientadores'
+CHAVE_OPCOES_MATERIAS = 'core:opcoes_materias'
+CHAVE_OPCOES_CURSOS = 'core:opcoes_cursos'
+# Versões (em VersaoCache, no banco) do índice de acesso: a geral muda com turmas e
+# matrículas; a de cada professor ('acesso:<id>'), com os vínculos dele
+CHAVE_VERSAO_ACESSO = 'acesso'
+# As versões antigas deixam de ser lidas; a validade só libera o espaço no cache
+VALIDADE_INDICE_ACESSO = 3600
+
+
+def _montar_diretorio_orientadores():
+    vinculos = {}
+    # O primeiro vínculo (menor id) de cada professor vira o detalhe do rótulo
+    for professor_id, materia, curso in ProfessorMateriaAnoCursoModalidade.objects.order_by(
+        'professor_id', 'id'
+    ).values_list('professor_id', 'materia__nome', 'curso__nome'):
+        vinculos.setdefault(professor_id, f"{materia} ({curso})")
+
+    diretorio = []
+    for professor_id, nome, sobrenome in CustomUser.objects.filter(tipo='professor').order_by(
+        'first_name', 'last_name'
+    ).values_list('id', 'first_name', 'last_name'):
+        nome_completo = f"{nome} {sobrenome}".strip()
+        detalhes = vinculos.get(professor_id, "(Sem vínculos cadastrados)")
+        diretorio.append((professor_id, f"{nome_completo} - {detalhes}"))
+    return diretorio
+
+
+def diretorio_orientadores():
+    """
+    Lista [(id, rótulo)] dos professores, no formato "Alex Barbosa - Informática (Internet)".
+    Montada com duas consultas e guardada no cache até um professor ou vínculo mudar.
+    """
+    diretorio = cache.get(CHAVE_DIRETORIO_ORIENTADORES)
+    if diretorio is None:
+        diretorio = _montar_diretorio_orientadores()
+        cache.set(CHAVE_DIRETORIO_ORIENTADORES, diretorio, None)
+    return diretorio
+
+
+def invalidar_diretorio_orientadores():
+    cache.delete(CHAVE_DIRETORIO_ORIENTADORES)
+
+
+def _opcoes_em_cache(chave, queryset):
+    opcoes = cache.get(chave)
+    if opcoes is None:
+        opcoes = list(queryset.values_list('id', 'nome'))
+        cache.set(chave, opcoes, None)
+    return opcoes
+
+
+def opcoes_materias():
+    """ [(id, nome)] de todas as matérias, compartilhada por todos os selects de matéria. """
+    return _opcoes_em_cache(CHAVE_OPCOES_MATERIAS, Materia.objects.order_by('nome'))
+
+
+def opcoes_cursos():
+    """ [(id, nome)] de todos os cursos, compartilhada por todos os selects de curso. """
+    return _opcoes_em_cache(CHAVE_OPCOES_CURSOS, Curso.objects.order_by('nome'))
+
+
+def invalidar_catalogo():
+    cache.delete_many([CHAVE_OPCOES_MATERIAS, CHAVE_OPCOES_CURSOS])
+
+
+def _chave_acesso_professor(professor_id):
+    """
+    A chave do índice leva as versões lidas do banco (uma consulta pela chave
+    primária): o cache é local a cada processo, mas a invalidação feita por
+    qualquer worker aparece para todos assim que a transação confirma.
+    """
+    propria = f'{CHAVE_VERSAO_ACESSO}:{professor_id}'
+    versoes = dict(VersaoCache.objects.filter(chave__in=[CHAVE_VERSAO_ACESSO, propria]).values_list('chave', 'versao'))
+    return f'core:acesso_professor:{versoes.get(CHAVE_VERSAO_ACESSO, 1)}:{versoes.get(propria, 1)}:{professor_id}'
+
+
+def _subir_versao(chave):
+    if not VersaoCache.objects.filter(chave=chave).update(versao=F('versao') + 1):
+        VersaoCache.objects.get_or_create(chave=chave, defaults={'versao': 2})
+
+
+def _montar_indice_acesso(professor_id):
+    materias_por_etapa = {}
+    for materia_id, curso_id, ano_modulo, modalidade in ProfessorMateriaAnoCursoModalidade.objects.filter(
+        professor_id=professor_id
+    ).values_list('materia_id', 'curso_id', 'ano_modulo', 'modalidade'):
+        materias_por_etapa.setdefault((curso_id, ano_modulo, modalidade), set()).add(materia_id)
+
+    turmas_materias = set()
+    if materias_por_etapa:
+        for turma_id, curso_id, ano_modulo, modalidade in Turma.objects.filter(
+            curso_id__in={curso_id for curso_id, _, _ in materias_por_etapa}
+        ).values_list('id', 'curso_id', 'ano_modulo', 'modalidade'):
+            for materia_id in materias_por_etapa.get((curso_id, ano_modulo, modalidade), ()):
+                turmas_materias.add((turma_id, materia_id))
+
+    alunos = set(AlunoTurma.objects.filter(
+        turma_id__in={turma_id for turma_id, _ in turmas_materias}, ativo=True
+    ).values_list('aluno_id', flat=True)) if turmas_materias else set()
+
+    return {'turmas_materias': frozenset(turmas_materias), 'alunos': frozenset(alunos)}
+
+
+def indice_acesso_professor(professor_id):
+    """
+    O que um professor pode ver: os pares (turma_id, materia_id) dos seus vínculos
+    e os ids dos alunos matriculados nessas turmas. Montado com três consultas e
+    guardado no cache por professor; as verificações nas views viram busca em
+    conjunto, mais a leitura das versões no banco.
+    """
+    chave = _chave_acesso_professor(professor_id)
+    indice = cache.get(chave)
+    if indice is None:
+        indice = _montar_indice_acesso(professor_id)
+        cache.set(chave, indice, VALIDADE_INDICE_ACESSO)
+    return indice
+
+
+def professor_leciona(professor, turma_id, materia_id):
+    return (int(turma_id), int(materia_id)) in indice_acesso_professor(professor.id)['turmas_materias']
+
+
+def professor_ve_aluno(professor, aluno_id):
+    return int(aluno_id) in indice_acesso_professor(professor.id)['alunos']
+
+
+def invalidar_acesso_professor(professor_id):
+    _subir_versao(f'{CHAVE_VERSAO_ACESSO}:{professor_id}')
+
+
+def invalidar_acesso_professores():
+    """ Turmas ou matrículas mudaram: todos os índices ficam velhos de uma vez. """
+    _subir_versao(CHAVE_VERSAO_ACESSO)
@@ -0,0 +1,34 @@
+# core/dossies.py
+from django.db.models import Exists, OuterRef
+
+from .models import Estagio, DocumentoEstagio
+from .pipeline import mover_dossies_de_status
+
+
+def dossies_inconsistentes(estagios_ids=None):
+    """
+    Estágios com documentos, todos concluídos, que ainda não estão como APROVADO.
+    'estagios_ids' restringe a busca (ex: o estágio que acabou de mudar).
+    """
+    documentos = DocumentoEstagio.objects.filter(estagio=OuterRef('pk'))
+    estagios = Estagio.objects.exclude(status_geral='APROVADO').filter(
+        Exists(documentos)
+    ).exclude(
+        Exists(documentos.exclude(status='CONCLUIDO'))
+    )
+    if estagios_ids is not None:
+        estagios = estagios.filter(id__in=estagios_ids)
+    return estagios
+
+
+def reconciliar_status_dossies(estagios_ids=None):
+    """
+    Aplica a regra "todos os documentos concluídos => dossiê APROVADO" com um único
+    UPDATE, sem carregar os estágios (os contadores do painel são ajustados antes).
+    Roda depois de cada transição que conclui um documento (DocumentoEstagio.save)
+    e, para todos os dossiês, no comando reconciliar_dossies.
+    Retorna quantos estágios foram corrigidos.
+    """
+    estagios = dossies_inconsistentes(estagios_ids)
+    mover_dossies_de_status(estagios, 'APROVADO')
+    return estagios.update(status_geral='APROVADO')
@@ -0,0 +1,32 @@
+# core/eixos.py
+from django.db.models import OuterRef, Subquery
+
+from .pipeline import reposicionar_no_pipeline
+from .models import AlunoTurma, CustomUser, Estagio, DocumentoEstagio, ItemCaixaEntrada
+
+
+def sincronizar_eixo_alunos(alunos_ids):
+    """
+    Recalcula o eixo guardado nos alunos e nos seus estágios.
+
+    O eixo vem do curso da matrícula atual (a ativa ou, sem ela, a mais recente),
+    e é gravado com UPDATEs, sem carregar os alunos (a fila do servidor
+    na caixa de entrada acompanha o eixo do dossiê). 'alunos_ids' pode ser uma
+    lista ou um queryset de ids.
+    """
+    eixo_da_matricula = AlunoTurma.objects.filter(
+        aluno=OuterRef('pk')
+    ).order_by('-ativo', '-id').values('turma__curso__eixo')[:1]
+
+    CustomUser.objects.filter(id__in=alunos_ids, tipo='aluno').update(eixo=Subquery(eixo_da_matricula))
+
+    Estagio.objects.filter(aluno_id__in=alunos_ids).update(
+        eixo=Subquery(CustomUser.objects.filter(pk=OuterRef('aluno_id')).values('eixo')[:1])
+    )
+
+    ItemCaixaEntrada.objects.filter(papel='servidor', documento__estagio__aluno_id__in=alunos_ids).update(
+        eixo=Subquery(DocumentoEstagio.objects.filter(pk=OuterRef('documento_id')).values('estagio__eixo')[:1])
+    )
+
+    # Os contadores do painel seguem a turma atual do dossiê
+    reposicionar_no_pipeline(alunos_ids)
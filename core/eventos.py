@@ -0,0 +1,88 @@
+# core/eventos.py
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EventoDocumento, ResumoTempoStatus, ResumoVazaoDiaria
+
+
+def incrementar_resumo(model, chave, **incrementos):
+    """
+    UPDATE ... SET campo = campo + n na linha do resumo; se ela ainda não existe, cria.
+    Sempre chamado dentro da transação do save, junto com o evento.
+    """
+    atualizados = model.objects.filter(**chave).update(
+        **{campo: F(campo) + valor for campo, valor in incrementos.items()}
+    )
+    if atualizados:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**chave, **incrementos)
+    except IntegrityError:
+        # Outra transação criou a linha entre o UPDATE e o INSERT
+        model.objects.filter(**chave).update(
+            **{campo: F(campo) + valor for campo, valor in incrementos.items()}
+        )
+
+
+def registrar_transicao(documento, status_anterior, ator=None):
+    """
+    Grava o evento da mudança de status e atualiza os resumos incrementais:
+    o tempo que o documento passou no status anterior (desde o evento anterior,
+    ou desde o envio, se não houver) e a vazão do dia do ator.
+    """
+    agora = timezone.now()
+    segundos = None
+    if status_anterior is not None:
+        desde = EventoDocumento.objects.filter(documento=documento).order_by('-criado_em').values_list(
+            'criado_em', flat=True
+        ).first() or documento.data_upload
+        if desde:
+            segundos = max(int((agora - desde).total_seconds()), 0)
+
+    EventoDocumento.objects.create(
+        documento=documento,
+        tipo_documento=documento.tipo_documento,
+        status_anterior=status_anterior,
+        status_novo=documento.status,
+        ator=ator,
+        criado_em=agora,
+        segundos_no_status_anterior=segundos,
+    )
+
+    if segundos is not None:
+        incrementar_resumo(
+            ResumoTempoStatus,
+            {'tipo_documento': documento.tipo_documento, 'status': status_anterior},
+            saidas=1, segundos_total=segundos,
+        )
+    incrementar_resumo(
+        ResumoVazaoDiaria,
+        {'dia': timezone.localdate(agora), 'ator': ator, 'status_novo': documento.status},
+        total=1,
+    )
+
+
+def registrar_criacao_em_lote(documentos, ator=None):
+    """ Eventos de criação para documentos gravados com bulk_create (que não passa pelo save). """
+    agora = timezone.now()
+    EventoDocumento.objects.bulk_create([
+        EventoDocumento(
+            documento=documento,
+            tipo_documento=documento.tipo_documento,
+            status_novo=documento.status,
+            ator=ator,
+            criado_em=agora,
+        )
+        for documento in documentos
+    ])
+    por_status = {}
+    for documento in documentos:
+        por_status[documento.status] = por_status.get(documento.status, 0) + 1
+    for status, total in por_status.items():
+        incrementar_resumo(
+            ResumoVazaoDiaria,
+            {'dia': timezone.localdate(agora), 'ator': ator, 'status_novo': status},
+            total=total,
+        )
@@ -0,0 +1,48 @@
+# core/exportacao.py
+import csv
+
+from django.http import StreamingHttpResponse
+
+# Tamanho dos lotes buscados no banco durante a exportação.
+# O cursor nunca traz mais do que isso de uma vez para a memória.
+EXPORTACAO_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """
+    Pseudo-buffer: em vez de guardar o que o csv.writer escreve,
+    devolve a linha pronta para o StreamingHttpResponse enviar ao cliente.
+    """
+    def write(self, value):
+        return value
+
+
+def resposta_csv(nome_arquivo, cabecalho, linhas):
+    """
+    Gera um StreamingHttpResponse em CSV a partir de um iterável de linhas.
+
+    'linhas' deve ser um gerador (ex: queryset.values_list(...).iterator()),
+    assim a planilha é montada linha a linha e a memória fica constante,
+    não importa quantos registros existam.
+    O separador ';' e o BOM UTF-8 fazem o Excel em pt-BR abrir o arquivo
+    com acentos e colunas corretas.
+    """
+    writer = csv.writer(Echo(), delimiter=';')
+
+    def gerar():
+        yield '\ufeff'
+        yield writer.writerow(cabecalho)
+        for linha in linhas:
+            yield writer.writerow(linha)
+
+    response = StreamingHttpResponse(gerar(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    return response
+
+
+def formatar_turma(ano_modulo, curso_nome, turno, turma, modalidade):
+    """ Mesmo texto de Turma.__str__, mas a partir de colunas de values_list. """
+    if not ano_modulo:
+        return ''
+    turma_display = turma if turma else "-"
+    return f"{ano_modulo} - {curso_nome} ({(turno or '').upper()}) {turma_display} - {modalidade or ''}".strip()
@@ -0,0 +1,194 @@
+# core/limpeza.py
+"""
+Coleta de lixo do MEDIA_ROOT (comando limpar_midia).
+
+Os receivers de models.py apagam o arquivo antigo na hora, mas uma exceção,
+uma queda do processo ou um '.delete(save=False)' deixam arquivos órfãos
+(ex: rg_AbC123.pdf, cópias com sufixo). Aqui o conjunto de nomes em uso sai
+do banco (documentos e snapshots de dossiês arquivados, cujos arquivos
+continuam no disco) e é comparado com uma varredura do disco via os.scandir:
+
+- só as pastas dos campos de arquivo (core.midia.CAMPOS_POR_PASTA) são
+  varridas: o resto do MEDIA_ROOT não é deste app;
+- arquivos sem referência, mais velhos que a idade mínima, são órfãos;
+- referências sem arquivo no disco são relatadas;
+- com hash, arquivos de mesmo tamanho têm o conteúdo comparado (sha256, em
+  paralelo) para apontar cópias duplicadas.
+"""
+import datetime
+import hashlib
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+
+from .arquivamento import CAMPOS_ARQUIVO_DOCUMENTO
+from .midia import CAMPOS_POR_PASTA
+from .models import DocumentoEstagio, HistoricoArquivado, UploadParcial
+from .uploads import descartar
+
+TAMANHO_BLOCO = 1024 * 1024
+
+
+def arquivos_referenciados():
+    """
+    {nome: origem} de todos os arquivos em uso. A origem ('documento 12',
+    'histórico 3') vai para o relatório de arquivos faltando.
+    """
+    referenciados = {}
+    linhas = DocumentoEstagio.objects.exclude(
+        **{campo: '' for campo in CAMPOS_ARQUIVO_DOCUMENTO}
+    ).values_list('id', *CAMPOS_ARQUIVO_DOCUMENTO)
+    for documento_id, *nomes in linhas.iterator(chunk_size=2000):
+        for nome in nomes:
+            if nome:
+                referenciados[nome] = f"documento {documento_id}"
+
+    # O arquivamento tira os arquivos de DocumentoEstagio, mas eles seguem no
+    # disco para o histórico do admin: os snapshots também contam como uso
+    snapshots = HistoricoArquivado.objects.select_related(None).filter(tipo='ESTAGIO').only('id', 'dados')
+    for historico in snapshots.iterator(chunk_size=100):
+        for registro in historico.conteudo.get('registros', []):
+            if registro.get('model') != 'core.documentoestagio':
+                continue
+            for campo in CAMPOS_ARQUIVO_DOCUMENTO:
+                nome = registro['fields'].get(campo)
+                if nome:
+                    referenciados.setdefault(nome, f"histórico {historico.id}")
+    return referenciados
+
+
+def varrer(raiz, ignorar=()):
+    """ (nome relativo com '/', tamanho, mtime) de cada arquivo abaixo de raiz, sem seguir links. """
+    pendentes = [raiz]
+    while pendentes:
+        diretorio = pendentes.pop()
+        try:
+            entradas = os.scandir(diretorio)
+        except FileNotFoundError:
+            continue
+        with entradas:
+            for entrada in entradas:
+                if entrada.is_dir(follow_symlinks=False):
+                    if os.path.abspath(entrada.path) not in ignorar:
+                        pendentes.append(entrada.path)
+                elif entrada.is_file(follow_symlinks=False):
+                    estado = entrada.stat(follow_symlinks=False)
+                    nome = os.path.relpath(entrada.path, raiz).replace(os.sep, '/')
+                    yield nome, estado.st_size, estado.st_mtime
+
+
+def _sha256(caminho):
+    """ O hash do arquivo, ou None se ele sumiu depois da varredura. """
+    soma = hashlib.sha256()
+    try:
+        with open(caminho, 'rb') as arquivo:
+            while bloco := arquivo.read(TAMANHO_BLOCO):
+                soma.update(bloco)
+    except FileNotFoundError:
+        return None
+    return soma.hexdigest()
+
+
+def duplicados(arquivos, workers):
+    """
+    Grupos de arquivos com o mesmo conteúdo, de {nome: tamanho}. Só arquivos
+    que dividem o tamanho com outro são lidos; o sha256 já gravado nos
+    metadados do documento (core.arquivos) é reaproveitado.
+    """
+    por_tamanho = defaultdict(list)
+    for nome, tamanho in arquivos.items():
+        por_tamanho[tamanho].append(nome)
+    candidatos = [nome for nomes in por_tamanho.values() if len(nomes) > 1 for nome in nomes]
+    if not candidatos:
+        return []
+
+    conhecidos = {}
+    for metadados in DocumentoEstagio.objects.exclude(
+        metadados_arquivos={}
+    ).values_list('metadados_arquivos', flat=True).iterator(chunk_size=2000):
+        for registro in metadados.values():
+            if registro.get('sha256') and registro.get('integro', True):
+                conhecidos[registro['nome']] = registro['sha256']
+
+    ler = [nome for nome in candidatos if nome not in conhecidos]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # hashlib libera o GIL nos blocos grandes: as threads leem e somam em paralelo
+        lidos = dict(zip(ler, pool.map(_sha256, [os.path.join(settings.MEDIA_ROOT, nome) for nome in ler])))
+
+    grupos = defaultdict(list)
+    for nome in candidatos:
+        soma = conhecidos.get(nome) or lidos[nome]
+        if soma is not None:
+            grupos[soma].append(nome)
+    return [sorted(nomes) for nomes in grupos.values() if len(nomes) > 1]
+
+
+def limpar_uploads_parciais(idade_minima, dry_run=False):
+    """
+    Uploads em partes abandonados (core.uploads) e arquivos de partes sem
+    registro no banco. Devolve (quantidade, bytes).
+    """
+    limite = timezone.now() - datetime.timedelta(hours=settings.UPLOAD_VALIDADE_HORAS)
+    quantidade, liberados = 0, 0
+    for upload in UploadParcial.objects.filter(atualizado_em__lt=limite):
+        quantidade += 1
+        liberados += upload.recebido
+        if not dry_run:
+            descartar(upload)
+
+    ativos = {str(upload_id) for upload_id in UploadParcial.objects.values_list('id', flat=True)}
+    corte = time.time() - idade_minima
+    for nome, tamanho, modificado in varrer(settings.UPLOAD_PARTES_DIR):
+        if nome.split('.', 1)[0] in ativos or modificado > corte:
+            continue
+        quantidade += 1
+        liberados += tamanho
+        if not dry_run:
+            os.remove(os.path.join(settings.UPLOAD_PARTES_DIR, nome))
+    return quantidade, liberados
+
+
+def limpar_midia(idade_minima=24 * 3600, dry_run=False, hash_workers=None):
+    """
+    Compara banco e disco (as pastas de CAMPOS_POR_PASTA). Órfãos mais velhos que idade_minima (segundos)
+    são apagados; os mais novos podem ser uploads cujo save ainda não terminou.
+    Devolve um dicionário com órfãos, faltando, duplicados e bytes liberados.
+    """
+    referenciados = arquivos_referenciados()
+    ignorar = {os.path.abspath(settings.UPLOAD_PARTES_DIR)}
+    corte = time.time() - idade_minima
+
+    no_disco = {}
+    orfaos = []
+    liberados = 0
+    arquivos = (
+        (f"{pasta}/{nome}", tamanho, modificado)
+        for pasta in CAMPOS_POR_PASTA
+        for nome, tamanho, modificado in varrer(os.path.join(settings.MEDIA_ROOT, pasta), ignorar)
+    )
+    for nome, tamanho, modificado in arquivos:
+        if nome in referenciados or modificado > corte:
+            no_disco[nome] = tamanho
+            continue
+        orfaos.append(nome)
+        liberados += tamanho
+        if dry_run:
+            no_disco[nome] = tamanho
+        else:
+            os.remove(os.path.join(settings.MEDIA_ROOT, nome))
+
+    faltando = sorted(
+        (nome, origem) for nome, origem in referenciados.items() if nome not in no_disco
+    )
+    grupos = duplicados(no_disco, hash_workers) if hash_workers else []
+    return {
+        'orfaos': sorted(orfaos),
+        'faltando': faltando,
+        'duplicados': grupos,
+        'liberados': liberados,
+        'conferidos': len(no_disco),
+    }
@@ -0,0 +1,35 @@
+# Em core/management/commands/arquivar_ano_letivo.py
+
+from django.core.management.base import BaseCommand, CommandError
+from core.arquivamento import anos_letivos_encerrados, arquivar_ano_letivo
+
+
+class Command(BaseCommand):
+    help = "Move as matrículas encerradas de um ano letivo (com notas e dossiês concluídos) para o histórico arquivado."
+
+    def add_arguments(self, parser):
+        parser.add_argument('ano_letivo', nargs='?', help="Ano letivo a arquivar (ex: 2025.2). Sem ele, lista os anos disponíveis.")
+        parser.add_argument('--dry-run', action='store_true', help="Apenas conta o que seria arquivado, sem alterar nada.")
+
+    def handle(self, *args, **options):
+        encerrados = anos_letivos_encerrados()
+        ano_letivo = options['ano_letivo']
+
+        if not ano_letivo:
+            if not encerrados:
+                self.stdout.write("Nenhum ano letivo com matrículas encerradas para arquivar.")
+            for ano in encerrados:
+                self.stdout.write(f"   - {ano}")
+            return
+
+        if ano_letivo not in encerrados:
+            raise CommandError(f"O ano letivo '{ano_letivo}' não tem matrículas encerradas para arquivar.")
+
+        self.stdout.write(self.style.NOTICE(f"🚀 Arquivando o ano letivo {ano_letivo}..."))
+        totais = arquivar_ano_letivo(ano_letivo, dry_run=options['dry_run'])
+        resumo = f"{totais['matriculas']} matrícula(s), {totais['notas']} nota(s) e {totais['estagios']} dossiê(s) de estágio"
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"\n⚠️ Simulação: {resumo} seriam arquivados."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"\n✅ Arquivamento finalizado! {resumo} movidos para o histórico."))
@@ -0,0 +1,19 @@
+# Em core/management/commands/enviar_resumos.py
+
+from django.core.management.base import BaseCommand
+from core.notificacoes import enviar_resumos
+
+
+class Command(BaseCommand):
+    help = "Envia por e-mail, a cada orientador, à direção e aos servidores, o resumo dos documentos que aguardam sua ação. Feito para rodar periodicamente (cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lembrete', action='store_true', help="Envia também para quem não recebeu documentos novos desde o último resumo.")
+        parser.add_argument('--dry-run', action='store_true', help="Apenas conta os resumos que seriam enviados.")
+
+    def handle(self, *args, **options):
+        total = enviar_resumos(lembrete=options['lembrete'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"⚠️ Simulação: {total} resumo(s) seriam enviados."))
+            return
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} resumo(s) enviados."))
@@ -0,0 +1,47 @@
+# Em core/management/commands/limpar_midia.py
+
+import os
+
+from django.core.management.base import BaseCommand
+from core.limpeza import limpar_midia, limpar_uploads_parciais
+
+
+class Command(BaseCommand):
+    help = "Apaga das pastas de upload do MEDIA_ROOT (anexos, PDFs assinados e fotos) os arquivos que nenhum documento (ou histórico arquivado) usa, limpa uploads em partes abandonados e lista documentos cujo arquivo sumiu. Pode rodar periodicamente (cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Apenas lista o que seria apagado, sem alterar nada.")
+        parser.add_argument('--idade-minima', type=int, default=24, help="Horas desde a última modificação para um arquivo sem referência ser considerado órfão (padrão: 24).")
+        parser.add_argument('--hash', action='store_true', help="Compara o conteúdo (sha256) dos arquivos de mesmo tamanho para listar cópias duplicadas.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help="Threads usadas no --hash.")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        idade_minima = options['idade_minima'] * 3600
+        resultado = limpar_midia(
+            idade_minima=idade_minima,
+            dry_run=dry_run,
+            hash_workers=options['workers'] if options['hash'] else None,
+        )
+        parciais, liberados_parciais = limpar_uploads_parciais(idade_minima, dry_run=dry_run)
+
+        for nome in resultado['orfaos']:
+            self.stdout.write(f"   - órfão: {nome}")
+        for nome, origem in resultado['faltando']:
+            self.stdout.write(self.style.WARNING(f"⚠️ {origem} aponta para {nome}, que não está no disco."))
+        for grupo in resultado['duplicados']:
+            self.stdout.write(self.style.WARNING(f"⚠️ Conteúdo idêntico: {', '.join(grupo)}"))
+
+        liberados = (resultado['liberados'] + liberados_parciais) / (1024 * 1024)
+        resumo = (
+            f"{len(resultado['orfaos'])} arquivo(s) órfão(s) e {parciais} upload(s) em partes abandonado(s), "
+            f"{liberados:.1f} MB"
+        )
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"\n⚠️ Simulação: {resumo} seriam apagados."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"\n✅ Limpeza finalizada! {resumo} liberados."))
+        if resultado['faltando']:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {len(resultado['faltando'])} referência(s) sem arquivo; rode verificar_arquivos para atualizar os documentos."
+            ))
@@ -0,0 +1,28 @@
+# Em core/management/commands/processar_pdfs.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from core.pdfs import processar_pendentes
+
+
+class Command(BaseCommand):
+    help = "Recomprime as imagens dos PDFs enviados (fila ProcessamentoPdf) num pool de processos, fora das requisições. Pode rodar periodicamente (cron) ou em modo contínuo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help="Processos em paralelo (padrão: settings.PDF_WORKERS).")
+        parser.add_argument('--continuo', action='store_true', help="Fica esperando novos PDFs em vez de sair ao esvaziar a fila.")
+        parser.add_argument('--intervalo', type=int, default=30, help="Segundos entre as verificações no modo contínuo.")
+
+    def handle(self, *args, **options):
+        while True:
+            processados, economia = processar_pendentes(workers=options['workers'])
+            if processados:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {processados} PDF(s) processado(s), {economia / (1024 * 1024):.1f} MB economizados."
+                ))
+                continue  # pode haver mais na fila
+            if not options['continuo']:
+                self.stdout.write(self.style.SUCCESS("✅ Nenhum PDF pendente."))
+                return
+            time.sleep(options['intervalo'])
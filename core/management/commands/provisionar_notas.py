@@ -0,0 +1,50 @@
+# Em core/management/commands/provisionar_notas.py
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from core.models import Curso, AlunoTurma, GradeMateria, Nota
+from core.notas import provisionar_notas
+
+
+class Command(BaseCommand):
+    help = "Cria as notas que faltam (aluno x matéria da grade x turma) para as matrículas existentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--curso', type=int, help="ID do curso a reconciliar (padrão: todos).")
+        parser.add_argument('--dry-run', action='store_true', help="Apenas conta as notas que faltam, sem criar nada.")
+
+    def handle(self, *args, **options):
+        cursos = Curso.objects.order_by('nome')
+        if options['curso']:
+            cursos = cursos.filter(id=options['curso'])
+
+        self.stdout.write(self.style.NOTICE("🚀 Reconciliando notas com a grade curricular..."))
+
+        total_faltando = 0
+        for curso in cursos:
+            materias_ids = list(GradeMateria.objects.filter(curso=curso).values_list('materia_id', flat=True))
+            matriculas = AlunoTurma.objects.filter(turma__curso=curso, ativo=True)
+
+            esperadas = matriculas.count() * len(materias_ids)
+            existentes = Nota.objects.filter(
+                turma__curso=curso,
+                materia_id__in=materias_ids,
+                aluno__alunoturma__turma_id=F('turma_id'),
+                aluno__alunoturma__ativo=True,
+            ).count()
+            faltando = esperadas - existentes
+            total_faltando += faltando
+
+            if not faltando:
+                continue
+
+            if options['dry_run']:
+                self.stdout.write(f"   - {curso.nome}: {faltando} nota(s) faltando.")
+            else:
+                provisionar_notas(matriculas)
+                self.stdout.write(self.style.SUCCESS(f"   - {curso.nome}: {faltando} nota(s) criada(s)."))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"\n⚠️ Simulação: {total_faltando} nota(s) seriam criadas."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"\n✅ Reconciliação finalizada! {total_faltando} nota(s) criada(s)."))
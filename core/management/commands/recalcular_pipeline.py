@@ -0,0 +1,13 @@
+# Em core/management/commands/recalcular_pipeline.py
+
+from django.core.management.base import BaseCommand
+from core.pipeline import recalcular_pipeline
+
+
+class Command(BaseCommand):
+    help = "Refaz do zero os contadores do painel de estágios (normalmente mantidos por delta). Use após importações ou correções manuais no banco."
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE("🚀 Recalculando os contadores do painel de estágios..."))
+        linhas = recalcular_pipeline()
+        self.stdout.write(self.style.SUCCESS(f"✅ {linhas} contador(es) gravados."))
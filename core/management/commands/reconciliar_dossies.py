@@ -0,0 +1,20 @@
+# Em core/management/commands/reconciliar_dossies.py
+
+from django.core.management.base import BaseCommand
+from core.dossies import dossies_inconsistentes, reconciliar_status_dossies
+
+
+class Command(BaseCommand):
+    help = "Marca como APROVADO os dossiês de estágio com todos os documentos concluídos (um único UPDATE). Pode rodar periodicamente (cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Apenas conta os dossiês inconsistentes, sem alterar nada.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            total = dossies_inconsistentes().count()
+            self.stdout.write(self.style.WARNING(f"⚠️ Simulação: {total} dossiê(s) seriam marcados como aprovados."))
+            return
+
+        total = reconciliar_status_dossies()
+        self.stdout.write(self.style.SUCCESS(f"✅ {total} dossiê(s) marcados como aprovados."))
@@ -0,0 +1,22 @@
+# Em core/management/commands/verificar_arquivos.py
+
+from django.core.management.base import BaseCommand
+from core.arquivos import verificar_arquivos
+
+
+class Command(BaseCommand):
+    help = "Confere se os arquivos dos documentos de estágio continuam no storage e atualiza os metadados usados pelas telas. Pode rodar periodicamente (cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conteudo', action='store_true', help="Relê cada arquivo e confere o sha256 (mais lento que conferir só o tamanho).")
+
+    def handle(self, *args, **options):
+        conferidos, problemas = verificar_arquivos(conferir_conteudo=options['conteudo'])
+        for documento, campo, problema in problemas:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ Documento {documento.id} ({campo}): {getattr(documento, campo).name} - {problema}"
+            ))
+        if problemas:
+            self.stdout.write(self.style.WARNING(f"⚠️ {len(problemas)} problema(s) em {conferidos} arquivo(s) conferido(s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {conferidos} arquivo(s) conferido(s), nenhum problema."))
@@ -0,0 +1,27 @@
+# Em core/management/commands/verificar_prazos.py
+
+from django.core.management.base import BaseCommand
+from core.models import Curso
+from core.prazos import documentos_atrasados, agrupar_por_responsavel
+
+
+class Command(BaseCommand):
+    help = "Lista os documentos de estágio parados além do prazo da etapa (settings.PRAZOS_DOCUMENTOS), por responsável. Pode rodar periodicamente (cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eixo', choices=[valor for valor, _ in Curso.EIXO_CHOICES], help="Apenas os documentos de alunos deste eixo.")
+
+    def handle(self, *args, **options):
+        documentos = documentos_atrasados(eixo=options['eixo'])
+        if not documentos:
+            self.stdout.write(self.style.SUCCESS("✅ Nenhum documento parado além do prazo."))
+            return
+
+        for papel, nome, lista in agrupar_por_responsavel(documentos):
+            self.stdout.write(self.style.WARNING(f"⚠️ {nome}: {len(lista)} documento(s) atrasado(s)"))
+            for documento in lista:
+                self.stdout.write(
+                    f"   - {documento.estagio.aluno.get_full_name()} | {documento.get_tipo_documento_display()} | "
+                    f"{documento.get_status_display()} há {documento.dias_parado} dia(s)"
+                )
+        self.stdout.write(self.style.WARNING(f"⚠️ Total: {len(documentos)} documento(s) atrasado(s)."))
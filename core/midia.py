@@ -0,0 +1,132 @@
+# core/midia.py
+"""
+Entrega dos arquivos de MEDIA_ROOT (RG, cartão do SUS, PDFs assinados, fotos)
+só para quem pode ver o documento dono do arquivo.
+
+Depois da checagem, a transferência fica com o servidor web (settings.MEDIA_SERVIDOR):
+- 'nginx':  X-Accel-Redirect para a location interna MEDIA_INTERNA_URL;
+- 'apache': X-Sendfile com o caminho no disco (mod_xsendfile);
+- None:     o próprio Django entrega, com suporte a Range (PDFs grandes
+            abrem por partes no navegador e downloads interrompidos continuam).
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+from .models import DocumentoEstagio
+
+# Pasta do upload_to -> campo de DocumentoEstagio
+CAMPOS_POR_PASTA = {
+    'anexos_estagio': 'arquivo_anexo',
+    'pdfs_assinados': 'pdf_supervisor_assinado',
+    'fotos_3x4': 'foto_3x4',
+}
+TAMANHO_BLOCO = 64 * 1024
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def documento_do_arquivo(nome):
+    """ O DocumentoEstagio que guarda o arquivo (busca pelo índice do campo), ou None. """
+    campo = CAMPOS_POR_PASTA.get(nome.split('/', 1)[0])
+    if campo is None:
+        return None
+    return DocumentoEstagio.objects.select_related(None).select_related('estagio').only(
+        'id', 'estagio__aluno_id', 'estagio__orientador_id', 'estagio__eixo'
+    ).filter(**{campo: nome}).first()
+
+
+def pode_ver_arquivo(usuario, documento):
+    """
+    Mesmas regras das telas de visualização: o próprio aluno, o orientador do
+    estágio, o servidor do eixo, a direção e o admin. Arquivos sem documento
+    (de dossiês já arquivados) só aparecem no histórico do admin.
+    """
+    if usuario.tipo == 'admin':
+        return True
+    if documento is None:
+        return False
+    estagio = documento.estagio
+    if usuario.tipo == 'aluno':
+        return estagio.aluno_id == usuario.id
+    if usuario.tipo == 'professor':
+        return estagio.orientador_id == usuario.id
+    if usuario.tipo == 'servidor':
+        return bool(usuario.eixo) and estagio.eixo == usuario.eixo
+    return usuario.tipo == 'direcao'
+
+
+def _intervalo(cabecalho, tamanho):
+    """ (inicio, fim) de um 'Range: bytes=...' simples; None para o arquivo inteiro; False se impossível. """
+    encontrado = _RANGE.match(cabecalho.strip())
+    if encontrado is None:
+        return None  # vários intervalos ou outra unidade: responde com o arquivo inteiro
+    inicio, fim = encontrado.groups()
+    if not inicio:
+        if not fim:
+            return None
+        inicio, fim = max(tamanho - int(fim), 0), tamanho - 1
+    else:
+        inicio, fim = int(inicio), min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio > fim or inicio >= tamanho:
+        return False
+    return inicio, fim
+
+
+def _ler_trecho(caminho, inicio, tamanho):
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        while tamanho > 0:
+            bloco = arquivo.read(min(TAMANHO_BLOCO, tamanho))
+            if not bloco:
+                break
+            tamanho -= len(bloco)
+            yield bloco
+
+
+def responder_arquivo(request, nome, caminho):
+    """ A resposta para um arquivo já autorizado. """
+    estado = os.stat(caminho)
+    tipo = mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+    modificado = http_date(estado.st_mtime)
+
+    if settings.MEDIA_SERVIDOR in ('nginx', 'apache'):
+        resposta = HttpResponse(content_type=tipo)
+        if settings.MEDIA_SERVIDOR == 'nginx':
+            resposta['X-Accel-Redirect'] = settings.MEDIA_INTERNA_URL + quote(nome)
+        else:
+            resposta['X-Sendfile'] = caminho
+    else:
+        faixa = request.headers.get('Range')
+        se_faixa = request.headers.get('If-Range')
+        if faixa and se_faixa and parse_http_date_safe(se_faixa) != int(estado.st_mtime):
+            faixa = None  # o arquivo mudou desde a parte que o cliente já tem
+
+        intervalo = _intervalo(faixa, estado.st_size) if faixa else None
+        if intervalo is False:
+            resposta = HttpResponse(status=416)
+            resposta['Content-Range'] = f'bytes */{estado.st_size}'
+            return resposta
+        if intervalo is None:
+            # Arquivo inteiro: o FileResponse usa o wsgi.file_wrapper (sendfile) quando houver
+            resposta = FileResponse(open(caminho, 'rb'), content_type=tipo)
+        else:
+            inicio, fim = intervalo
+            resposta = StreamingHttpResponse(
+                _ler_trecho(caminho, inicio, fim - inicio + 1), status=206, content_type=tipo
+            )
+            resposta['Content-Length'] = str(fim - inicio + 1)
+            resposta['Content-Range'] = f'bytes {inicio}-{fim}/{estado.st_size}'
+        resposta['Accept-Ranges'] = 'bytes'
+
+    resposta['Last-Modified'] = modificado
+    resposta['Content-Disposition'] = f"inline; filename*=UTF-8''{quote(os.path.basename(nome))}"
+    # Documentos pessoais: nada de cache compartilhado (proxies)
+    resposta['Cache-Control'] = 'private, max-age=0, must-revalidate'
+    resposta['X-Content-Type-Options'] = 'nosniff'
+    return resposta
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:04
+
+from django.db import migrations
+from django.db.models import Count
+
+CAMPOS_NOTA = ['nota_1', 'nota_2', 'nota_3', 'nota_recuperacao']
+
+
+def remover_notas_duplicadas(apps, schema_editor):
+    # Antes de criar a restrição, funde as notas repetidas de cada (aluno, matéria, turma)
+    # na mais completa (mais notas lançadas; no empate, a mais recente). Normalmente a
+    # mais antiga é a vazia criada na matrícula, então ela não pode ser a sobrevivente.
+    Nota = apps.get_model('core', 'Nota')
+    duplicadas = Nota.objects.values('aluno', 'materia', 'turma').annotate(
+        total=Count('id')
+    ).filter(total__gt=1)
+    for grupo in duplicadas:
+        notas = list(Nota.objects.filter(
+            aluno=grupo['aluno'], materia=grupo['materia'], turma=grupo['turma']
+        ))
+        notas.sort(key=lambda nota: (
+            sum(getattr(nota, campo) is not None for campo in CAMPOS_NOTA), nota.id
+        ), reverse=True)
+        mantida, repetidas = notas[0], notas[1:]
+        for campo in CAMPOS_NOTA:
+            if getattr(mantida, campo) is None:
+                valor = next((getattr(n, campo) for n in repetidas if getattr(n, campo) is not None), None)
+                setattr(mantida, campo, valor)
+        # O modelo histórico não tem calcular_media/calcular_status: mesma regra de Nota.save()
+        notas_validas = [n for n in (mantida.nota_1, mantida.nota_2, mantida.nota_3) if n is not None]
+        media = sum(notas_validas) / len(notas_validas) if notas_validas else None
+        if media is None:
+            status = 'Pendente'
+        elif media >= 5:
+            status = 'Aprovado'
+        elif mantida.nota_recuperacao is not None:
+            status = 'Aprovado' if (media + mantida.nota_recuperacao) / 2 >= 5 else 'Reprovado na Final'
+        else:
+            status = 'Reprovado'
+        mantida.media_final, mantida.status_final = media, status
+        mantida.save()
+        Nota.objects.filter(id__in=[n.id for n in repetidas]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_alter_documentoestagio_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(remover_notas_duplicadas, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='nota',
+            unique_together={('aluno', 'materia', 'turma')},
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_nota_unique_aluno_materia_turma'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nota',
+            index=models.Index(fields=['turma', 'materia', 'status_final'], name='core_nota_turma_i_32ac3c_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_nota_turma_materia_status_index'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='alunoturma',
+            options={'ordering': ['-ativo', '-id']},
+        ),
+        migrations.AddField(
+            model_name='alunoturma',
+            name='ativo',
+            field=models.BooleanField(db_index=True, default=True),
+        ),
+    ]
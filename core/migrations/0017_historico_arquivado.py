@@ -0,0 +1,49 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_alunoturma_ativo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricoArquivado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano_letivo', models.CharField(max_length=10)),
+                ('tipo', models.CharField(choices=[('MATRICULA', 'Matrícula e Notas'), ('ESTAGIO', 'Dossiê de Estágio')], max_length=20)),
+                ('descricao', models.CharField(help_text='Turma ou empresa do estágio, para listagem sem descompactar.', max_length=255)),
+                ('dados', models.BinaryField()),
+                ('arquivado_em', models.DateTimeField(auto_now_add=True)),
+                ('aluno', models.ForeignKey(limit_choices_to={'tipo': 'aluno'}, on_delete=django.db.models.deletion.CASCADE, related_name='historicos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Histórico Arquivado',
+                'verbose_name_plural': 'Históricos Arquivados',
+                'ordering': ['-ano_letivo', 'tipo', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentoArquivado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_documento', models.CharField(choices=[('AVALIACAO_ORIENTADOR', 'Avaliação do Orientador'), ('AVALIACAO_SUPERVISOR', 'Avaliação do Supervisor'), ('TERMO_COMPROMISSO', 'Termo de Compromisso'), ('FICHA_IDENTIFICACAO', 'Ficha de Identificação'), ('FICHA_PESSOAL', 'Ficha Pessoal'), ('COMP_RESIDENCIA', 'Comprovante de Residência'), ('COMP_AGUA_LUZ', 'Comprovante de Água/Luz'), ('ID_CARD', 'Cartão de Identidade'), ('SUS_CARD', 'Cartão do SUS'), ('VACINA_CARD', 'Cartão de Vacina'), ('APOLICE_SEGURO', 'Apólice de Seguro')], max_length=50)),
+                ('codigo_verificador', models.UUIDField(unique=True)),
+                ('historico', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='documentos', to='core.historicoarquivado')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='historicoarquivado',
+            index=models.Index(fields=['aluno', 'ano_letivo'], name='core_histor_aluno_i_501a6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicoarquivado',
+            index=models.Index(fields=['ano_letivo', 'tipo'], name='core_histor_ano_let_d0204e_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:22
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def preencher_eixos(apps, schema_editor):
+    # Mesmo cálculo de core.eixos.sincronizar_eixo_alunos, para os dados já existentes
+    CustomUser = apps.get_model('core', 'CustomUser')
+    AlunoTurma = apps.get_model('core', 'AlunoTurma')
+    Estagio = apps.get_model('core', 'Estagio')
+
+    eixo_da_matricula = AlunoTurma.objects.filter(
+        aluno=OuterRef('pk')
+    ).order_by('-ativo', '-id').values('turma__curso__eixo')[:1]
+    CustomUser.objects.filter(tipo='aluno').update(eixo=Subquery(eixo_da_matricula))
+    Estagio.objects.update(
+        eixo=Subquery(CustomUser.objects.filter(pk=OuterRef('aluno_id')).values('eixo')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0017_historico_arquivado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estagio',
+            name='eixo',
+            field=models.CharField(blank=True, choices=[('SAUDE', 'Eixo da Saúde'), ('GESTAO', 'Eixo de Gestão')], db_index=True, editable=False, max_length=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='eixo',
+            field=models.CharField(blank=True, choices=[('SAUDE', 'Eixo da Saúde'), ('GESTAO', 'Eixo de Gestão')], help_text='Eixo ao qual o servidor pertence. Para alunos, é o eixo do curso da matrícula atual (mantido automaticamente).', max_length=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['tipo', 'eixo'], name='core_custom_tipo_e2f05b_idx'),
+        ),
+        migrations.RunPython(preencher_eixos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0018_eixo_denormalizado'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='core_custom_tipo_e2f05b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['tipo', 'eixo', 'first_name', 'last_name'], name='core_custom_tipo_5b9ac6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentoestagio',
+            index=models.Index(fields=['status', 'estagio'], name='core_docume_status_290786_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='estagio',
+            index=models.Index(fields=['eixo', 'status_geral'], name='core_estagi_eixo_579ff5_idx'),
+        ),
+    ]
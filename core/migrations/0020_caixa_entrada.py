@@ -0,0 +1,72 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def preencher_caixas(apps, schema_editor):
+    # Mesmas regras de core.caixa_entrada.destinos_do_estagio, para os documentos já existentes
+    Estagio = apps.get_model('core', 'Estagio')
+    DocumentoEstagio = apps.get_model('core', 'DocumentoEstagio')
+    ItemCaixaEntrada = apps.get_model('core', 'ItemCaixaEntrada')
+
+    avaliacoes = ['AVALIACAO_ORIENTADOR', 'AVALIACAO_SUPERVISOR']
+    estagios = {estagio.id: estagio for estagio in Estagio.objects.all()}
+    documentos_por_estagio = {}
+    for documento in DocumentoEstagio.objects.exclude(status='CONCLUIDO').iterator():
+        documentos_por_estagio.setdefault(documento.estagio_id, []).append(documento)
+
+    itens = []
+    for estagio_id, documentos in documentos_por_estagio.items():
+        estagio = estagios[estagio_id]
+        em_aberto = any(d.tipo_documento not in avaliacoes for d in documentos)
+        for documento in documentos:
+            if documento.tipo_documento == 'AVALIACAO_ORIENTADOR':
+                aguarda_orientador = not em_aberto and documento.status in [
+                    'RASCUNHO', 'RASCUNHO_ORIENTADOR', 'AGUARDANDO_ASSINATURA_PROF'
+                ]
+            else:
+                aguarda_orientador = (
+                    documento.status == 'AGUARDANDO_ASSINATURA_PROF'
+                    and documento.tipo_documento != 'AVALIACAO_SUPERVISOR'
+                )
+
+            if aguarda_orientador:
+                if estagio.orientador_id:
+                    itens.append(ItemCaixaEntrada(documento=documento, papel='professor', destinatario_id=estagio.orientador_id))
+            elif documento.status == 'AGUARDANDO_ASSINATURA_DIR':
+                itens.append(ItemCaixaEntrada(documento=documento, papel='direcao'))
+            elif documento.status == 'AGUARDANDO_VERIFICACAO_ADMIN':
+                itens.append(ItemCaixaEntrada(documento=documento, papel='servidor', eixo=estagio.eixo))
+    ItemCaixaEntrada.objects.bulk_create(itens, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_indices_monitoramento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemCaixaEntrada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('papel', models.CharField(choices=[('professor', 'Orientador'), ('direcao', 'Direção'), ('servidor', 'Servidor do Eixo')], max_length=20)),
+                ('eixo', models.CharField(blank=True, choices=[('SAUDE', 'Eixo da Saúde'), ('GESTAO', 'Eixo de Gestão')], max_length=10, null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('lido_em', models.DateTimeField(blank=True, null=True)),
+                ('destinatario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='caixa_entrada', to=settings.AUTH_USER_MODEL)),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens_caixa', to='core.documentoestagio')),
+            ],
+            options={
+                'verbose_name': 'Item da Caixa de Entrada',
+                'verbose_name_plural': 'Itens da Caixa de Entrada',
+                'ordering': ['criado_em', 'id'],
+                'indexes': [models.Index(fields=['destinatario', 'lido_em'], name='core_itemca_destina_f23f22_idx'), models.Index(fields=['papel', 'eixo', 'lido_em'], name='core_itemca_papel_f797e4_idx')],
+                'unique_together': {('documento', 'papel')},
+            },
+        ),
+        migrations.RunPython(preencher_caixas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_caixa_entrada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoTempoStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_documento', models.CharField(choices=[('AVALIACAO_ORIENTADOR', 'Avaliação do Orientador'), ('AVALIACAO_SUPERVISOR', 'Avaliação do Supervisor'), ('TERMO_COMPROMISSO', 'Termo de Compromisso'), ('FICHA_IDENTIFICACAO', 'Ficha de Identificação'), ('FICHA_PESSOAL', 'Ficha Pessoal'), ('COMP_RESIDENCIA', 'Comprovante de Residência'), ('COMP_AGUA_LUZ', 'Comprovante de Água/Luz'), ('ID_CARD', 'Cartão de Identidade'), ('SUS_CARD', 'Cartão do SUS'), ('VACINA_CARD', 'Cartão de Vacina'), ('APOLICE_SEGURO', 'Apólice de Seguro')], max_length=50)),
+                ('status', models.CharField(choices=[('RASCUNHO', 'Rascunho (Pelo Aluno)'), ('RASCUNHO_ORIENTADOR', 'Rascunho (Pelo Professor)'), ('AGUARDANDO_ASSINATURA_PROF', 'Aguardando Assinatura (Professor)'), ('AGUARDANDO_ASSINATURA_DIR', 'Aguardando Assinatura (Direção)'), ('AGUARDANDO_VERIFICACAO_ADMIN', 'Aguardando Análise Final'), ('CONCLUIDO', 'Concluído'), ('REPROVADO', 'Reprovado (Pendente de Correção)')], max_length=30)),
+                ('saidas', models.PositiveIntegerField(default=0)),
+                ('segundos_total', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('tipo_documento', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='EventoDocumento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_documento', models.CharField(choices=[('AVALIACAO_ORIENTADOR', 'Avaliação do Orientador'), ('AVALIACAO_SUPERVISOR', 'Avaliação do Supervisor'), ('TERMO_COMPROMISSO', 'Termo de Compromisso'), ('FICHA_IDENTIFICACAO', 'Ficha de Identificação'), ('FICHA_PESSOAL', 'Ficha Pessoal'), ('COMP_RESIDENCIA', 'Comprovante de Residência'), ('COMP_AGUA_LUZ', 'Comprovante de Água/Luz'), ('ID_CARD', 'Cartão de Identidade'), ('SUS_CARD', 'Cartão do SUS'), ('VACINA_CARD', 'Cartão de Vacina'), ('APOLICE_SEGURO', 'Apólice de Seguro')], max_length=50)),
+                ('status_anterior', models.CharField(blank=True, choices=[('RASCUNHO', 'Rascunho (Pelo Aluno)'), ('RASCUNHO_ORIENTADOR', 'Rascunho (Pelo Professor)'), ('AGUARDANDO_ASSINATURA_PROF', 'Aguardando Assinatura (Professor)'), ('AGUARDANDO_ASSINATURA_DIR', 'Aguardando Assinatura (Direção)'), ('AGUARDANDO_VERIFICACAO_ADMIN', 'Aguardando Análise Final'), ('CONCLUIDO', 'Concluído'), ('REPROVADO', 'Reprovado (Pendente de Correção)')], max_length=30, null=True)),
+                ('status_novo', models.CharField(choices=[('RASCUNHO', 'Rascunho (Pelo Aluno)'), ('RASCUNHO_ORIENTADOR', 'Rascunho (Pelo Professor)'), ('AGUARDANDO_ASSINATURA_PROF', 'Aguardando Assinatura (Professor)'), ('AGUARDANDO_ASSINATURA_DIR', 'Aguardando Assinatura (Direção)'), ('AGUARDANDO_VERIFICACAO_ADMIN', 'Aguardando Análise Final'), ('CONCLUIDO', 'Concluído'), ('REPROVADO', 'Reprovado (Pendente de Correção)')], max_length=30)),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('segundos_no_status_anterior', models.PositiveIntegerField(blank=True, null=True)),
+                ('ator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos_documentos', to=settings.AUTH_USER_MODEL)),
+                ('documento', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos', to='core.documentoestagio')),
+            ],
+            options={
+                'verbose_name': 'Evento de Documento',
+                'verbose_name_plural': 'Eventos de Documentos',
+                'ordering': ['criado_em', 'id'],
+                'indexes': [models.Index(fields=['documento', 'criado_em'], name='core_evento_documen_61256d_idx'), models.Index(fields=['status_novo', 'criado_em'], name='core_evento_status__16285a_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoVazaoDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('status_novo', models.CharField(choices=[('RASCUNHO', 'Rascunho (Pelo Aluno)'), ('RASCUNHO_ORIENTADOR', 'Rascunho (Pelo Professor)'), ('AGUARDANDO_ASSINATURA_PROF', 'Aguardando Assinatura (Professor)'), ('AGUARDANDO_ASSINATURA_DIR', 'Aguardando Assinatura (Direção)'), ('AGUARDANDO_VERIFICACAO_ADMIN', 'Aguardando Análise Final'), ('CONCLUIDO', 'Concluído'), ('REPROVADO', 'Reprovado (Pendente de Correção)')], max_length=30)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('ator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='vazao_diaria', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-dia'],
+                'unique_together': {('dia', 'ator', 'status_novo')},
+            },
+        ),
+    ]
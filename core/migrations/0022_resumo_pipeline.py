@@ -0,0 +1,59 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def preencher_pipeline(apps, schema_editor):
+    # Mesmo cálculo de core.pipeline.recalcular_pipeline, para os dossiês já existentes
+    AlunoTurma = apps.get_model('core', 'AlunoTurma')
+    Estagio = apps.get_model('core', 'Estagio')
+    DocumentoEstagio = apps.get_model('core', 'DocumentoEstagio')
+    ResumoPipeline = apps.get_model('core', 'ResumoPipeline')
+
+    turma_atual = AlunoTurma.objects.filter(aluno=OuterRef('aluno_id')).order_by('-ativo', '-id').values('turma_id')[:1]
+    Estagio.objects.update(turma_resumo=Subquery(turma_atual))
+
+    linhas = [
+        ResumoPipeline(turma_id=turma_id, tipo_documento='', status=status, total=n)
+        for turma_id, status, n in Estagio.objects.order_by().values_list(
+            'turma_resumo_id', 'status_geral'
+        ).annotate(n=Count('id'))
+    ]
+    linhas += [
+        ResumoPipeline(turma_id=turma_id, tipo_documento=tipo_documento, status=status, total=n)
+        for turma_id, tipo_documento, status, n in DocumentoEstagio.objects.order_by().values_list(
+            'estagio__turma_resumo_id', 'tipo_documento', 'status'
+        ).annotate(n=Count('id'))
+    ]
+    ResumoPipeline.objects.bulk_create(linhas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_eventos_documentos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='estagio',
+            name='turma_resumo',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.turma'),
+        ),
+        migrations.CreateModel(
+            name='ResumoPipeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_documento', models.CharField(blank=True, choices=[('AVALIACAO_ORIENTADOR', 'Avaliação do Orientador'), ('AVALIACAO_SUPERVISOR', 'Avaliação do Supervisor'), ('TERMO_COMPROMISSO', 'Termo de Compromisso'), ('FICHA_IDENTIFICACAO', 'Ficha de Identificação'), ('FICHA_PESSOAL', 'Ficha Pessoal'), ('COMP_RESIDENCIA', 'Comprovante de Residência'), ('COMP_AGUA_LUZ', 'Comprovante de Água/Luz'), ('ID_CARD', 'Cartão de Identidade'), ('SUS_CARD', 'Cartão do SUS'), ('VACINA_CARD', 'Cartão de Vacina'), ('APOLICE_SEGURO', 'Apólice de Seguro')], max_length=50)),
+                ('status', models.CharField(max_length=50)),
+                ('total', models.IntegerField(default=0)),
+                ('turma', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.turma')),
+            ],
+            options={
+                'unique_together': {('turma', 'tipo_documento', 'status')},
+            },
+        ),
+        migrations.RunPython(preencher_pipeline, migrations.RunPython.noop),
+    ]
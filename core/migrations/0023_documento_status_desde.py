@@ -0,0 +1,36 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:38
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def preencher_status_desde(apps, schema_editor):
+    # Último evento de transição do documento (core.eventos) ou, sem eventos, a data de envio
+    DocumentoEstagio = apps.get_model('core', 'DocumentoEstagio')
+    EventoDocumento = apps.get_model('core', 'EventoDocumento')
+    ultimo_evento = EventoDocumento.objects.filter(
+        documento=OuterRef('pk')
+    ).order_by('-criado_em').values('criado_em')[:1]
+    DocumentoEstagio.objects.update(status_desde=Coalesce(Subquery(ultimo_evento), F('data_upload')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_resumo_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentoestagio',
+            name='status_desde',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='documentoestagio',
+            index=models.Index(fields=['status', 'status_desde'], name='core_docume_status_6e66c7_idx'),
+        ),
+        migrations.RunPython(preencher_status_desde, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_documento_status_desde'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='resumo_enviado_em',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
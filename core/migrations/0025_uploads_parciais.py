@@ -0,0 +1,35 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:46
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_usuario_resumo_enviado_em'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadParcial',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('campo', models.CharField(choices=[('arquivo_anexo', 'Arquivo Anexo'), ('pdf_supervisor_assinado', 'PDF Assinado'), ('foto_3x4', 'Foto 3x4')], max_length=30)),
+                ('nome_arquivo', models.CharField(max_length=255)),
+                ('tamanho', models.PositiveBigIntegerField()),
+                ('recebido', models.PositiveBigIntegerField(default=0)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('aluno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads_parciais', to=settings.AUTH_USER_MODEL)),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads_parciais', to='core.documentoestagio')),
+            ],
+            options={
+                'verbose_name': 'Upload em Partes',
+                'verbose_name_plural': 'Uploads em Partes',
+                'indexes': [models.Index(fields=['documento', 'campo'], name='core_upload_documen_e440a6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_uploads_parciais'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessamentoPdf',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campo', models.CharField(choices=[('arquivo_anexo', 'Arquivo Anexo'), ('pdf_supervisor_assinado', 'PDF Assinado')], max_length=30)),
+                ('arquivo', models.CharField(help_text='Nome do arquivo no storage no momento do envio.', max_length=255)),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('CONCLUIDO', 'Concluído'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=20)),
+                ('tamanho_original', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('tamanho_final', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('erro', models.TextField(blank=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('processado_em', models.DateTimeField(blank=True, null=True)),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='processamentos_pdf', to='core.documentoestagio')),
+            ],
+            options={
+                'verbose_name': 'Processamento de PDF',
+                'verbose_name_plural': 'Processamentos de PDF',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['status', 'criado_em'], name='core_proces_status_ad515a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_processamento_pdf'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentoestagio',
+            name='arquivo_anexo',
+            field=models.FileField(blank=True, db_index=True, null=True, upload_to='anexos_estagio/'),
+        ),
+        migrations.AlterField(
+            model_name='documentoestagio',
+            name='foto_3x4',
+            field=models.ImageField(blank=True, db_index=True, help_text='Foto 3x4 do aluno para a ficha.', null=True, upload_to='fotos_3x4/'),
+        ),
+        migrations.AlterField(
+            model_name='documentoestagio',
+            name='pdf_supervisor_assinado',
+            field=models.FileField(blank=True, db_index=True, null=True, upload_to='pdfs_assinados/'),
+        ),
+    ]
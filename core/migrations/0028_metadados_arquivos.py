@@ -0,0 +1,41 @@
+# Generated by Django 5.2.2 on 2026-10-19 18:57
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def preencher_metadados(apps, schema_editor):
+    # Só nome, tamanho e presença (um stat por arquivo); o sha256, o tipo e as
+    # páginas ficam para o comando verificar_arquivos, que lê os arquivos sem metadados completos
+    DocumentoEstagio = apps.get_model('core', 'DocumentoEstagio')
+    campos = ['arquivo_anexo', 'pdf_supervisor_assinado', 'foto_3x4']
+    alterados = []
+    for documento in DocumentoEstagio.objects.exclude(**{campo: '' for campo in campos}).iterator():
+        metadados = {}
+        for campo in campos:
+            nome = getattr(documento, campo).name
+            if not nome:
+                continue
+            try:
+                metadados[campo] = {'nome': nome, 'tamanho': default_storage.size(nome), 'presente': True}
+            except FileNotFoundError:
+                metadados[campo] = {'nome': nome, 'presente': False}
+        documento.metadados_arquivos = metadados
+        alterados.append(documento)
+    DocumentoEstagio.objects.bulk_update(alterados, ['metadados_arquivos'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_indices_arquivos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentoestagio',
+            name='metadados_arquivos',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(preencher_metadados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.2 on 2026-10-19 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_metadados_arquivos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoCache',
+            fields=[
+                ('chave', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('versao', models.PositiveBigIntegerField(default=1)),
+            ],
+        ),
+    ]
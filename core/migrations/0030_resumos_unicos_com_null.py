@@ -0,0 +1,56 @@
+# Generated by Django 5.2.2 on 2026-10-19 19:15
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def somar_linhas_sem_chave(apps, schema_editor):
+    # Linhas com ator/turma NULL podem ter sido duplicadas: junta o total na mais antiga
+    for modelo, campo_nulo, chave in [
+        ('ResumoVazaoDiaria', 'ator', ('dia', 'status_novo')),
+        ('ResumoPipeline', 'turma', ('tipo_documento', 'status')),
+    ]:
+        Resumo = apps.get_model('core', modelo)
+        sem_chave = Resumo.objects.filter(**{f'{campo_nulo}__isnull': True})
+        duplicadas = sem_chave.values(*chave).annotate(
+            linhas=Count('id'), primeira=Min('id'), soma=Sum('total')
+        ).filter(linhas__gt=1)
+        for grupo in duplicadas:
+            filtro = {campo: grupo[campo] for campo in chave}
+            sem_chave.filter(**filtro).exclude(id=grupo['primeira']).delete()
+            Resumo.objects.filter(id=grupo['primeira']).update(total=grupo['soma'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_versao_cache'),
+    ]
+
+    operations = [
+        migrations.RunPython(somar_linhas_sem_chave, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='resumopipeline',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='resumovazaodiaria',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='resumopipeline',
+            constraint=models.UniqueConstraint(condition=models.Q(('turma__isnull', False)), fields=('turma', 'tipo_documento', 'status'), name='resumo_pipeline_unico_por_turma'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumopipeline',
+            constraint=models.UniqueConstraint(condition=models.Q(('turma__isnull', True)), fields=('tipo_documento', 'status'), name='resumo_pipeline_unico_sem_turma'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumovazaodiaria',
+            constraint=models.UniqueConstraint(condition=models.Q(('ator__isnull', False)), fields=('dia', 'ator', 'status_novo'), name='resumo_vazao_unico_por_ator'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumovazaodiaria',
+            constraint=models.UniqueConstraint(condition=models.Q(('ator__isnull', True)), fields=('dia', 'status_novo'), name='resumo_vazao_unico_sistema'),
+        ),
+    ]
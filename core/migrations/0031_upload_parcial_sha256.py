@@ -0,0 +1,20 @@
+# Generated by Django 5.2.2 on 2026-10-19 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0030_resumos_unicos_com_null'),
+    ]
+
+    operations = [
+        # Uploads já em andamento ficam sem o sha256: não são retomados e expiram
+        migrations.AddField(
+            model_name='uploadparcial',
+            name='sha256',
+            field=models.CharField(default='', max_length=64),
+            preserve_default=False,
+        ),
+    ]
@@ -1,13 +1,36 @@
 # Em core/models.py
 # (Todos os seus imports permanecem os mesmos)
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 import datetime
 import random
-from django.db.models.signals import pre_delete, pre_save
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
 from django.dispatch import receiver
 import os
 import uuid
+import json
+import zlib
+
+
+class ComRelacionadosManager(models.Manager):
+    """
+    Manager padrão que já traz (select_related) as FKs usadas no __str__ do modelo,
+    para que listagens, selects e o admin não façam uma consulta extra por linha.
+
+    Crie com ComRelacionadosManager.para('fk', ...). A lista fica num atributo da
+    classe porque o Django monta os managers relacionados (aluno.nota_set,
+    estagio.documentos) herdando a classe do manager padrão e chamando __init__()
+    sem argumentos.
+    """
+    relacionados = ()
+
+    @classmethod
+    def para(cls, *relacionados):
+        return type(cls.__name__, (cls,), {'relacionados': relacionados})()
+
+    def get_queryset(self):
+        return super().get_queryset().select_related(*self.relacionados)
 
 
 class CustomUser(AbstractUser):
@@ -31,7 +54,7 @@ class CustomUser(AbstractUser):
         choices=EIXO_CHOICES, 
         null=True, 
         blank=True, 
-        help_text="Eixo ao qual o servidor pertence."
+        help_text="Eixo ao qual o servidor pertence. Para alunos, é o eixo do curso da matrícula atual (mantido automaticamente)."
     )
 
     data_nascimento = models.DateField(null=True, blank=True)
@@ -55,6 +78,15 @@ class CustomUser(AbstractUser):
     telefone = models.CharField(max_length=15, blank=True, null=True)
 
     senha_temporaria = models.BooleanField(default=False)
+    # Último resumo de pendências enviado por e-mail (core/notificacoes.py)
+    resumo_enviado_em = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Listas e permissões por eixo (ex: alunos do eixo do servidor),
+            # já na ordem alfabética usada pela paginação do monitoramento
+            models.Index(fields=['tipo', 'eixo', 'first_name', 'last_name']),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.numero_matricula:
@@ -116,6 +148,8 @@ class Turma(models.Model):
     modalidade = models.CharField(max_length=50, blank=True, null=True)
     sala = models.CharField(max_length=20, blank=True, null=True)
 
+    objects = ComRelacionadosManager.para('curso')
+
     class Meta:
         unique_together = ('curso', 'ano_modulo', 'turno', 'turma', 'modalidade')
 
@@ -177,6 +211,8 @@ class GradeMateria(models.Model):
     materia = models.ForeignKey(Materia, on_delete=models.CASCADE, related_name='em_grades')
     tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
 
+    objects = ComRelacionadosManager.para('curso', 'materia')
+
     class Meta:
         # Garante que não podemos adicionar a mesma matéria ao mesmo curso duas vezes
         unique_together = ('curso', 'materia')
@@ -200,6 +236,8 @@ class ProfessorMateriaAnoCursoModalidade(models.Model):
     ano_modulo = models.CharField(max_length=20, choices=Turma.ANO_MODULO_CHOICES)
     modalidade = models.CharField(max_length=20, choices=MODALIDADE_CHOICES)
 
+    objects = ComRelacionadosManager.para('professor', 'materia', 'curso')
+
     class Meta:
         unique_together = ('professor', 'materia', 'curso', 'ano_modulo', 'modalidade')
         verbose_name = "Vínculo de Professor"
@@ -215,9 +253,16 @@ class AlunoTurma(models.Model):
     turma = models.ForeignKey(Turma, on_delete=models.CASCADE)
     data_matricula = models.DateField(auto_now_add=True)
     ano_letivo = models.CharField(max_length=10, blank=True, null=True)
+    # Matrículas de anos anteriores (após a promoção) ficam como histórico, inativas
+    ativo = models.BooleanField(default=True, db_index=True)
+
+    objects = ComRelacionadosManager.para('aluno', 'turma__curso')
 
     class Meta:
         unique_together = ('aluno', 'turma')
+        # A matrícula ativa (a mais recente) vem primeiro, então 'alunoturma_set.first'
+        # continua devolvendo a turma atual mesmo com histórico
+        ordering = ['-ativo', '-id']
 
     def save(self, *args, **kwargs):
         if not self.pk:
@@ -243,6 +288,17 @@ class Nota(models.Model):
     media_final = models.FloatField(null=True, blank=True)
     status_final = models.CharField(max_length=30, blank=True)
 
+    objects = ComRelacionadosManager.para('aluno', 'materia')
+
+    class Meta:
+        # Uma nota por aluno/matéria/turma. Também é a chave usada
+        # pelo upsert em massa da importação de planilhas.
+        unique_together = ('aluno', 'materia', 'turma')
+        indexes = [
+            # Relatórios de "notas faltando" por turma/matéria
+            models.Index(fields=['turma', 'materia', 'status_final']),
+        ]
+
     def calcular_media(self):
         notas = [self.nota_1, self.nota_2, self.nota_3]
         notas_validas = [n for n in notas if n is not None]
@@ -297,6 +353,37 @@ class Estagio(models.Model):
         default='RASCUNHO_ALUNO' 
     )
 
+    # Cópia do eixo do aluno (core.eixos), para filtrar dossiês por eixo sem joins
+    eixo = models.CharField(max_length=10, choices=Curso.EIXO_CHOICES, null=True, blank=True, db_index=True, editable=False)
+    # Turma em que o dossiê está contado nos resumos do painel (core.pipeline)
+    turma_resumo = models.ForeignKey(Turma, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+')
+
+    objects = ComRelacionadosManager.para('aluno')
+
+    class Meta:
+        indexes = [
+            # Filtro por status no monitoramento do servidor
+            models.Index(fields=['eixo', 'status_geral']),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Troca de orientador muda o dono das pendências do dossiê (core.caixa_entrada);
+        # troca de status move o dossiê nos resumos do painel (core.pipeline)
+        from .caixa_entrada import sincronizar_caixa_estagio
+        from .pipeline import registrar_mudanca_estagio
+        criado = self._state.adding
+        with transaction.atomic():
+            anterior = None
+            if not criado:
+                anterior = Estagio.objects.filter(pk=self.pk).values_list('status_geral', 'turma_resumo_id').first()
+                if anterior:
+                    # A turma do resumo só muda por core.pipeline; não sobrescreve com um valor antigo
+                    self.turma_resumo_id = anterior[1]
+            super().save(*args, **kwargs)
+            registrar_mudanca_estagio(self, anterior[0] if anterior else None)
+            if not criado:
+                sincronizar_caixa_estagio(self.id)
+
     def __str__(self):
         return f"Estágio de {self.aluno.get_full_name()} ({self.get_status_geral_display()})"
 
@@ -332,9 +419,9 @@ class DocumentoEstagio(models.Model):
     
     dados_formulario = models.JSONField(default=dict, blank=True, help_text="Respostas do formulário preenchido pelo usuário.")
     
-    arquivo_anexo = models.FileField(upload_to='anexos_estagio/', blank=True, null=True)
+    arquivo_anexo = models.FileField(upload_to='anexos_estagio/', blank=True, null=True, db_index=True)
     
-    foto_3x4 = models.ImageField(upload_to='fotos_3x4/', blank=True, null=True, help_text="Foto 3x4 do aluno para a ficha.")
+    foto_3x4 = models.ImageField(upload_to='fotos_3x4/', blank=True, null=True, db_index=True, help_text="Foto 3x4 do aluno para a ficha.")
     
     status = models.CharField(
         max_length=30, 
@@ -365,10 +452,14 @@ class DocumentoEstagio(models.Model):
         related_name='documentos_assinados_diretor'
     )
     
-    pdf_supervisor_assinado = models.FileField(upload_to='pdfs_assinados/', blank=True, null=True)
+    pdf_supervisor_assinado = models.FileField(upload_to='pdfs_assinados/', blank=True, null=True, db_index=True)
+    # Tamanho, sha256, tipo, páginas e presença de cada arquivo acima (core/arquivos.py)
+    metadados_arquivos = models.JSONField(default=dict, blank=True, editable=False)
 
     publico = models.BooleanField(default=False, help_text="Se marcado, o orientador e servidor podem ver.")
     data_upload = models.DateTimeField(auto_now_add=True)
+    # Quando o documento entrou no status atual (relatório de prazos, core/prazos.py)
+    status_desde = models.DateTimeField(default=timezone.now, editable=False)
     
     codigo_verificador = models.UUIDField(
         default=uuid.uuid4, 
@@ -377,13 +468,394 @@ class DocumentoEstagio(models.Model):
         help_text="Código único para verificação pública"
     )
     
+    objects = ComRelacionadosManager.para('estagio__aluno')
+
     class Meta:
         unique_together = ('estagio', 'tipo_documento')
+        indexes = [
+            # Filas por etapa (ex: documentos aguardando a análise do servidor)
+            models.Index(fields=['status', 'estagio']),
+            # Documentos parados há mais tempo em cada status (faixa do índice, sem ordenar a tabela)
+            models.Index(fields=['status', 'status_desde']),
+        ]
+
+    # Status como veio do banco, para o save saber se houve transição
+    _status_carregado = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._status_carregado = instancia.__dict__.get('status')
+        return instancia
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or 'status' in fields:
+            self._status_carregado = self.__dict__.get('status')
+
+    def save(self, *args, ator=None, **kwargs):
+        """
+        O documento, a caixa de entrada de quem precisa agir sobre ele, o status
+        do dossiê, o log de transições (com 'ator', quem fez a mudança) e os
+        resumos do painel são gravados na mesma transação.
+        """
+        from .caixa_entrada import sincronizar_caixa_estagio
+        from .dossies import reconciliar_status_dossies
+        from .eventos import registrar_transicao
+        from .pipeline import registrar_mudanca_documento
+        from .tempo_real import avisar_transicao
+        from .arquivos import atualizar_metadados, campos_alterados
+        status_anterior = None if self._state.adding else self._status_carregado
+        if status_anterior != self.status:
+            self.status_desde = timezone.now()
+            if kwargs.get('update_fields') is not None and 'status' in kwargs['update_fields']:
+                kwargs['update_fields'] = list(kwargs['update_fields']) + ['status_desde']
+        arquivos_alterados = campos_alterados(self, kwargs.get('update_fields'))
+        if arquivos_alterados:
+            atualizar_metadados(self, arquivos_alterados)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = list(kwargs['update_fields']) + ['metadados_arquivos']
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if status_anterior != self.status:
+                registrar_transicao(self, status_anterior, ator)
+                registrar_mudanca_documento(self, status_anterior)
+                self._status_carregado = self.status
+                # Painéis abertos (SSE) só são avisados depois do commit
+                estagio_id = self.estagio_id
+                transaction.on_commit(lambda: avisar_transicao(estagio_id))
+                # Quem precisa agir só muda com o status (inclusive o primeiro, na criação)
+                sincronizar_caixa_estagio(self.estagio_id)
+            # O último documento concluído aprova o dossiê (core.dossies)
+            if self.status == 'CONCLUIDO':
+                reconciliar_status_dossies([self.estagio_id])
+
+    def arquivo_presente(self, campo):
+        """ Se o arquivo do campo está no storage, pelos metadados da linha (sem consultar o storage). """
+        arquivo = getattr(self, campo)
+        metadados = (self.metadados_arquivos or {}).get(campo) or {}
+        return bool(arquivo) and metadados.get('nome') == arquivo.name and metadados.get('presente', False)
 
     def __str__(self):
         return f"{self.get_tipo_documento_display()} - {self.estagio.aluno.get_full_name()}"
     
     
+class HistoricoArquivado(models.Model):
+    """
+    Snapshot somente-leitura de um ano letivo encerrado.
+
+    Quando um ano letivo é arquivado, as matrículas inativas, as notas delas e os
+    dossiês de estágio concluídos saem das tabelas do dia a dia e viram um JSON
+    compactado (zlib) aqui, um registro por aluno/ano letivo/tipo.
+    """
+    TIPO_CHOICES = [
+        ('MATRICULA', 'Matrícula e Notas'),
+        ('ESTAGIO', 'Dossiê de Estágio'),
+    ]
+
+    aluno = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='historicos', limit_choices_to={'tipo': 'aluno'})
+    ano_letivo = models.CharField(max_length=10)
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    descricao = models.CharField(max_length=255, help_text="Turma ou empresa do estágio, para listagem sem descompactar.")
+    dados = models.BinaryField()
+    arquivado_em = models.DateTimeField(auto_now_add=True)
+
+    objects = ComRelacionadosManager.para('aluno')
+
+    class Meta:
+        ordering = ['-ano_letivo', 'tipo', 'id']
+        indexes = [
+            models.Index(fields=['aluno', 'ano_letivo']),
+            models.Index(fields=['ano_letivo', 'tipo']),
+        ]
+        verbose_name = "Histórico Arquivado"
+        verbose_name_plural = "Históricos Arquivados"
+
+    # Formato do JSON gravado em 'dados'. Snapshots anteriores ao campo contam como 1;
+    # ao mudar a estrutura (não só os campos dos models), suba o número e trate as antigas na leitura
+    VERSAO_SNAPSHOT = 1
+
+    @classmethod
+    def compactar(cls, conteudo):
+        conteudo = {'versao': cls.VERSAO_SNAPSHOT, **conteudo}
+        return zlib.compress(json.dumps(conteudo, ensure_ascii=False, default=str).encode('utf-8'))
+
+    @property
+    def conteudo(self):
+        return json.loads(zlib.decompress(bytes(self.dados)).decode('utf-8'))
+
+    def restaurar_estagio(self):
+        """
+        Para snapshots de estágio: devolve (estagio, documentos) como instâncias
+        em memória (não gravadas), com os mesmos campos de quando foram arquivadas.
+        Campos removidos ou renomeados depois do arquivamento são ignorados; os
+        campos novos ficam com o valor padrão.
+        """
+        from django.core import serializers
+        estagio, documentos = None, []
+        registros = self.conteudo.get('registros', [])
+        for registro in serializers.deserialize('python', registros, ignorenonexistent=True):
+            objeto = registro.object
+            if isinstance(objeto, Estagio):
+                estagio = objeto
+            else:
+                documentos.append(objeto)
+        for documento in documentos:
+            documento.estagio = estagio
+        return estagio, documentos
+
+    def __str__(self):
+        return f"{self.aluno.get_full_name()} - {self.ano_letivo} ({self.get_tipo_display()})"
+
+
+class DocumentoArquivado(models.Model):
+    """
+    Índice dos códigos verificadores de documentos arquivados, para que o QR code
+    impresso continue sendo validado depois que o dossiê sai de DocumentoEstagio.
+    """
+    historico = models.ForeignKey(HistoricoArquivado, on_delete=models.CASCADE, related_name='documentos')
+    tipo_documento = models.CharField(max_length=50, choices=DocumentoEstagio.TIPO_DOCUMENTO_CHOICES)
+    codigo_verificador = models.UUIDField(unique=True)
+
+    def restaurar(self):
+        """ Remonta (sem gravar) o DocumentoEstagio e o Estagio a partir do snapshot. """
+        estagio, documentos = self.historico.restaurar_estagio()
+        for documento in documentos:
+            if documento.codigo_verificador == self.codigo_verificador:
+                return documento
+        return None
+
+    def __str__(self):
+        return f"{self.get_tipo_documento_display()} ({self.codigo_verificador})"
+
+
+class EventoDocumento(models.Model):
+    """
+    Log somente-inclusão das mudanças de status dos documentos de estágio:
+    quem moveu, de qual status para qual, quando e quanto tempo o documento
+    ficou no status anterior. Escrito por DocumentoEstagio.save (core.eventos);
+    nunca é alterado depois de gravado.
+    """
+    documento = models.ForeignKey(DocumentoEstagio, on_delete=models.SET_NULL, null=True, related_name='eventos')
+    tipo_documento = models.CharField(max_length=50, choices=DocumentoEstagio.TIPO_DOCUMENTO_CHOICES)
+    status_anterior = models.CharField(max_length=30, choices=DocumentoEstagio.STATUS_CHOICES, null=True, blank=True)
+    status_novo = models.CharField(max_length=30, choices=DocumentoEstagio.STATUS_CHOICES)
+    ator = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='eventos_documentos')
+    criado_em = models.DateTimeField(default=timezone.now)
+    segundos_no_status_anterior = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['criado_em', 'id']
+        indexes = [
+            models.Index(fields=['documento', 'criado_em']),
+            models.Index(fields=['status_novo', 'criado_em']),
+        ]
+        verbose_name = "Evento de Documento"
+        verbose_name_plural = "Eventos de Documentos"
+
+    def __str__(self):
+        return f"{self.get_tipo_documento_display()}: {self.status_anterior or '-'} -> {self.status_novo} ({self.criado_em:%d/%m/%Y %H:%M})"
+
+
+class ResumoTempoStatus(models.Model):
+    """
+    Tempo acumulado que os documentos passaram em cada status, por tipo de documento.
+    Incrementado a cada evento (core.eventos), então a média sai sem reler o histórico.
+    """
+    tipo_documento = models.CharField(max_length=50, choices=DocumentoEstagio.TIPO_DOCUMENTO_CHOICES)
+    status = models.CharField(max_length=30, choices=DocumentoEstagio.STATUS_CHOICES)
+    saidas = models.PositiveIntegerField(default=0)
+    segundos_total = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('tipo_documento', 'status')
+
+    @property
+    def media_segundos(self):
+        return self.segundos_total / self.saidas if self.saidas else None
+
+    def __str__(self):
+        return f"{self.get_tipo_documento_display()} em {self.get_status_display()}: {self.saidas} saída(s)"
+
+
+class ResumoVazaoDiaria(models.Model):
+    """
+    Quantas transições cada ator fez por dia, por status de destino.
+    Incrementado a cada evento (core.eventos).
+    """
+    dia = models.DateField()
+    ator = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='vazao_diaria')
+    status_novo = models.CharField(max_length=30, choices=DocumentoEstagio.STATUS_CHOICES)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-dia']
+        # Eventos do sistema têm ator NULL, e NULLs nunca colidem num índice único comum:
+        # um índice parcial para cada caso garante uma linha por chave também sem ator
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dia', 'ator', 'status_novo'], condition=models.Q(ator__isnull=False),
+                name='resumo_vazao_unico_por_ator',
+            ),
+            models.UniqueConstraint(
+                fields=['dia', 'status_novo'], condition=models.Q(ator__isnull=True),
+                name='resumo_vazao_unico_sistema',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dia:%d/%m/%Y} - {self.ator or 'Sistema'} -> {self.get_status_novo_display()}: {self.total}"
+
+
+class ResumoPipeline(models.Model):
+    """
+    Contadores do painel de estágios: quantos dossiês (tipo_documento vazio) ou
+    documentos de cada tipo estão em cada status, por turma. Curso e eixo saem da turma.
+    Mantidos por delta a cada mudança (core.pipeline); o painel nunca agrupa DocumentoEstagio.
+    """
+    turma = models.ForeignKey(Turma, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    tipo_documento = models.CharField(max_length=50, blank=True, choices=DocumentoEstagio.TIPO_DOCUMENTO_CHOICES)
+    status = models.CharField(max_length=50)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        # Mesmo caso do ResumoVazaoDiaria: a linha "Sem turma" (NULL) precisa do próprio índice
+        constraints = [
+            models.UniqueConstraint(
+                fields=['turma', 'tipo_documento', 'status'], condition=models.Q(turma__isnull=False),
+                name='resumo_pipeline_unico_por_turma',
+            ),
+            models.UniqueConstraint(
+                fields=['tipo_documento', 'status'], condition=models.Q(turma__isnull=True),
+                name='resumo_pipeline_unico_sem_turma',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.turma or 'Sem turma'} - {self.tipo_documento or 'Dossiê'} - {self.status}: {self.total}"
+
+
+class ItemCaixaEntrada(models.Model):
+    """
+    Documento esperando a ação de alguém: do orientador (destinatario),
+    da direção ou do servidor do eixo. É mantido por core.caixa_entrada a cada
+    mudança de status, então os dashboards leem só as pendências, sem varrer DocumentoEstagio.
+    """
+    PAPEL_CHOICES = [
+        ('professor', 'Orientador'),
+        ('direcao', 'Direção'),
+        ('servidor', 'Servidor do Eixo'),
+    ]
+
+    documento = models.ForeignKey(DocumentoEstagio, on_delete=models.CASCADE, related_name='itens_caixa')
+    papel = models.CharField(max_length=20, choices=PAPEL_CHOICES)
+    destinatario = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, related_name='caixa_entrada')
+    eixo = models.CharField(max_length=10, choices=Curso.EIXO_CHOICES, null=True, blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    lido_em = models.DateTimeField(null=True, blank=True)
+
+    objects = ComRelacionadosManager.para('documento__estagio__aluno')
+
+    class Meta:
+        unique_together = ('documento', 'papel')
+        ordering = ['criado_em', 'id']
+        indexes = [
+            models.Index(fields=['destinatario', 'lido_em']),
+            models.Index(fields=['papel', 'eixo', 'lido_em']),
+        ]
+        verbose_name = "Item da Caixa de Entrada"
+        verbose_name_plural = "Itens da Caixa de Entrada"
+
+    def __str__(self):
+        return f"{self.documento} -> {self.get_papel_display()}"
+
+
+class UploadParcial(models.Model):
+    """
+    Upload em partes de um arquivo de DocumentoEstagio (core/uploads.py). As
+    partes vão sendo anexadas a um arquivo temporário; 'recebido' é o ponto
+    de onde o cliente retoma depois de uma queda de conexão. O 'sha256' do
+    arquivo inteiro, calculado pelo navegador, identifica o upload a retomar
+    e confere o arquivo montado.
+    """
+    CAMPO_CHOICES = [
+        ('arquivo_anexo', 'Arquivo Anexo'),
+        ('pdf_supervisor_assinado', 'PDF Assinado'),
+        ('foto_3x4', 'Foto 3x4'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    aluno = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='uploads_parciais')
+    documento = models.ForeignKey(DocumentoEstagio, on_delete=models.CASCADE, related_name='uploads_parciais')
+    campo = models.CharField(max_length=30, choices=CAMPO_CHOICES)
+    nome_arquivo = models.CharField(max_length=255)
+    tamanho = models.PositiveBigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    recebido = models.PositiveBigIntegerField(default=0)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['documento', 'campo']),
+        ]
+        verbose_name = "Upload em Partes"
+        verbose_name_plural = "Uploads em Partes"
+
+    def __str__(self):
+        return f"{self.nome_arquivo} ({self.recebido}/{self.tamanho} bytes)"
+
+
+class ProcessamentoPdf(models.Model):
+    """
+    Fila de otimização dos PDFs enviados (core/pdfs.py). O upload só valida e
+    enfileira; o comando processar_pdfs recomprime as imagens fora da requisição.
+    """
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('CONCLUIDO', 'Concluído'),
+        ('FALHOU', 'Falhou'),
+    ]
+    CAMPO_CHOICES = [
+        ('arquivo_anexo', 'Arquivo Anexo'),
+        ('pdf_supervisor_assinado', 'PDF Assinado'),
+    ]
+
+    documento = models.ForeignKey(DocumentoEstagio, on_delete=models.CASCADE, related_name='processamentos_pdf')
+    campo = models.CharField(max_length=30, choices=CAMPO_CHOICES)
+    arquivo = models.CharField(max_length=255, help_text="Nome do arquivo no storage no momento do envio.")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDENTE')
+    tamanho_original = models.PositiveBigIntegerField(null=True, blank=True)
+    tamanho_final = models.PositiveBigIntegerField(null=True, blank=True)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    processado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['status', 'criado_em']),
+        ]
+        verbose_name = "Processamento de PDF"
+        verbose_name_plural = "Processamentos de PDF"
+
+    def __str__(self):
+        return f"{self.arquivo} ({self.get_status_display()})"
+
+
+class VersaoCache(models.Model):
+    """
+    Versões que invalidam dados guardados no cache local de cada processo
+    (core/diretorio.py). Ficam no banco para que uma mudança feita por um
+    worker valha para todos, e subam na mesma transação da mudança.
+    """
+    chave = models.CharField(max_length=100, primary_key=True)
+    versao = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.chave} = {self.versao}"
+
+
 # (Seus 'receivers' de sinais estão perfeitos, sem alterações)
 @receiver(pre_delete, sender=DocumentoEstagio)
 def apagar_pdf_ao_excluir_documento(sender, instance, **kwargs):
@@ -430,4 +902,132 @@ def substituir_pdf_antigo(sender, instance, **kwargs):
     new_file_foto = instance.foto_3x4
     if old_file_foto and old_file_foto != new_file_foto:
         if os.path.isfile(old_file_foto.path):
-            os.remove(old_file_foto.path)
\ No newline at end of file
+            os.remove(old_file_foto.path)
+
+
+@receiver(post_save, sender=AlunoTurma)
+def provisionar_notas_da_matricula(sender, instance, **kwargs):
+    """Ao matricular (ou trocar de turma), cria as notas da grade do curso."""
+    if not instance.ativo:
+        return
+    from .notas import provisionar_notas
+    provisionar_notas(AlunoTurma.objects.filter(pk=instance.pk))
+
+@receiver(post_save, sender=GradeMateria)
+def provisionar_notas_da_grade(sender, instance, created, **kwargs):
+    """Matéria nova na grade: todos os alunos do curso ganham a nota dela."""
+    if not created:
+        return
+    from .notas import provisionar_notas
+    # Só a matéria nova: as demais notas dessas matrículas já existem
+    provisionar_notas(
+        AlunoTurma.objects.filter(turma__curso_id=instance.curso_id, ativo=True),
+        materias=[instance.materia_id],
+    )
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_save, sender=ProfessorMateriaAnoCursoModalidade)
+@receiver(post_delete, sender=ProfessorMateriaAnoCursoModalidade)
+@receiver(post_save, sender=Materia)
+@receiver(post_save, sender=Curso)
+def invalidar_diretorio_orientadores(sender, update_fields=None, **kwargs):
+    """Nomes de professores, matérias e cursos aparecem nos rótulos do diretório de orientadores."""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return  # login não muda nada do diretório
+    from .diretorio import invalidar_diretorio_orientadores
+    invalidar_diretorio_orientadores()
+
+
+@receiver(post_save, sender=Materia)
+@receiver(post_delete, sender=Materia)
+@receiver(post_save, sender=Curso)
+@receiver(post_delete, sender=Curso)
+def invalidar_catalogo(sender, **kwargs):
+    """Listas de matérias e cursos usadas nos selects dos formulários."""
+    from .diretorio import invalidar_catalogo
+    invalidar_catalogo()
+
+
+@receiver(post_save, sender=ProfessorMateriaAnoCursoModalidade)
+@receiver(post_delete, sender=ProfessorMateriaAnoCursoModalidade)
+def invalidar_acesso_do_professor(sender, instance, **kwargs):
+    """Vínculo novo, alterado ou removido: refaz o índice de acesso só deste professor."""
+    from .diretorio import invalidar_acesso_professor
+    invalidar_acesso_professor(instance.professor_id)
+
+@receiver(post_save, sender=Turma)
+@receiver(post_delete, sender=Turma)
+@receiver(post_save, sender=AlunoTurma)
+@receiver(post_delete, sender=AlunoTurma)
+def invalidar_acesso_dos_professores(sender, **kwargs):
+    """Turmas e matrículas entram no índice de todos os professores."""
+    from .diretorio import invalidar_acesso_professores
+    invalidar_acesso_professores()
+
+
+def _aluno_sendo_apagado(aluno_id, origin):
+    """
+    Se a exclusão em cascata partiu do próprio aluno (aluno.delete() ou um queryset
+    de usuários). Os usuários são apagados por último, então a linha ainda existe aqui.
+    """
+    if isinstance(origin, CustomUser):
+        return origin.pk == aluno_id
+    if isinstance(origin, models.QuerySet) and origin.model is CustomUser:
+        return origin.filter(pk=aluno_id).exists()
+    return False
+
+@receiver(post_save, sender=AlunoTurma)
+@receiver(post_delete, sender=AlunoTurma)
+def sincronizar_eixo_da_matricula(sender, instance, origin=None, **kwargs):
+    """O eixo do aluno (e do dossiê) segue a matrícula atual."""
+    if _aluno_sendo_apagado(instance.aluno_id, origin):
+        # O dossiê sai dos contadores no pre_delete dele; reposicioná-lo aqui descontaria de novo
+        return
+    from .eixos import sincronizar_eixo_alunos
+    sincronizar_eixo_alunos([instance.aluno_id])
+
+@receiver(pre_save, sender=Curso)
+def guardar_eixo_anterior_do_curso(sender, instance, **kwargs):
+    instance._eixo_anterior = (
+        Curso.objects.filter(pk=instance.pk).values_list('eixo', flat=True).first() if instance.pk else None
+    )
+
+@receiver(post_save, sender=Curso)
+def sincronizar_eixo_do_curso(sender, instance, created, **kwargs):
+    """Curso mudou de eixo: todos os alunos dele mudam junto."""
+    if created or instance._eixo_anterior == instance.eixo:
+        return
+    from .eixos import sincronizar_eixo_alunos
+    sincronizar_eixo_alunos(AlunoTurma.objects.filter(turma__curso=instance).values('aluno_id'))
+
+@receiver(pre_delete, sender=Turma)
+def mover_contadores_da_turma(sender, instance, **kwargs):
+    """Os dossiês da turma apagada passam a contar em "Sem turma" (turma_resumo vira NULL)."""
+    from .pipeline import mover_para_sem_turma
+    mover_para_sem_turma(instance.id)
+
+@receiver(post_save, sender=Turma)
+def sincronizar_eixo_da_turma(sender, instance, created, **kwargs):
+    """Turma trocada de curso (raro): os alunos dela podem ter mudado de eixo."""
+    if created:
+        return
+    from .eixos import sincronizar_eixo_alunos
+    sincronizar_eixo_alunos(AlunoTurma.objects.filter(turma=instance).values('aluno_id'))
+
+@receiver(pre_save, sender=Estagio)
+def definir_eixo_do_estagio(sender, instance, **kwargs):
+    if instance._state.adding and not instance.eixo:
+        instance.eixo = CustomUser.objects.filter(pk=instance.aluno_id).values_list('eixo', flat=True).first()
+    if instance._state.adding and not instance.turma_resumo_id:
+        instance.turma_resumo_id = AlunoTurma.objects.filter(
+            aluno_id=instance.aluno_id
+        ).order_by('-ativo', '-id').values_list('turma_id', flat=True).first()
+
+@receiver(pre_delete, sender=Estagio)
+@receiver(pre_delete, sender=DocumentoEstagio)
+def descontar_do_pipeline(sender, instance, **kwargs):
+    """Dossiê ou documento apagado (ex: arquivamento) sai dos resumos do painel."""
+    from .pipeline import descontar_exclusao
+    descontar_exclusao(instance)
@@ -0,0 +1,233 @@
+# core/notas.py
+import csv
+import itertools
+import unicodedata
+
+from django.db import transaction
+
+from .models import CustomUser, Nota, GradeMateria
+
+NOTA_MINIMA = 0
+NOTA_MAXIMA = 10
+
+CAMPOS_NOTA = ['nota_1', 'nota_2', 'nota_3', 'nota_recuperacao']
+
+# Cabeçalhos aceitos na planilha (já normalizados: minúsculo e sem acento).
+# Inclui os nomes usados pela exportação, para a planilha exportada poder voltar.
+COLUNAS_PLANILHA = {
+    'matricula': 'matricula',
+    'n1': 'nota_1', 'nota 1': 'nota_1', 'nota_1': 'nota_1',
+    'n2': 'nota_2', 'nota 2': 'nota_2', 'nota_2': 'nota_2',
+    'n3': 'nota_3', 'nota 3': 'nota_3', 'nota_3': 'nota_3',
+    'recuperacao': 'nota_recuperacao', 'nf': 'nota_recuperacao', 'nota_recuperacao': 'nota_recuperacao',
+}
+
+# Para de acumular erros depois disso; a planilha precisa ser corrigida de qualquer forma.
+MAX_ERROS_PLANILHA = 30
+
+# Quantas notas são inseridas por comando no provisionamento em massa.
+TAMANHO_LOTE_PROVISIONAMENTO = 1000
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return texto.strip().lower()
+
+
+def _decodificar_linhas(arquivo):
+    """ Lê o upload linha a linha (sem carregar o arquivo inteiro). """
+    for linha in arquivo:
+        try:
+            yield linha.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            # Planilhas salvas pelo Excel em Windows costumam vir em cp1252
+            yield linha.decode('cp1252', errors='replace')
+
+
+def _converter_nota(valor):
+    valor = (valor or '').strip().replace(',', '.')
+    if not valor:
+        return None
+    nota = float(valor)
+    if not NOTA_MINIMA <= nota <= NOTA_MAXIMA:
+        raise ValueError
+    return nota
+
+
+def ler_planilha_notas(arquivo, turma, materia):
+    """
+    Lê uma planilha CSV de notas de uma turma/matéria e compara com as notas atuais.
+
+    A planilha precisa de uma coluna 'Matrícula' e das colunas de nota que
+    se quer alterar (N1, N2, N3, Recuperação). Célula vazia mantém a nota atual.
+
+    Retorna (linhas, erros): 'linhas' traz, por aluno, as notas atuais, as novas
+    e só as que mudam ('alteradas'); 'erros' é uma lista de mensagens por linha da planilha.
+    """
+    alunos = {
+        matricula: (aluno_id, f"{nome} {sobrenome}".strip())
+        for matricula, aluno_id, nome, sobrenome in CustomUser.objects.filter(
+            tipo='aluno', alunoturma__turma=turma, alunoturma__ativo=True
+        ).values_list('numero_matricula', 'id', 'first_name', 'last_name')
+    }
+    notas_atuais = {
+        nota.aluno_id: nota
+        for nota in Nota.objects.filter(turma=turma, materia=materia)
+    }
+
+    linhas_texto = _decodificar_linhas(arquivo)
+    primeira_linha = next(linhas_texto, '')
+    delimitador = ';' if primeira_linha.count(';') >= primeira_linha.count(',') else ','
+
+    def todas_as_linhas():
+        yield primeira_linha
+        yield from linhas_texto
+
+    leitor = csv.reader(todas_as_linhas(), delimiter=delimitador)
+    cabecalho = [COLUNAS_PLANILHA.get(_normalizar(coluna)) for coluna in next(leitor, [])]
+
+    if 'matricula' not in cabecalho:
+        return [], ["A planilha precisa ter uma coluna 'Matrícula'."]
+    if not any(campo in cabecalho for campo in CAMPOS_NOTA):
+        return [], ["A planilha não tem nenhuma coluna de nota (N1, N2, N3 ou Recuperação)."]
+
+    linhas = []
+    erros = []
+    vistos = set()
+
+    for numero_linha, valores in enumerate(leitor, start=2):
+        if len(erros) >= MAX_ERROS_PLANILHA:
+            erros.append("Muitos erros; a leitura da planilha foi interrompida.")
+            break
+        if not any(v.strip() for v in valores):
+            continue
+
+        dados = dict(zip(cabecalho, valores))
+        matricula = (dados.get('matricula') or '').strip()
+
+        if matricula not in alunos:
+            erros.append(f"Linha {numero_linha}: matrícula '{matricula}' não pertence a esta turma.")
+            continue
+        if matricula in vistos:
+            erros.append(f"Linha {numero_linha}: matrícula '{matricula}' repetida na planilha.")
+            continue
+        vistos.add(matricula)
+
+        aluno_id, nome = alunos[matricula]
+        nota = notas_atuais.get(aluno_id)
+        atuais = {campo: getattr(nota, campo) if nota else None for campo in CAMPOS_NOTA}
+        novas = dict(atuais)
+
+        linha_valida = True
+        for campo in CAMPOS_NOTA:
+            if campo not in dados:
+                continue
+            try:
+                valor = _converter_nota(dados[campo])
+            except ValueError:
+                erros.append(
+                    f"Linha {numero_linha}: valor '{dados[campo]}' inválido "
+                    f"(use números de {NOTA_MINIMA} a {NOTA_MAXIMA})."
+                )
+                linha_valida = False
+                break
+            if valor is not None:
+                novas[campo] = valor
+
+        if linha_valida:
+            alteradas = {campo: valor for campo, valor in novas.items() if valor != atuais[campo]}
+            linhas.append({
+                'aluno_id': aluno_id,
+                'matricula': matricula,
+                'nome': nome,
+                'atuais': atuais,
+                'novas': novas,
+                'alteradas': alteradas,
+                'alterado': bool(alteradas),
+            })
+
+    return linhas, erros
+
+
+def aplicar_notas(turma, materia, alteracoes):
+    """
+    Grava as notas importadas num único upsert em massa, dentro de uma transação.
+
+    'alteracoes' é uma lista de {'aluno_id': ..., 'notas': {campo: valor},
+    'vistas': {campo: valor}}, só com os campos que a planilha muda; 'vistas' são
+    os valores desses campos na prévia. Se algum deles mudou desde então (outro
+    professor editou a nota), o aluno fica de fora em vez de ter a edição
+    sobrescrita. Os demais campos mantêm o valor atual do banco.
+    Como o bulk_create não chama Nota.save(), média e situação são calculadas aqui.
+
+    Retorna (gravadas, ids dos alunos que ficaram de fora).
+    """
+    with transaction.atomic():
+        notas_atuais = {
+            nota.aluno_id: nota
+            for nota in Nota.objects.select_for_update(of=('self',)).filter(turma=turma, materia=materia)
+        }
+
+        objetos = []
+        conflitos = []
+        for item in alteracoes:
+            atual = notas_atuais.get(item['aluno_id'])
+            if any(
+                (getattr(atual, campo) if atual else None) != valor
+                for campo, valor in item['vistas'].items()
+            ):
+                conflitos.append(item['aluno_id'])
+                continue
+            nota = Nota(aluno_id=item['aluno_id'], materia=materia, turma=turma)
+            for campo in CAMPOS_NOTA:
+                setattr(nota, campo, item['notas'].get(campo, getattr(atual, campo) if atual else None))
+            nota.media_final = nota.calcular_media()
+            nota.status_final = nota.calcular_status()
+            objetos.append(nota)
+
+        Nota.objects.bulk_create(
+            objetos,
+            update_conflicts=True,
+            unique_fields=['aluno', 'materia', 'turma'],
+            update_fields=CAMPOS_NOTA + ['media_final', 'status_final'],
+        )
+    return len(objetos), conflitos
+
+
+def provisionar_notas(matriculas, materias=None):
+    """
+    Cria, em massa, as linhas de Nota que faltam para as matrículas informadas.
+
+    'matriculas' é um queryset de AlunoTurma. Para cada matrícula, cada matéria
+    da grade do curso da turma (GradeMateria) ganha uma Nota vazia ('Pendente');
+    com 'materias' (ids), só essas matérias da grade.
+    Notas que já existem são ignoradas pelo banco (ignore_conflicts), então a
+    função pode ser chamada quantas vezes for preciso.
+    Retorna quantas notas foram enviadas ao banco (incluindo as já existentes).
+    """
+    grade_do_curso = GradeMateria.objects.filter(curso_id__in=matriculas.values('turma__curso_id'))
+    if materias is not None:
+        grade_do_curso = grade_do_curso.filter(materia_id__in=materias)
+    grade = {}
+    for curso_id, materia_id in grade_do_curso.values_list('curso_id', 'materia_id'):
+        grade.setdefault(curso_id, []).append(materia_id)
+
+    if not grade:
+        return 0
+
+    novas = (
+        Nota(aluno_id=aluno_id, turma_id=turma_id, materia_id=materia_id, status_final='Pendente')
+        for aluno_id, turma_id, curso_id in matriculas.values_list(
+            'aluno_id', 'turma_id', 'turma__curso_id'
+        ).iterator(chunk_size=TAMANHO_LOTE_PROVISIONAMENTO)
+        for materia_id in grade.get(curso_id, [])
+    )
+
+    total = 0
+    while True:
+        lote = list(itertools.islice(novas, TAMANHO_LOTE_PROVISIONAMENTO))
+        if not lote:
+            break
+        Nota.objects.bulk_create(lote, ignore_conflicts=True)
+        total += len(lote)
+    return total
@@ -0,0 +1,115 @@
+# core/notificacoes.py
+from collections import Counter
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import CustomUser, DocumentoEstagio, ItemCaixaEntrada
+
+# O que cada papel da caixa de entrada precisa fazer
+ACOES = {
+    'professor': "aguardando sua assinatura",
+    'direcao': "aguardando a assinatura da direção",
+    'servidor': "aguardando sua análise final",
+}
+DASHBOARDS = {
+    'professor': 'professor_dashboard',
+    'direcao': 'servidor_dashboard',
+    'servidor': 'servidor_dashboard',
+}
+
+
+def _chave(papel, destinatario_id, eixo):
+    # A quem a pendência pertence: o orientador, a direção toda ou os servidores do eixo
+    if papel == 'professor':
+        return papel, destinatario_id
+    if papel == 'servidor':
+        return papel, eixo
+    return papel, None
+
+
+def _chave_do_usuario(usuario):
+    # Mesma regra de caixa_entrada.itens_do_usuario: servidor sem eixo não tem caixa de entrada
+    if usuario.tipo == 'professor':
+        return 'professor', usuario.id
+    if usuario.tipo == 'servidor':
+        return ('servidor', usuario.eixo) if usuario.eixo else None
+    if usuario.tipo == 'direcao':
+        return 'direcao', None
+    return None
+
+
+def resumos_pendentes(lembrete=False):
+    """
+    [(usuario, resumo)] de quem tem documentos na caixa de entrada e ainda não
+    foi avisado deles (com 'lembrete', todos que têm pendências). O resumo traz
+    o total por tipo de documento e quantos chegaram desde o último e-mail.
+    Lê a caixa de entrada inteira numa consulta e os destinatários em outra.
+    """
+    pendencias = {}
+    for papel, destinatario_id, eixo, tipo, criado_em in ItemCaixaEntrada.objects.values_list(
+        'papel', 'destinatario_id', 'eixo', 'documento__tipo_documento', 'criado_em'
+    ):
+        pendencias.setdefault(_chave(papel, destinatario_id, eixo), []).append((tipo, criado_em))
+    if not pendencias:
+        return []
+
+    ativos = CustomUser.objects.filter(is_active=True).exclude(email='')
+    destinatarios = (
+        ativos.filter(tipo='professor', id__in=[chave for papel, chave in pendencias if papel == 'professor'])
+        | ativos.filter(tipo='servidor', eixo__in=[chave for papel, chave in pendencias if papel == 'servidor' and chave])
+        | ativos.filter(tipo='direcao')
+    )
+
+    tipos = dict(DocumentoEstagio.TIPO_DOCUMENTO_CHOICES)
+    resumos = []
+    for usuario in destinatarios:
+        chave_usuario = _chave_do_usuario(usuario)
+        if chave_usuario is None:
+            continue
+        papel = chave_usuario[0]
+        minhas = pendencias.get(chave_usuario, [])
+        novos = [
+            criado_em for _, criado_em in minhas
+            if usuario.resumo_enviado_em is None or criado_em > usuario.resumo_enviado_em
+        ]
+        if not minhas or not (novos or lembrete):
+            continue
+        por_tipo = Counter(tipos.get(tipo, tipo) for tipo, _ in minhas)
+        resumos.append((usuario, {
+            'total': len(minhas),
+            'novos': len(novos),
+            'por_tipo': sorted(por_tipo.items(), key=lambda item: (-item[1], item[0])),
+            'acao': ACOES[papel],
+            'url': settings.SITE_URL.rstrip('/') + reverse(DASHBOARDS[papel]),
+        }))
+    return resumos
+
+
+def enviar_resumos(lembrete=False, dry_run=False):
+    """
+    Um e-mail por usuário com o resumo das pendências, todos pela mesma conexão
+    do backend de e-mail. Só marca resumo_enviado_em depois do envio, para que
+    uma falha no servidor de e-mail não faça ninguém perder o aviso.
+    """
+    resumos = resumos_pendentes(lembrete=lembrete)
+    if dry_run or not resumos:
+        return len(resumos)
+
+    agora = timezone.now()
+    mensagens = [
+        EmailMessage(
+            subject=f"{resumo['total']} documento(s) de estágio {resumo['acao']}",
+            body=render_to_string('emails/resumo_pendencias.txt', {'usuario': usuario, **resumo}),
+            to=[usuario.email],
+        )
+        for usuario, resumo in resumos
+    ]
+    with get_connection() as conexao:
+        conexao.send_messages(mensagens)
+
+    CustomUser.objects.filter(id__in=[usuario.id for usuario, _ in resumos]).update(resumo_enviado_em=agora)
+    return len(mensagens)
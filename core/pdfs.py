@@ -0,0 +1,419 @@
+# core/pdfs.py
+"""
+Entrada dos PDFs enviados pelos alunos.
+
+- validar_pdf: roda na requisição do upload. Confere o cabeçalho e a estrutura,
+  o tamanho e o número de páginas (settings.PDF_*), só com a biblioteca padrão.
+- otimizar_pdf: roda no comando processar_pdfs, num pool de processos, fora da
+  requisição. Recomprime (e reduz, se passarem do limite) as imagens
+  escaneadas, que são quase todo o peso dos PDFs de celular e de scanner.
+
+O reescritor só trata PDFs com tabela xref clássica, sem object streams nem
+criptografia, que é o formato dos apps de digitalização e do Pillow. Os demais
+continuam como foram enviados, assim como os assinados digitalmente (gov.br,
+ICP-Brasil): reescrever o arquivo invalida a assinatura, que cobre os bytes.
+"""
+import io
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .models import DocumentoEstagio, ProcessamentoPdf
+
+# Campos de DocumentoEstagio que recebem PDF
+CAMPOS_PDF = ['arquivo_anexo', 'pdf_supervisor_assinado']
+
+# Dicionário de assinatura (/Type /Sig, com o /ByteRange assinado) ou o
+# formulário marcado como assinado (/SigFlags no /AcroForm)
+_ASSINATURA = re.compile(rb'/ByteRange|/SigFlags|/Type\s*/Sig\b')
+
+_CABECALHO_OBJETO = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+_PAGINA = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+_INTEIRO_INDIRETO = re.compile(rb'(\d+)\s+(\d+)\s+obj\s*(\d+)\s*endobj')
+_ESPACOS = b' \t\r\n\x0c\x00'
+
+
+class PdfInvalido(Exception):
+    """ Mensagem pronta para o aluno. """
+
+
+# === LEITURA ===
+
+def _fim_do_dicionario(dados, inicio):
+    """ Posição logo depois do '>>' que fecha o dicionário iniciado em 'inicio'. """
+    profundidade = 0
+    i = inicio
+    tamanho = len(dados)
+    while i < tamanho:
+        if dados.startswith(b'<<', i):
+            profundidade += 1
+            i += 2
+        elif dados.startswith(b'>>', i):
+            profundidade -= 1
+            i += 2
+            if profundidade == 0:
+                return i
+        elif dados[i:i + 1] == b'(':
+            # String literal: parênteses aninhados e escapes
+            nivel = 0
+            while i < tamanho:
+                c = dados[i:i + 1]
+                if c == b'\\':
+                    i += 2
+                    continue
+                if c == b'(':
+                    nivel += 1
+                elif c == b')':
+                    nivel -= 1
+                    if nivel == 0:
+                        break
+                i += 1
+            i += 1
+        elif dados[i:i + 1] == b'<':
+            i = dados.index(b'>', i) + 1
+        else:
+            i += 1
+    raise ValueError("dicionário sem fim")
+
+
+def _ler_objetos(dados):
+    """
+    {numero: (geracao, dicionario_ou_corpo, stream_ou_None)}, na ordem do arquivo;
+    com atualizações incrementais, a última definição de cada objeto vale.
+    """
+    inteiros = {int(m.group(1)): int(m.group(3)) for m in _INTEIRO_INDIRETO.finditer(dados)}
+    objetos = {}
+    posicao = 0
+    while True:
+        cabecalho = _CABECALHO_OBJETO.search(dados, posicao)
+        if cabecalho is None:
+            break
+        numero, geracao = int(cabecalho.group(1)), int(cabecalho.group(2))
+        i = cabecalho.end()
+        while dados[i:i + 1] and dados[i:i + 1] in _ESPACOS:
+            i += 1
+
+        if dados.startswith(b'<<', i):
+            fim = _fim_do_dicionario(dados, i)
+            dicionario = dados[i:fim]
+            j = fim
+            while dados[j:j + 1] and dados[j:j + 1] in _ESPACOS:
+                j += 1
+            if dados.startswith(b'stream', j):
+                j += len(b'stream')
+                j += 2 if dados.startswith(b'\r\n', j) else 1
+                comprimento = re.search(rb'/Length\s+(\d+)(?:\s+(\d+)\s+R)?', dicionario)
+                if comprimento is None:
+                    raise ValueError("stream sem /Length")
+                if comprimento.group(2) is not None:
+                    tamanho_stream = inteiros[int(comprimento.group(1))]
+                else:
+                    tamanho_stream = int(comprimento.group(1))
+                stream = dados[j:j + tamanho_stream]
+                fim_stream = dados.index(b'endstream', j + tamanho_stream)
+                posicao = dados.index(b'endobj', fim_stream) + len(b'endobj')
+                objetos[numero] = (geracao, dicionario, stream)
+                continue
+            posicao = dados.index(b'endobj', fim) + len(b'endobj')
+            objetos[numero] = (geracao, dicionario, None)
+        else:
+            fim = dados.index(b'endobj', i)
+            objetos[numero] = (geracao, dados[i:fim].strip(), None)
+            posicao = fim + len(b'endobj')
+    return objetos
+
+
+def _objetos_comprimidos(dicionario, stream):
+    """ (numero, corpo) dos objetos guardados num object stream; nada se não der para ler. """
+    primeiro = _inteiro(dicionario, b'First')
+    if primeiro is None or b'/FlateDecode' not in dicionario:
+        return []
+    try:
+        conteudo = zlib.decompress(stream)
+        numeros = [int(n) for n in conteudo[:primeiro].split()]
+    except (zlib.error, ValueError):
+        return []
+    pares = list(zip(numeros[::2], numeros[1::2]))
+    limites = [deslocamento for _, deslocamento in pares[1:]] + [len(conteudo) - primeiro]
+    return [
+        (numero, conteudo[primeiro + deslocamento:primeiro + fim])
+        for (numero, deslocamento), fim in zip(pares, limites)
+    ]
+
+
+def _contar_paginas(objetos):
+    """
+    Objetos /Type /Page, inclusive os guardados dentro de object streams. Conta
+    sobre os objetos já sem repetição (a última definição de cada número vale),
+    para que as páginas regravadas numa atualização incremental não contem duas
+    vezes; uma definição direta prevalece sobre a comprimida.
+    """
+    corpos = {}
+    for _, dicionario, stream in objetos.values():
+        if stream is not None and b'/ObjStm' in dicionario:
+            corpos.update(_objetos_comprimidos(dicionario, stream))
+    for numero, (_, dicionario, stream) in objetos.items():
+        corpos[numero] = dicionario if stream is None else b''
+    return sum(1 for corpo in corpos.values() if _PAGINA.search(corpo))
+
+
+def contar_paginas(dados):
+    """ Páginas do PDF (bytes), ou None se a estrutura não puder ser lida. """
+    try:
+        return _contar_paginas(_ler_objetos(dados))
+    except (ValueError, KeyError):
+        return None
+
+
+def validar_pdf(arquivo):
+    """
+    Confere o PDF enviado (UploadedFile, File ou caminho) e devolve o número de
+    páginas. Levanta PdfInvalido com a mensagem para o aluno.
+    """
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as entrada:
+            dados = entrada.read(settings.PDF_TAMANHO_MAXIMO + 1)
+    else:
+        arquivo.seek(0)
+        dados = arquivo.read(settings.PDF_TAMANHO_MAXIMO + 1)
+        arquivo.seek(0)
+
+    if len(dados) > settings.PDF_TAMANHO_MAXIMO:
+        raise PdfInvalido(f"O PDF deve ter até {settings.PDF_TAMANHO_MAXIMO // (1024 * 1024)} MB.")
+    # O cabeçalho pode vir depois de algum lixo, mas dentro do primeiro 1 KB
+    if b'%PDF-' not in dados[:1024]:
+        raise PdfInvalido("O arquivo enviado não é um PDF.")
+    if b'%%EOF' not in dados[-2048:] or b'startxref' not in dados[-4096:]:
+        raise PdfInvalido("O PDF está incompleto ou corrompido. Gere o arquivo novamente.")
+    if b'/Encrypt' in dados:
+        raise PdfInvalido("O PDF está protegido por senha. Envie uma versão sem proteção.")
+
+    try:
+        objetos = _ler_objetos(dados)
+    except (ValueError, KeyError):
+        raise PdfInvalido("O PDF está corrompido. Gere o arquivo novamente.")
+    paginas = _contar_paginas(objetos)
+    if not paginas:
+        raise PdfInvalido("O PDF não tem nenhuma página.")
+    if paginas > settings.PDF_PAGINAS_MAXIMO:
+        raise PdfInvalido(f"O PDF deve ter no máximo {settings.PDF_PAGINAS_MAXIMO} páginas.")
+    return paginas
+
+
+def tem_assinatura(dados):
+    """ Se o PDF tem assinatura digital, que qualquer regravação do arquivo invalidaria. """
+    return _ASSINATURA.search(dados) is not None
+
+
+# === OTIMIZAÇÃO (pool de processos) ===
+
+def _inteiro(dicionario, chave):
+    valor = re.search(rb'/' + chave + rb'\s+(\d+)(?!\s+\d+\s+R)', dicionario)
+    return int(valor.group(1)) if valor else None
+
+
+def _recomprimir_imagem(dicionario, stream, lado_maximo, qualidade):
+    """ (dicionario, stream) novos para uma imagem JPEG ou RGB/cinza sem compressão com perdas; None se não vale a pena. """
+    from PIL import Image
+
+    if b'/ImageMask true' in dicionario or b'/Decode' in dicionario.replace(b'/DecodeParms', b''):
+        return None
+    largura, altura = _inteiro(dicionario, b'Width'), _inteiro(dicionario, b'Height')
+    if not largura or not altura:
+        return None
+
+    filtro = re.search(rb'/Filter\s*(?:/(\w+)|\[\s*/(\w+)\s*\])', dicionario)
+    filtro = (filtro.group(1) or filtro.group(2)) if filtro else None
+    if filtro == b'DCTDecode':
+        if b'/DecodeParms' in dicionario:
+            return None
+        imagem = Image.open(io.BytesIO(stream))
+        if imagem.mode not in ('L', 'RGB'):
+            return None  # JPEG CMYK (invertido em alguns PDFs) fica como está
+    elif filtro == b'FlateDecode':
+        espacos = {b'/DeviceRGB': ('RGB', 3), b'/DeviceGray': ('L', 1)}
+        cor = re.search(rb'/ColorSpace\s*(/DeviceRGB|/DeviceGray)', dicionario)
+        if cor is None or b'/DecodeParms' in dicionario or _inteiro(dicionario, b'BitsPerComponent') != 8:
+            return None
+        modo, componentes = espacos[cor.group(1)]
+        bruto = zlib.decompress(stream)
+        if len(bruto) != largura * altura * componentes:
+            return None
+        imagem = Image.frombytes(modo, (largura, altura), bruto)
+    else:
+        return None
+
+    reduzida = max(imagem.size) > lado_maximo
+    if reduzida:
+        imagem.thumbnail((lado_maximo, lado_maximo), Image.LANCZOS)
+    saida = io.BytesIO()
+    imagem.save(saida, 'JPEG', quality=qualidade, optimize=True)
+    novo = saida.getvalue()
+    if not reduzida and len(novo) >= len(stream) * 0.9:
+        return None
+
+    novo_dicionario = re.sub(rb'/Width\s+\d+', b'/Width %d' % imagem.size[0], dicionario)
+    novo_dicionario = re.sub(rb'/Height\s+\d+', b'/Height %d' % imagem.size[1], novo_dicionario)
+    novo_dicionario = re.sub(rb'/Filter\s*(?:/\w+|\[[^\]]*\])', b'/Filter /DCTDecode', novo_dicionario)
+    return novo_dicionario, novo
+
+
+def _escrever_pdf(versao, objetos, trailer):
+    saida = io.BytesIO()
+    saida.write(versao + b'\n%\xe2\xe3\xcf\xd3\n')
+    posicoes = {}
+    for numero in sorted(objetos):
+        geracao, corpo, stream = objetos[numero]
+        posicoes[numero] = (saida.tell(), geracao)
+        saida.write(b'%d %d obj\n' % (numero, geracao))
+        if stream is None:
+            saida.write(corpo)
+        else:
+            corpo = re.sub(rb'/Length\s+\d+(?:\s+\d+\s+R)?', b'/Length %d' % len(stream), corpo)
+            saida.write(corpo + b'\nstream\n' + stream + b'\nendstream')
+        saida.write(b'\nendobj\n')
+
+    inicio_xref = saida.tell()
+    total = max(objetos) + 1
+    saida.write(b'xref\n0 %d\n0000000000 65535 f \n' % total)
+    for numero in range(1, total):
+        if numero in posicoes:
+            posicao, geracao = posicoes[numero]
+            saida.write(b'%010d %05d n \n' % (posicao, geracao))
+        else:
+            saida.write(b'0000000000 65535 f \n')
+    trailer = re.sub(rb'/(Prev|XRefStm)\s+\d+', b'', trailer)
+    trailer = re.sub(rb'/Size\s+\d+', b'/Size %d' % total, trailer)
+    saida.write(b'trailer\n' + trailer + b'\nstartxref\n%d\n%%%%EOF\n' % inicio_xref)
+    return saida.getvalue()
+
+
+def otimizar_pdf(dados, lado_maximo, qualidade):
+    """ Os bytes do PDF com as imagens recomprimidas, ou None se não houver ganho (ou suporte). """
+    if b'/ObjStm' in dados or b'/XRef' in dados or b'/Encrypt' in dados or tem_assinatura(dados):
+        return None
+    versao = re.match(rb'.*?(%PDF-\d\.\d)', dados[:1024], re.S)
+    inicio_trailer = dados.rfind(b'trailer')
+    if versao is None or inicio_trailer < 0:
+        return None
+
+    objetos = _ler_objetos(dados)
+    trailer = dados[dados.index(b'<<', inicio_trailer):_fim_do_dicionario(dados, dados.index(b'<<', inicio_trailer))]
+    mudou = False
+    for numero, (geracao, dicionario, stream) in list(objetos.items()):
+        if stream is None or not re.search(rb'/Subtype\s*/Image', dicionario):
+            continue
+        try:
+            nova = _recomprimir_imagem(dicionario, stream, lado_maximo, qualidade)
+        except (OSError, ValueError, zlib.error):
+            nova = None  # imagem que o Pillow não lê: fica como está
+        if nova is not None:
+            objetos[numero] = (geracao, nova[0], nova[1])
+            mudou = True
+    if not mudou:
+        return None
+
+    novo = _escrever_pdf(versao.group(1), objetos, trailer)
+    return novo if len(novo) < len(dados) * 0.95 else None
+
+
+def otimizar_arquivo(caminho, lado_maximo, qualidade):
+    """
+    Executada nos processos do pool (sem banco): grava a versão otimizada ao
+    lado do original e devolve (tamanho_original, caminho_novo ou None).
+    """
+    with open(caminho, 'rb') as entrada:
+        dados = entrada.read()
+    novo = otimizar_pdf(dados, lado_maximo, qualidade)
+    if novo is None:
+        return len(dados), None
+    descritor, caminho_novo = tempfile.mkstemp(suffix='.otimizado', dir=os.path.dirname(caminho))
+    with os.fdopen(descritor, 'wb') as saida:
+        saida.write(novo)
+    # O mkstemp cria com 0600; o os.replace levaria essa permissão para o lugar do original
+    shutil.copymode(caminho, caminho_novo)
+    return len(dados), caminho_novo
+
+
+# === FILA ===
+
+def enfileirar_pdf(documento, campo):
+    """
+    Depois do save do upload: o PDF entra na fila do comando processar_pdfs.
+    PDFs assinados (marcados nos metadados gravados pelo save) ficam de fora.
+    """
+    arquivo = getattr(documento, campo)
+    if arquivo and not ((documento.metadados_arquivos or {}).get(campo) or {}).get('assinado'):
+        # Um envio novo substitui o que ainda esperava na fila para o mesmo campo
+        ProcessamentoPdf.objects.filter(documento=documento, campo=campo, status='PENDENTE').delete()
+        ProcessamentoPdf.objects.create(documento=documento, campo=campo, arquivo=arquivo.name)
+
+
+def processar_pendentes(workers=None, limite=100):
+    """
+    Otimiza os PDFs pendentes num pool de processos. O original só é trocado
+    (os.replace, no mesmo diretório) se o documento ainda aponta para ele e se a
+    versão nova passa na validação. Devolve (processados, bytes_economizados).
+    """
+    from .arquivos import regravar_metadados  # core.arquivos usa contar_paginas deste módulo
+    pendentes = list(ProcessamentoPdf.objects.filter(status='PENDENTE').order_by('criado_em')[:limite])
+    if not pendentes:
+        return 0, 0
+
+    workers = workers or settings.PDF_WORKERS
+    economia = 0
+    # Os processos filhos não usam o banco; não herdam conexões abertas
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {}
+        for processamento in pendentes:
+            caminho = os.path.join(settings.MEDIA_ROOT, processamento.arquivo)
+            if not os.path.isfile(caminho):
+                _finalizar(processamento, 'FALHOU', erro="Arquivo não encontrado.")
+                continue
+            futuro = pool.submit(otimizar_arquivo, caminho, settings.PDF_IMAGEM_LADO_MAXIMO, settings.PDF_QUALIDADE_JPEG)
+            futuros[futuro] = (processamento, caminho)
+
+        for futuro in as_completed(futuros):
+            processamento, caminho = futuros[futuro]
+            try:
+                tamanho_original, caminho_novo = futuro.result()
+            except Exception as erro:
+                _finalizar(processamento, 'FALHOU', erro=str(erro)[:500])
+                continue
+
+            tamanho_final = tamanho_original
+            if caminho_novo is not None:
+                atual = DocumentoEstagio.objects.filter(id=processamento.documento_id).values_list(
+                    processamento.campo, flat=True
+                ).first()
+                try:
+                    if atual != processamento.arquivo:
+                        raise PdfInvalido("O arquivo foi substituído antes do processamento.")
+                    validar_pdf(caminho_novo)
+                except PdfInvalido as erro:
+                    os.remove(caminho_novo)
+                    _finalizar(processamento, 'FALHOU', tamanho_original, tamanho_original, erro=str(erro))
+                    continue
+                tamanho_final = os.path.getsize(caminho_novo)
+                os.replace(caminho_novo, caminho)
+                regravar_metadados(processamento.documento_id, processamento.campo)
+                economia += tamanho_original - tamanho_final
+            _finalizar(processamento, 'CONCLUIDO', tamanho_original, tamanho_final)
+    return len(pendentes), economia
+
+
+def _finalizar(processamento, status, tamanho_original=None, tamanho_final=None, erro=''):
+    processamento.status = status
+    processamento.tamanho_original = tamanho_original
+    processamento.tamanho_final = tamanho_final
+    processamento.erro = erro
+    processamento.processado_em = timezone.now()
+    processamento.save(update_fields=['status', 'tamanho_original', 'tamanho_final', 'erro', 'processado_em'])
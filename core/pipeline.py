@@ -0,0 +1,153 @@
+# core/pipeline.py
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+
+from .eventos import incrementar_resumo
+from .models import AlunoTurma, Estagio, DocumentoEstagio, ResumoPipeline
+
+# tipo_documento usado nos contadores de dossiê (status_geral)
+DOSSIE = ''
+
+
+def _turma_atual():
+    # Mesma regra do eixo (core.eixos): a matrícula ativa ou, sem ela, a mais recente
+    return AlunoTurma.objects.filter(
+        aluno=OuterRef('aluno_id')
+    ).order_by('-ativo', '-id').values('turma_id')[:1]
+
+
+def aplicar_deltas(deltas):
+    """ Soma nos contadores cada delta {(turma_id, tipo_documento, status): n} diferente de zero. """
+    for (turma_id, tipo_documento, status), n in deltas.items():
+        if n:
+            incrementar_resumo(
+                ResumoPipeline,
+                {'turma_id': turma_id, 'tipo_documento': tipo_documento, 'status': status},
+                total=n,
+            )
+
+
+def registrar_mudanca_estagio(estagio, status_anterior):
+    """ Dossiê criado ou com novo status_geral (Estagio.save). """
+    if status_anterior == estagio.status_geral:
+        return
+    deltas = Counter()
+    if status_anterior is not None:
+        deltas[(estagio.turma_resumo_id, DOSSIE, status_anterior)] -= 1
+    deltas[(estagio.turma_resumo_id, DOSSIE, estagio.status_geral)] += 1
+    aplicar_deltas(deltas)
+
+
+def registrar_mudanca_documento(documento, status_anterior):
+    """ Documento criado ou com novo status (DocumentoEstagio.save). """
+    turma_id = Estagio.objects.filter(id=documento.estagio_id).values_list('turma_resumo_id', flat=True).first()
+    deltas = Counter()
+    if status_anterior is not None:
+        deltas[(turma_id, documento.tipo_documento, status_anterior)] -= 1
+    deltas[(turma_id, documento.tipo_documento, documento.status)] += 1
+    aplicar_deltas(deltas)
+
+
+def contar_documentos_criados(documentos):
+    """ Documentos gravados com bulk_create, que não passam pelo save. """
+    turmas = dict(
+        Estagio.objects.filter(id__in={d.estagio_id for d in documentos}).values_list('id', 'turma_resumo_id')
+    )
+    aplicar_deltas(Counter(
+        (turmas.get(documento.estagio_id), documento.tipo_documento, documento.status)
+        for documento in documentos
+    ))
+
+
+def descontar_exclusao(instancia):
+    """ Dossiê ou documento apagado: sai do contador em que estava. """
+    if isinstance(instancia, Estagio):
+        aplicar_deltas({(instancia.turma_resumo_id, DOSSIE, instancia.status_geral): -1})
+    else:
+        turma_id = Estagio.objects.filter(id=instancia.estagio_id).values_list('turma_resumo_id', flat=True).first()
+        aplicar_deltas({(turma_id, instancia.tipo_documento, instancia.status): -1})
+
+
+def mover_dossies_de_status(estagios, status_novo):
+    """
+    Para UPDATEs em lote de status_geral (core.dossies): ajusta os contadores dos
+    dossiês do queryset antes do UPDATE, com uma consulta agrupada sobre eles.
+    """
+    deltas = Counter()
+    for turma_id, status, n in estagios.order_by().values_list('turma_resumo_id', 'status_geral').annotate(n=Count('id')):
+        deltas[(turma_id, DOSSIE, status)] -= n
+        deltas[(turma_id, DOSSIE, status_novo)] += n
+    aplicar_deltas(deltas)
+
+
+def reposicionar_no_pipeline(alunos_ids):
+    """
+    A matrícula atual dos alunos mudou (promoção, troca de turma): os dossiês que
+    estavam contados em outra turma levam seus contadores (do dossiê e dos
+    documentos) para a turma nova.
+    """
+    movidos = {
+        estagio_id: (turma_antiga, turma_nova, status)
+        for estagio_id, turma_antiga, turma_nova, status in Estagio.objects.filter(
+            aluno_id__in=alunos_ids
+        ).annotate(turma_nova=Subquery(_turma_atual())).values_list(
+            'id', 'turma_resumo_id', 'turma_nova', 'status_geral'
+        )
+        if turma_antiga != turma_nova
+    }
+    if not movidos:
+        return
+
+    deltas = Counter()
+    for turma_antiga, turma_nova, status in movidos.values():
+        deltas[(turma_antiga, DOSSIE, status)] -= 1
+        deltas[(turma_nova, DOSSIE, status)] += 1
+    for estagio_id, tipo_documento, status, n in DocumentoEstagio.objects.filter(
+        estagio_id__in=movidos
+    ).order_by().values_list('estagio_id', 'tipo_documento', 'status').annotate(n=Count('id')):
+        turma_antiga, turma_nova, _ = movidos[estagio_id]
+        deltas[(turma_antiga, tipo_documento, status)] -= n
+        deltas[(turma_nova, tipo_documento, status)] += n
+
+    aplicar_deltas(deltas)
+    Estagio.objects.filter(id__in=movidos).update(turma_resumo=Subquery(_turma_atual()))
+
+
+def mover_para_sem_turma(turma_id):
+    """
+    Turma apagada: o SET_NULL levaria as linhas dela para turma NULL, onde já pode
+    haver a linha "Sem turma" de mesma chave. Os totais são somados nela antes.
+    """
+    linhas = ResumoPipeline.objects.filter(turma_id=turma_id)
+    deltas = Counter({
+        (None, tipo_documento, status): total
+        for tipo_documento, status, total in linhas.values_list('tipo_documento', 'status', 'total')
+    })
+    linhas.delete()
+    aplicar_deltas(deltas)
+
+
+def recalcular_pipeline():
+    """
+    Refaz todos os contadores a partir das tabelas (comando recalcular_pipeline).
+    É a única rotina que varre dossiês e documentos; o dia a dia só aplica deltas.
+    """
+    with transaction.atomic():
+        Estagio.objects.update(turma_resumo=Subquery(_turma_atual()))
+        ResumoPipeline.objects.all().delete()
+        linhas = [
+            ResumoPipeline(turma_id=turma_id, tipo_documento=DOSSIE, status=status, total=n)
+            for turma_id, status, n in Estagio.objects.order_by().values_list(
+                'turma_resumo_id', 'status_geral'
+            ).annotate(n=Count('id'))
+        ]
+        linhas += [
+            ResumoPipeline(turma_id=turma_id, tipo_documento=tipo_documento, status=status, total=n)
+            for turma_id, tipo_documento, status, n in DocumentoEstagio.objects.order_by().values_list(
+                'estagio__turma_resumo_id', 'tipo_documento', 'status'
+            ).annotate(n=Count('id'))
+        ]
+        ResumoPipeline.objects.bulk_create(linhas)
+    return len(linhas)
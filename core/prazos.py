@@ -0,0 +1,65 @@
+# core/prazos.py
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import DocumentoEstagio
+
+# Quem responde por cada etapa do fluxo
+RESPONSAVEIS = {
+    'AGUARDANDO_ASSINATURA_PROF': 'orientador',
+    'AGUARDANDO_ASSINATURA_DIR': 'direcao',
+    'AGUARDANDO_VERIFICACAO_ADMIN': 'eixo',
+}
+
+
+def prazos():
+    """ {status: timedelta}, conforme settings.PRAZOS_DOCUMENTOS (em dias). """
+    return {
+        status: datetime.timedelta(days=dias)
+        for status, dias in getattr(settings, 'PRAZOS_DOCUMENTOS', {}).items()
+        if status in RESPONSAVEIS
+    }
+
+
+def documentos_atrasados(eixo=None, agora=None):
+    """
+    Documentos parados além do prazo, do mais antigo para o mais recente, cada um
+    com 'dias_parado'. Uma consulta por status, sobre o índice (status, status_desde):
+    o banco lê só a faixa já vencida, sem ordenar a tabela inteira.
+    """
+    agora = agora or timezone.now()
+    documentos = []
+    for status, prazo in prazos().items():
+        atrasados = DocumentoEstagio.objects.select_related(
+            'estagio__aluno', 'estagio__orientador'
+        ).filter(status=status, status_desde__lt=agora - prazo).order_by('status_desde')
+        if eixo:
+            atrasados = atrasados.filter(estagio__eixo=eixo)
+        for documento in atrasados:
+            documento.dias_parado = (agora - documento.status_desde).days
+            documentos.append(documento)
+    return documentos
+
+
+def responsavel(documento):
+    """ (papel, chave, nome) de quem deve agir sobre o documento atrasado. """
+    papel = RESPONSAVEIS[documento.status]
+    estagio = documento.estagio
+    if papel == 'orientador':
+        if estagio.orientador is None:
+            return papel, None, "Sem orientador"
+        return papel, estagio.orientador_id, estagio.orientador.get_full_name() or estagio.orientador.username
+    if papel == 'direcao':
+        return papel, None, "Direção"
+    return papel, estagio.eixo, f"Servidores - {estagio.get_eixo_display() or 'Sem eixo'}"
+
+
+def agrupar_por_responsavel(documentos):
+    """ [(papel, nome, [documentos])], os grupos com o documento mais antigo primeiro. """
+    grupos = {}
+    for documento in sorted(documentos, key=lambda d: d.status_desde):
+        papel, chave, nome = responsavel(documento)
+        grupos.setdefault((papel, chave), (papel, nome, []))[2].append(documento)
+    return list(grupos.values())
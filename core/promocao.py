@@ -0,0 +1,201 @@
+# core/promocao.py
+import datetime
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import AlunoTurma, GradeMateria, Nota, Turma
+from .notas import provisionar_notas
+from .diretorio import invalidar_acesso_professores
+from .eixos import sincronizar_eixo_alunos
+
+PROMOVIDO = 'PROMOVIDO'
+CONCLUINTE = 'CONCLUINTE'
+RETIDO = 'RETIDO'
+NOTAS_PENDENTES = 'NOTAS_PENDENTES'
+SEM_DESTINO = 'SEM_DESTINO'
+
+
+
+class PromocaoDesatualizada(Exception):
+    """ O plano não corresponde mais às matrículas (já aplicado ou alterado depois da prévia). """
+
+
+SITUACOES = {
+    PROMOVIDO: 'Promovido',
+    CONCLUINTE: 'Concluinte (encerra a matrícula)',
+    RETIDO: 'Retido (permanece na turma)',
+    NOTAS_PENDENTES: 'Notas pendentes (não será movido)',
+    SEM_DESTINO: 'Sem turma seguinte cadastrada (não será movido)',
+}
+
+
+def proximo_ano_modulo():
+    """
+    Mapa ano/módulo -> seguinte, na ordem de Turma.ANO_MODULO_CHOICES.
+    Anos só avançam para anos e módulos para módulos (3º ANO não vira I MÓDULO).
+    """
+    valores = [valor for valor, _ in Turma.ANO_MODULO_CHOICES]
+    return {
+        atual: seguinte
+        for atual, seguinte in zip(valores, valores[1:])
+        if atual.split()[-1] == seguinte.split()[-1]
+    }
+
+
+def sugerir_ano_letivo(hoje=None):
+    """ A promoção roda no fim do ano, então o próximo ano letivo começa no 1º semestre seguinte. """
+    hoje = hoje or datetime.date.today()
+    ano = hoje.year + 1 if hoje.month > 6 else hoje.year
+    return f"{ano}.1"
+
+
+def planejar_promocao(curso=None):
+    """
+    Monta a prévia da promoção de todas as matrículas ativas (ou só as de um curso).
+
+    Usa quatro consultas: turmas, matrículas ativas, o tamanho da grade de cada
+    curso e o resumo de Nota.status_final por aluno/turma. Nada é gravado aqui.
+    Retorna uma lista de dicionários, um por matrícula, com a situação e a turma de destino.
+    """
+    seguinte = proximo_ano_modulo()
+
+    turmas = Turma.objects.select_related('curso')
+    if curso:
+        turmas = turmas.filter(curso=curso)
+    turmas = list(turmas)
+
+    por_chave = {(t.curso_id, t.ano_modulo, t.turno, t.turma, t.modalidade): t for t in turmas}
+    por_etapa = {}
+    for t in turmas:
+        por_etapa.setdefault((t.curso_id, t.ano_modulo), []).append(t)
+
+    def turma_seguinte(origem):
+        proximo = seguinte.get(origem.ano_modulo)
+        if not proximo:
+            return CONCLUINTE, None
+        if (origem.curso_id, proximo) not in por_etapa:
+            # A etapa seguinte existe, só falta cadastrar a turma: concluir aqui encerraria a matrícula
+            return SEM_DESTINO, None
+        destino = por_chave.get((origem.curso_id, proximo, origem.turno, origem.turma, origem.modalidade))
+        if destino:
+            return PROMOVIDO, destino
+        # Sem turma "gêmea" (ex: M2 só existe no 1º ano): aceita se houver uma única opção no turno
+        candidatas = [
+            t for t in por_etapa[(origem.curso_id, proximo)]
+            if t.turno == origem.turno and t.modalidade == origem.modalidade
+        ]
+        if len(candidatas) == 1:
+            return PROMOVIDO, candidatas[0]
+        return SEM_DESTINO, None
+
+    matriculas = AlunoTurma.objects.filter(ativo=True, aluno__tipo='aluno').select_related('aluno')
+    if curso:
+        matriculas = matriculas.filter(turma__curso=curso)
+
+    materias_por_curso = dict(
+        GradeMateria.objects.filter(curso_id__in={t.curso_id for t in turmas})
+        .values_list('curso_id').annotate(total=Count('id')).order_by()
+    )
+    resumo_notas = {
+        (linha['aluno_id'], linha['turma_id']): linha
+        for linha in Nota.objects.filter(turma__in=turmas).values('aluno_id', 'turma_id').annotate(
+            reprovadas=Count('id', filter=Q(status_final__startswith='Reprovado')),
+            pendentes=Count('id', filter=Q(status_final__in=['', 'Pendente'])),
+            total=Count('id'),
+        )
+    }
+
+    turmas_por_id = {t.id: t for t in turmas}
+    plano = []
+    for matricula in matriculas.order_by('turma__curso__nome', 'turma__ano_modulo', 'aluno__first_name', 'aluno__last_name'):
+        origem = turmas_por_id[matricula.turma_id]
+        notas = resumo_notas.get((matricula.aluno_id, matricula.turma_id), {})
+        # Sem as notas de toda a grade (nenhuma Nota ou matérias faltando), nada foi avaliado
+        incompleto = notas.get('total', 0) < materias_por_curso.get(origem.curso_id, 0)
+
+        if notas.get('reprovadas'):
+            situacao, destino = RETIDO, None
+        elif notas.get('pendentes') or incompleto:
+            situacao, destino = NOTAS_PENDENTES, None
+        else:
+            situacao, destino = turma_seguinte(origem)
+
+        plano.append({
+            'matricula': matricula,
+            'aluno': matricula.aluno,
+            'origem': origem,
+            'destino': destino,
+            'situacao': situacao,
+            'situacao_display': SITUACOES[situacao],
+        })
+    return plano
+
+
+def assinatura_do_plano(plano, ano_letivo):
+    """
+    Resumo do plano (matrícula, situação e destino de cada item) para amarrar a
+    aplicação à prévia que o admin viu: depois de aplicada, as matrículas
+    encerradas saem do plano e a assinatura deixa de bater.
+    """
+    itens = sorted(
+        (item['matricula'].id, item['situacao'], item['destino'].id if item['destino'] else 0)
+        for item in plano
+    )
+    return hashlib.sha256(repr((ano_letivo, itens)).encode()).hexdigest()
+
+
+def aplicar_promocao(plano, ano_letivo):
+    """
+    Aplica a promoção numa única transação, com operações em massa.
+
+    As matrículas antigas de promovidos e concluintes não são apagadas: ficam
+    inativas, guardando o ano letivo em que foram cursadas. Os promovidos ganham
+    uma matrícula nova e ativa na turma seguinte, já com as notas da grade.
+
+    Se alguma das matrículas a encerrar já não estiver ativa (envio repetido ou
+    outra aplicação em paralelo), nada é gravado e sobe PromocaoDesatualizada.
+    """
+    promovidos = [item for item in plano if item['situacao'] == PROMOVIDO]
+    encerradas = [item['matricula'].id for item in plano if item['situacao'] in (PROMOVIDO, CONCLUINTE)]
+
+    with transaction.atomic():
+        if AlunoTurma.objects.filter(id__in=encerradas, ativo=True).update(ativo=False) != len(encerradas):
+            raise PromocaoDesatualizada
+
+        # Aluno que já passou por aquela turma antes: reaproveita a matrícula antiga
+        pares = {(item['aluno'].id, item['destino'].id) for item in promovidos}
+        existentes = {
+            (m.aluno_id, m.turma_id): m
+            for m in AlunoTurma.objects.filter(
+                aluno_id__in=[a for a, _ in pares], turma_id__in=[t for _, t in pares]
+            )
+            if (m.aluno_id, m.turma_id) in pares
+        }
+
+        reativadas = []
+        novas = []
+        for aluno_id, turma_id in pares:
+            antiga = existentes.get((aluno_id, turma_id))
+            if antiga:
+                antiga.ativo = True
+                antiga.ano_letivo = ano_letivo
+                reativadas.append(antiga)
+            else:
+                novas.append(AlunoTurma(aluno_id=aluno_id, turma_id=turma_id, ano_letivo=ano_letivo, ativo=True))
+
+        AlunoTurma.objects.bulk_update(reativadas, ['ativo', 'ano_letivo'])
+        AlunoTurma.objects.bulk_create(novas)
+
+        # bulk_create não dispara o post_save que provisiona as notas
+        provisionar_notas(AlunoTurma.objects.filter(
+            ativo=True, aluno_id__in=[a for a, _ in pares]
+        ))
+
+        # As operações em massa não disparam os sinais de AlunoTurma
+        sincronizar_eixo_alunos([item['aluno'].id for item in plano if item['situacao'] in (PROMOVIDO, CONCLUINTE)])
+
+    invalidar_acesso_professores()
+
+    return len(promovidos), len(encerradas) - len(promovidos)
@@ -0,0 +1,147 @@
+# core/tempo_real.py
+import asyncio
+import threading
+
+from django.db.models import Max
+
+from .caixa_entrada import itens_do_usuario
+from .models import DocumentoEstagio, Estagio, EventoDocumento
+
+# Conexões SSE abertas neste processo, por chave de interesse
+_assinaturas = {}
+_trava = threading.Lock()
+
+# Eventos lidos por vez em cada conexão
+LIMITE_EVENTOS = 100
+
+
+def chaves_do_usuario(usuario):
+    """ O que interessa ao usuário: o próprio estágio (aluno), os orientandos, a direção toda, o eixo. """
+    if usuario.tipo in ('aluno', 'professor'):
+        return [(usuario.tipo, usuario.id)]
+    if usuario.tipo == 'direcao':
+        return [('direcao', None)]
+    if usuario.tipo == 'servidor':
+        return [('servidor', usuario.eixo)]
+    return []
+
+
+class Assinatura:
+    """
+    Uma conexão SSE inscrita no pub/sub do processo. O aviso só acorda a
+    conexão; o que mudou é sempre lido do log de transições (EventoDocumento).
+    """
+
+    def __init__(self, chaves):
+        self.chaves = chaves
+        self.loop = asyncio.get_running_loop()
+        self.sinal = asyncio.Event()
+
+    def __enter__(self):
+        with _trava:
+            for chave in self.chaves:
+                _assinaturas.setdefault(chave, set()).add(self)
+        return self
+
+    def __exit__(self, *exc):
+        with _trava:
+            for chave in self.chaves:
+                assinaturas = _assinaturas.get(chave, set())
+                assinaturas.discard(self)
+                if not assinaturas:
+                    _assinaturas.pop(chave, None)
+
+    def avisar(self):
+        # Chamado da thread do save (sync); o Event pertence ao loop da conexão
+        try:
+            self.loop.call_soon_threadsafe(self.sinal.set)
+        except RuntimeError:
+            pass  # loop já encerrado
+
+    async def aguardar(self, timeout):
+        """ True se foi avisada antes do timeout. """
+        try:
+            await asyncio.wait_for(self.sinal.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.sinal.clear()
+        return True
+
+
+def publicar(chaves):
+    with _trava:
+        assinaturas = {assinatura for chave in chaves for assinatura in _assinaturas.get(chave, ())}
+    for assinatura in assinaturas:
+        assinatura.avisar()
+
+
+def avisar_transicao(estagio_id):
+    """
+    Acorda as conexões interessadas no estágio. Registrada com on_commit pelo
+    DocumentoEstagio.save; sem conexões abertas no processo, não consulta nada.
+    """
+    if not _assinaturas:
+        return
+    estagio = Estagio.objects.filter(id=estagio_id).values('aluno_id', 'orientador_id', 'eixo').first()
+    if estagio is None:
+        return
+    publicar([
+        ('aluno', estagio['aluno_id']),
+        ('professor', estagio['orientador_id']),
+        ('direcao', None),
+        ('servidor', estagio['eixo']),
+    ])
+
+
+def ultimo_evento_id():
+    return EventoDocumento.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+
+
+def eventos_do_usuario(usuario, depois_de):
+    """
+    (cursor, eventos, nao_lidos): as transições posteriores ao cursor que
+    dizem respeito ao usuário, a última de cada documento, já com o que o
+    front-end precisa para atualizar a linha (inclusive se ela continua na
+    caixa de entrada) e o novo total de pendências não lidas.
+    """
+    ultimo = ultimo_evento_id()
+    if ultimo <= depois_de:
+        return depois_de, [], None
+
+    eventos = EventoDocumento.objects.filter(
+        id__gt=depois_de, id__lte=ultimo, documento__isnull=False
+    )
+    if usuario.tipo == 'aluno':
+        eventos = eventos.filter(documento__estagio__aluno=usuario)
+    elif usuario.tipo == 'professor':
+        eventos = eventos.filter(documento__estagio__orientador=usuario)
+    elif usuario.tipo == 'servidor':
+        eventos = eventos.filter(documento__estagio__eixo=usuario.eixo)
+    elif usuario.tipo != 'direcao':
+        return ultimo, [], None
+
+    lidos = list(eventos.order_by('id').values('id', 'documento_id', 'tipo_documento', 'status_novo')[:LIMITE_EVENTOS])
+    if len(lidos) == LIMITE_EVENTOS:
+        # Muitos eventos de uma vez: entrega estes e continua do último na próxima leitura
+        ultimo = lidos[-1]['id']
+    por_documento = {evento['documento_id']: evento for evento in lidos}
+    if not por_documento:
+        return ultimo, [], None
+
+    caixa = itens_do_usuario(usuario)
+    na_caixa = set(caixa.filter(documento_id__in=por_documento).values_list('documento_id', flat=True))
+    tipos = dict(DocumentoEstagio.TIPO_DOCUMENTO_CHOICES)
+    status = dict(DocumentoEstagio.STATUS_CHOICES)
+    resultado = [
+        {
+            'id': evento['id'],
+            'documento_id': documento_id,
+            'tipo_documento': tipos.get(evento['tipo_documento'], evento['tipo_documento']),
+            'status': evento['status_novo'],
+            'status_display': status.get(evento['status_novo'], evento['status_novo']),
+            'na_caixa': documento_id in na_caixa,
+        }
+        for documento_id, evento in sorted(por_documento.items(), key=lambda item: item[1]['id'])
+    ]
+    nao_lidos = caixa.filter(lido_em__isnull=True).count() if usuario.tipo != 'aluno' else None
+    return ultimo, resultado, nao_lidos
@@ -1,3 +1,321 @@
-from django.test import TestCase
+import datetime
+import io
+import os
+import re
+import stat
+import tempfile
 
-# Create your tests here.
+from django import forms
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import (
+    CustomUser, Curso, Turma, Materia, GradeMateria,
+    ProfessorMateriaAnoCursoModalidade, AlunoTurma, Nota,
+    Estagio, DocumentoEstagio, ResumoPipeline, VersaoCache,
+)
+from .arquivos import ler_metadados
+from .caixa_entrada import itens_do_usuario
+from .diretorio import CHAVE_VERSAO_ACESSO, professor_ve_aluno
+from .notas import aplicar_notas
+from .pdfs import PdfInvalido, _ler_objetos, otimizar_arquivo, otimizar_pdf, validar_pdf
+from .pipeline import recalcular_pipeline
+
+
+class ComRelacionadosManagerTests(TestCase):
+    """
+    O __str__ destes modelos atravessa FKs; o manager padrão precisa trazer
+    essas FKs na mesma consulta, senão cada linha listada vira uma consulta a mais.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_superuser(username='admin', password='x', tipo='admin')
+        for i in range(3):
+            curso = Curso.objects.create(nome=f'Curso {i}', eixo='SAUDE')
+            materia = Materia.objects.create(nome=f'MATERIA {i}')
+            GradeMateria.objects.create(curso=curso, materia=materia, tipo='BASE')
+            turma = Turma.objects.create(curso=curso, ano_modulo='1º ANO', turno='matutino', turma=f'M{i}')
+            professor = CustomUser.objects.create_user(username=f'prof{i}', password='x', tipo='professor', first_name=f'Prof {i}')
+            ProfessorMateriaAnoCursoModalidade.objects.create(
+                professor=professor, materia=materia, curso=curso, ano_modulo='1º ANO', modalidade='EPI'
+            )
+            aluno = CustomUser.objects.create_user(username=f'aluno{i}', password='x', tipo='aluno', first_name=f'Aluno {i}')
+            # A matrícula provisiona a Nota da grade (sinal em core.models)
+            AlunoTurma.objects.create(aluno=aluno, turma=turma)
+            estagio = Estagio.objects.create(
+                aluno=aluno, supervisor_nome='S', supervisor_empresa='E', supervisor_cargo='C',
+                data_inicio=datetime.date(2026, 1, 1), data_fim=datetime.date(2026, 6, 1),
+            )
+            DocumentoEstagio.objects.create(estagio=estagio, tipo_documento='TERMO_COMPROMISSO')
+
+    def assertListagemEmUmaConsulta(self, model):
+        with self.assertNumQueries(1):
+            rotulos = [str(obj) for obj in model.objects.all()]
+        self.assertEqual(len(rotulos), 3)
+
+    def test_turma(self):
+        self.assertListagemEmUmaConsulta(Turma)
+
+    def test_grade_materia(self):
+        self.assertListagemEmUmaConsulta(GradeMateria)
+
+    def test_vinculo_professor(self):
+        self.assertListagemEmUmaConsulta(ProfessorMateriaAnoCursoModalidade)
+
+    def test_aluno_turma(self):
+        self.assertListagemEmUmaConsulta(AlunoTurma)
+
+    def test_nota(self):
+        self.assertListagemEmUmaConsulta(Nota)
+
+    def test_estagio(self):
+        self.assertListagemEmUmaConsulta(Estagio)
+
+    def test_documento_estagio(self):
+        self.assertListagemEmUmaConsulta(DocumentoEstagio)
+
+    def test_managers_relacionados_usam_a_mesma_lista(self):
+        # aluno.nota_set e estagio.documentos herdam do manager padrão sem repassar argumentos
+        aluno = CustomUser.objects.get(username='aluno0')
+        consulta = str(aluno.nota_set.all().query)
+        self.assertIn('"core_materia"', consulta)
+        self.assertNotIn('"core_turma"', consulta)
+        self.assertNotIn('"core_curso"', consulta)
+        consulta = str(aluno.estagio.documentos.all().query)
+        self.assertIn('"core_customuser"', consulta)
+
+    def test_select_de_turmas(self):
+        campo = forms.ModelChoiceField(queryset=Turma.objects.all())
+        with self.assertNumQueries(1):
+            html = campo.widget.render('turma', None)
+        self.assertEqual(html.count('<option'), 4)
+
+    def test_changelists_do_admin_nao_crescem_com_as_linhas(self):
+        self.client.force_login(self.admin)
+        modelos = [Turma, ProfessorMateriaAnoCursoModalidade, AlunoTurma, Nota, Estagio, DocumentoEstagio]
+        urls = [reverse(f'admin:core_{model._meta.model_name}_changelist') for model in modelos]
+
+        consultas = {}
+        for url in urls:
+            with CaptureQueriesContext(connection) as capturadas:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            consultas[url] = len(capturadas)
+
+        # Mais uma turma com matrícula, nota e estágio: o número de consultas não muda
+        curso = Curso.objects.create(nome='Curso extra', eixo='SAUDE')
+        materia = Materia.objects.create(nome='MATERIA EXTRA')
+        GradeMateria.objects.create(curso=curso, materia=materia, tipo='BASE')
+        turma = Turma.objects.create(curso=curso, ano_modulo='1º ANO', turno='matutino', turma='X1')
+        professor = CustomUser.objects.create_user(username='prof_extra', password='x', tipo='professor')
+        ProfessorMateriaAnoCursoModalidade.objects.create(
+            professor=professor, materia=materia, curso=curso, ano_modulo='1º ANO', modalidade='EPI'
+        )
+        aluno = CustomUser.objects.create_user(username='aluno_extra', password='x', tipo='aluno')
+        AlunoTurma.objects.create(aluno=aluno, turma=turma)
+        estagio = Estagio.objects.create(
+            aluno=aluno, supervisor_nome='S', supervisor_empresa='E', supervisor_cargo='C',
+            data_inicio=datetime.date(2026, 1, 1), data_fim=datetime.date(2026, 6, 1),
+        )
+        DocumentoEstagio.objects.create(estagio=estagio, tipo_documento='TERMO_COMPROMISSO')
+
+        for url in urls:
+            with self.assertNumQueries(consultas[url]):
+                self.client.get(url)
+
+
+class IndiceAcessoProfessorTests(TestCase):
+    """ O índice fica no cache local de cada processo; a invalidação precisa valer para todos. """
+
+    def setUp(self):
+        cache.clear()
+        curso = Curso.objects.create(nome='Curso', eixo='SAUDE')
+        materia = Materia.objects.create(nome='MATERIA')
+        turma = Turma.objects.create(curso=curso, ano_modulo='1º ANO', turno='matutino', turma='M1')
+        self.professor = CustomUser.objects.create_user(username='prof', password='x', tipo='professor')
+        ProfessorMateriaAnoCursoModalidade.objects.create(
+            professor=self.professor, materia=materia, curso=curso, ano_modulo='1º ANO', modalidade='EPI'
+        )
+        self.aluno = CustomUser.objects.create_user(username='aluno', password='x', tipo='aluno')
+        AlunoTurma.objects.create(aluno=self.aluno, turma=turma)
+
+    def test_versao_gravada_por_outro_processo_invalida_o_indice(self):
+        self.assertTrue(professor_ve_aluno(self.professor, self.aluno.id))
+
+        # Outro worker encerra a matrícula: o cache deste processo não é tocado,
+        # só a versão no banco sobe
+        AlunoTurma.objects.filter(aluno=self.aluno).update(ativo=False)
+        VersaoCache.objects.filter(chave=CHAVE_VERSAO_ACESSO).update(versao=F('versao') + 1)
+
+        self.assertFalse(professor_ve_aluno(self.professor, self.aluno.id))
+
+
+def pdf_escaneado(paginas=2, lado=1200, qualidade=95):
+    """ PDF como o de um app de digitalização: uma imagem JPEG por página, xref clássica. """
+    from PIL import Image
+    imagens = [
+        Image.effect_noise((lado // 4, lado // 3), 40).convert('RGB').resize((lado, lado * 4 // 3))
+        for _ in range(paginas)
+    ]
+    saida = io.BytesIO()
+    imagens[0].save(saida, 'PDF', save_all=True, append_images=imagens[1:], quality=qualidade, resolution=300)
+    return saida.getvalue()
+
+
+class PdfsTests(SimpleTestCase):
+    """ Validação e otimização dos PDFs enviados (core/pdfs.py). """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pdf = pdf_escaneado()
+
+    def assertRecusado(self, dados, mensagem):
+        with self.assertRaisesMessage(PdfInvalido, mensagem):
+            validar_pdf(ContentFile(dados))
+
+    def test_valida_e_conta_paginas(self):
+        self.assertEqual(validar_pdf(ContentFile(self.pdf)), 2)
+
+    def test_recusa_arquivo_que_nao_e_pdf(self):
+        self.assertRecusado(b'hello', "não é um PDF")
+
+    def test_recusa_pdf_truncado(self):
+        self.assertRecusado(self.pdf[:len(self.pdf) // 2], "incompleto")
+
+    def test_recusa_pdf_criptografado(self):
+        self.assertRecusado(self.pdf.replace(b'/Root', b'/Encrypt 9 0 R /Root'), "protegido por senha")
+
+    @override_settings(PDF_PAGINAS_MAXIMO=1)
+    def test_recusa_paginas_demais(self):
+        self.assertRecusado(self.pdf, "no máximo 1 páginas")
+
+    def test_otimizado_continua_valido(self):
+        novo = otimizar_pdf(self.pdf, lado_maximo=600, qualidade=75)
+        self.assertIsNotNone(novo)
+        self.assertLess(len(novo), len(self.pdf))
+        self.assertEqual(validar_pdf(ContentFile(novo)), 2)
+
+    def test_nao_reescreve_pdf_assinado(self):
+        assinado = self.pdf.replace(b'/Type /Catalog', b'/Type /Catalog /AcroForm << /SigFlags 3 >>')
+        self.assertEqual(validar_pdf(ContentFile(assinado)), 2)
+        self.assertIsNone(otimizar_pdf(assinado, lado_maximo=600, qualidade=75))
+        # enfileirar_pdf lê a marcação dos metadados gravados no save
+        self.assertTrue(ler_metadados(ContentFile(assinado), 'assinado.pdf')['assinado'])
+        self.assertFalse(ler_metadados(ContentFile(self.pdf), 'scan.pdf')['assinado'])
+
+    def test_atualizacao_incremental_nao_conta_pagina_duas_vezes(self):
+        # Um visualizador regrava a primeira página no fim do arquivo, sem mexer no resto
+        numero, (_, pagina, _) = next(
+            (numero, objeto) for numero, objeto in _ler_objetos(self.pdf).items()
+            if re.search(rb'/Type\s*/Page\b', objeto[1])
+        )
+        raiz = re.findall(rb'/Root\s+\d+\s+\d+\s+R', self.pdf)[-1]
+        objeto = b'\n%d 0 obj\n%s\nendobj\n' % (numero, pagina.replace(b'/Type /Page', b'/Rotate 90 /Type /Page'))
+        atualizado = self.pdf + objeto + (
+            b'xref\n0 1\n0000000000 65535 f \n%d 1\n%010d 00000 n \n'
+            b'trailer\n<< /Size %d %s /Prev %d >>\nstartxref\n%d\n%%%%EOF\n'
+        ) % (
+            numero, len(self.pdf) + 1, numero + 1, raiz,
+            self.pdf.rindex(b'xref'), len(self.pdf) + len(objeto),
+        )
+        self.assertEqual(validar_pdf(ContentFile(atualizado)), 2)
+
+    def test_otimizado_mantem_a_permissao_do_original(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'scan.pdf')
+            with open(caminho, 'wb') as saida:
+                saida.write(self.pdf)
+            os.chmod(caminho, 0o644)
+            _, caminho_novo = otimizar_arquivo(caminho, lado_maximo=600, qualidade=75)
+            self.assertEqual(stat.S_IMODE(os.stat(caminho_novo).st_mode), 0o644)
+
+
+class AplicarNotasTests(TestCase):
+    """ Importação de notas por planilha: a confirmação não pode sobrescrever edições feitas depois da prévia. """
+
+    def setUp(self):
+        curso = Curso.objects.create(nome='Curso', eixo='SAUDE')
+        self.materia = Materia.objects.create(nome='MATERIA')
+        GradeMateria.objects.create(curso=curso, materia=self.materia, tipo='BASE')
+        self.turma = Turma.objects.create(curso=curso, ano_modulo='1º ANO', turno='matutino', turma='M1')
+        self.aluno = CustomUser.objects.create_user(username='aluno', password='x', tipo='aluno')
+        AlunoTurma.objects.create(aluno=self.aluno, turma=self.turma)
+        self.nota = Nota.objects.get(aluno=self.aluno, materia=self.materia, turma=self.turma)
+
+    def test_grava_so_os_campos_alterados(self):
+        # Outro professor lança a nota 2 depois da prévia, que só mexia na nota 1
+        Nota.objects.filter(pk=self.nota.pk).update(nota_2=7.0)
+        alteracoes = [{'aluno_id': self.aluno.id, 'notas': {'nota_1': 8.0}, 'vistas': {'nota_1': None}}]
+        self.assertEqual(aplicar_notas(self.turma, self.materia, alteracoes), (1, []))
+        self.nota.refresh_from_db()
+        self.assertEqual((self.nota.nota_1, self.nota.nota_2), (8.0, 7.0))
+        self.assertEqual(self.nota.media_final, 7.5)
+
+    def test_pula_aluno_com_nota_alterada_depois_da_previa(self):
+        Nota.objects.filter(pk=self.nota.pk).update(nota_1=4.0)
+        alteracoes = [{'aluno_id': self.aluno.id, 'notas': {'nota_1': 8.0}, 'vistas': {'nota_1': None}}]
+        self.assertEqual(aplicar_notas(self.turma, self.materia, alteracoes), (0, [self.aluno.id]))
+        self.nota.refresh_from_db()
+        self.assertEqual(self.nota.nota_1, 4.0)
+
+
+class CaixaEntradaTests(TestCase):
+    """ Pendências de cada papel (core/caixa_entrada.py), mantidas pelo save dos documentos. """
+
+    def setUp(self):
+        self.orientador = CustomUser.objects.create_user(username='prof', password='x', tipo='professor')
+        aluno = CustomUser.objects.create_user(username='aluno', password='x', tipo='aluno')
+        self.estagio = Estagio.objects.create(
+            aluno=aluno, orientador=self.orientador, supervisor_nome='S', supervisor_empresa='E', supervisor_cargo='C',
+            data_inicio=datetime.date(2026, 1, 1), data_fim=datetime.date(2026, 6, 1),
+        )
+        DocumentoEstagio.objects.create(estagio=self.estagio, tipo_documento='TERMO_COMPROMISSO')
+
+    def test_avaliacao_do_orientador_aguardando_assinatura_entra_com_documentos_em_aberto(self):
+        rascunho = DocumentoEstagio.objects.create(estagio=self.estagio, tipo_documento='AVALIACAO_ORIENTADOR')
+        self.assertFalse(itens_do_usuario(self.orientador).filter(documento=rascunho).exists())
+
+        rascunho.status = 'AGUARDANDO_ASSINATURA_PROF'
+        rascunho.save()
+        self.assertTrue(itens_do_usuario(self.orientador).filter(documento=rascunho).exists())
+
+
+class PipelineTests(TestCase):
+    """ Os contadores do painel (ResumoPipeline) vivem de deltas e precisam bater com recalcular_pipeline(). """
+
+    def setUp(self):
+        curso = Curso.objects.create(nome='Curso', eixo='SAUDE')
+        self.turma = Turma.objects.create(curso=curso, ano_modulo='1º ANO', turno='matutino', turma='M1')
+        self.alunos = []
+        for i in range(2):
+            aluno = CustomUser.objects.create_user(username=f'aluno{i}', password='x', tipo='aluno')
+            AlunoTurma.objects.create(aluno=aluno, turma=self.turma)
+            estagio = Estagio.objects.create(
+                aluno=aluno, supervisor_nome='S', supervisor_empresa='E', supervisor_cargo='C',
+                data_inicio=datetime.date(2026, 1, 1), data_fim=datetime.date(2026, 6, 1),
+            )
+            DocumentoEstagio.objects.create(estagio=estagio, tipo_documento='TERMO_COMPROMISSO')
+            self.alunos.append(aluno)
+
+    def contadores(self):
+        return set(ResumoPipeline.objects.filter(total__gt=0).values_list('turma_id', 'tipo_documento', 'status', 'total'))
+
+    def assertBateComRecalculo(self):
+        contadores = self.contadores()
+        recalcular_pipeline()
+        self.assertEqual(contadores, self.contadores())
+
+    def test_apagar_aluno(self):
+        self.alunos[0].delete()
+        self.assertBateComRecalculo()
+
+    def test_apagar_alunos_em_lote(self):
+        CustomUser.objects.filter(tipo='aluno').delete()
+        self.assertBateComRecalculo()
+        self.assertFalse(self.contadores())
@@ -0,0 +1,176 @@
+# core/uploads.py
+import datetime
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .arquivos import ler_metadados, registrar_metadados
+from .models import UploadParcial
+from .pdfs import CAMPOS_PDF, PdfInvalido, enfileirar_pdf, validar_pdf
+
+# Extensões aceitas em cada campo de arquivo do documento
+EXTENSOES = {
+    'arquivo_anexo': ('.pdf',),
+    'pdf_supervisor_assinado': ('.pdf',),
+    'foto_3x4': ('.jpg', '.jpeg', '.png'),
+}
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ErroUpload(Exception):
+    """ Parte recusada; 'recebido' diz ao cliente de onde continuar. """
+
+    def __init__(self, mensagem, status=400, recebido=None):
+        super().__init__(mensagem)
+        self.status = status
+        self.recebido = recebido
+
+
+class ArquivoMontado(File):
+    """
+    O arquivo já montado no disco. Com temporary_file_path, o FileSystemStorage
+    move o arquivo para o MEDIA_ROOT em vez de lê-lo e copiá-lo.
+    """
+
+    def __init__(self, caminho, nome):
+        super().__init__(open(caminho, 'rb'), name=nome)
+        self.caminho = caminho
+
+    def temporary_file_path(self):
+        return self.caminho
+
+
+def _imagem_valida(caminho):
+    # Mesma conferência do forms.ImageField, que o upload em partes não passa
+    from PIL import Image
+    try:
+        with Image.open(caminho) as imagem:
+            imagem.verify()
+    except Exception:
+        return False
+    return True
+
+
+def caminho_das_partes(upload):
+    return os.path.join(settings.UPLOAD_PARTES_DIR, f"{upload.id}.part")
+
+
+def descartar(upload):
+    try:
+        os.remove(caminho_das_partes(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def iniciar_upload(aluno, documento, campo, nome_arquivo, tamanho, sha256):
+    """
+    Cria o upload ou, se o mesmo arquivo (nome, tamanho e SHA-256 do arquivo
+    inteiro) já estava sendo enviado para o campo, devolve o existente para o
+    cliente retomar do 'recebido'. Nome e tamanho não bastam: outro arquivo
+    igual nesses dois continuaria o início do anterior.
+    """
+    nome_arquivo = os.path.basename(nome_arquivo or '')
+    sha256 = (sha256 or '').lower()
+    if not _SHA256.match(sha256):
+        raise ErroUpload("O resumo (SHA-256) do arquivo é obrigatório.")
+    if campo not in EXTENSOES:
+        raise ErroUpload("Campo de arquivo inválido.")
+    if not nome_arquivo.lower().endswith(EXTENSOES[campo]):
+        raise ErroUpload(f"Formato não permitido. Envie um arquivo {', '.join(EXTENSOES[campo])}.")
+    if not 0 < tamanho <= settings.UPLOAD_TAMANHO_MAXIMO:
+        raise ErroUpload(f"O arquivo deve ter até {settings.UPLOAD_TAMANHO_MAXIMO // (1024 * 1024)} MB.")
+    if campo in CAMPOS_PDF and tamanho > settings.PDF_TAMANHO_MAXIMO:
+        raise ErroUpload(f"O PDF deve ter até {settings.PDF_TAMANHO_MAXIMO // (1024 * 1024)} MB.")
+
+    limite = timezone.now() - datetime.timedelta(hours=settings.UPLOAD_VALIDADE_HORAS)
+    for abandonado in UploadParcial.objects.filter(aluno=aluno, atualizado_em__lt=limite):
+        descartar(abandonado)
+
+    upload = UploadParcial.objects.filter(
+        aluno=aluno, documento=documento, campo=campo, nome_arquivo=nome_arquivo, tamanho=tamanho, sha256=sha256
+    ).first()
+    if upload is not None and os.path.exists(caminho_das_partes(upload)):
+        return upload
+
+    os.makedirs(settings.UPLOAD_PARTES_DIR, exist_ok=True)
+    upload = UploadParcial.objects.create(
+        aluno=aluno, documento=documento, campo=campo, nome_arquivo=nome_arquivo, tamanho=tamanho, sha256=sha256
+    )
+    open(caminho_das_partes(upload), 'wb').close()
+    return upload
+
+
+def gravar_parte(upload, offset, dados, checksum):
+    """
+    Grava a parte que começa em 'offset' (tem que ser exatamente o 'recebido')
+    depois de conferir o SHA-256 dela. Uma parte repetida ou fora de ordem é
+    recusada com o 'recebido' atual, e o cliente reenvia dali.
+    """
+    if offset != upload.recebido:
+        raise ErroUpload("Parte fora de ordem.", status=409, recebido=upload.recebido)
+    if not dados or len(dados) > settings.UPLOAD_TAMANHO_PARTE or offset + len(dados) > upload.tamanho:
+        raise ErroUpload("Tamanho de parte inválido.", recebido=upload.recebido)
+    if hashlib.sha256(dados).hexdigest() != (checksum or '').lower():
+        raise ErroUpload("A parte chegou corrompida.", status=422, recebido=upload.recebido)
+
+    with open(caminho_das_partes(upload), 'r+b') as arquivo:
+        # Descarta o que sobrou de uma gravação interrompida depois do último ponto confirmado
+        arquivo.seek(offset)
+        arquivo.truncate()
+        arquivo.write(dados)
+
+    recebido = offset + len(dados)
+    # Só avança se ninguém gravou a mesma parte em paralelo
+    if not UploadParcial.objects.filter(id=upload.id, recebido=offset).update(
+        recebido=recebido, atualizado_em=timezone.now()
+    ):
+        upload.refresh_from_db(fields=['recebido'])
+        raise ErroUpload("Parte fora de ordem.", status=409, recebido=upload.recebido)
+    upload.recebido = recebido
+    return recebido
+
+
+def concluir_upload(upload):
+    """
+    Confere o SHA-256 do arquivo montado com o informado no início, anexa-o
+    ao campo do documento (movendo-o, sem copiá-lo) e salva o documento, que
+    passa pelos sinais de substituição do arquivo antigo. Os metadados saem da
+    mesma leitura da conferência: o save não lê o arquivo de volta do storage.
+    Devolve o documento.
+    """
+    caminho = caminho_das_partes(upload)
+    if upload.recebido != upload.tamanho or not os.path.exists(caminho) or os.path.getsize(caminho) != upload.tamanho:
+        raise ErroUpload("O arquivo ainda não foi recebido por completo.", status=409, recebido=upload.recebido)
+    with open(caminho, 'rb') as montado:
+        lidos = ler_metadados(File(montado), upload.nome_arquivo)
+    if lidos['sha256'] != upload.sha256:
+        descartar(upload)
+        raise ErroUpload("O arquivo recebido não confere com o original. Envie novamente.", status=422)
+
+    if upload.campo == 'foto_3x4' and not _imagem_valida(caminho):
+        descartar(upload)
+        raise ErroUpload("A foto enviada não é uma imagem válida.")
+    if upload.campo in CAMPOS_PDF:
+        try:
+            validar_pdf(caminho)
+        except PdfInvalido as erro:
+            descartar(upload)
+            raise ErroUpload(str(erro))
+
+    documento = upload.documento
+    arquivo = ArquivoMontado(caminho, upload.nome_arquivo)
+    try:
+        getattr(documento, upload.campo).save(upload.nome_arquivo, arquivo, save=False)
+    finally:
+        arquivo.close()
+    registrar_metadados(documento, upload.campo, lidos)
+    documento.save()
+    descartar(upload)
+    if upload.campo in CAMPOS_PDF:
+        enfileirar_pdf(documento, upload.campo)
+    return documento
@@ -1,7 +1,17 @@
 # core/views.py
+import os
+import posixpath
+
+from django.conf import settings
 from django.contrib.auth import authenticate, login
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.utils._os import safe_join
+
+from .midia import documento_do_arquivo, pode_ver_arquivo, responder_arquivo
 
 def login_view(request):
     if request.method == 'POST':
@@ -15,4 +25,17 @@ def login_view(request):
         else:
             messages.error(request, 'Email ou senha inválidos.')
 
-    return render(request, 'login.html')
\ No newline at end of file
+    return render(request, 'login.html')
+
+@login_required
+def arquivo_protegido(request, caminho):
+    """ Arquivos de MEDIA_URL: só para quem pode ver o documento dono deles (core.midia). """
+    nome = posixpath.normpath(caminho).lstrip('/')
+    try:
+        arquivo = safe_join(settings.MEDIA_ROOT, nome)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(arquivo) or not pode_ver_arquivo(request.user, documento_do_arquivo(nome)):
+        # 404 também sem permissão: não confirma que o arquivo existe
+        raise Http404
+    return responder_arquivo(request, nome, arquivo)
@@ -9,6 +9,8 @@ urlpatterns = [
     
     # BOTÃO
     path('professor/materia/<int:materia_id>/turma/<int:turma_id>/', views.detalhar_turma_professor, name='detalhar_turma_professor'),
+    path('professor/materia/<int:materia_id>/turma/<int:turma_id>/exportar/', views.exportar_notas_turma_professor, name='exportar_notas_turma_professor'),
+    path('professor/materia/<int:materia_id>/turma/<int:turma_id>/importar/', views.importar_notas_turma_professor, name='importar_notas_turma_professor'),
     
     # MATÉRIAS-ANO-CURSO-MODALIDADE-ESTÁGIO
     path('professor/materia/<int:materia_id>/turma/<int:turma_id>/', views.ver_turma_professor, name='ver_turma_professor'),
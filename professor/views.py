@@ -2,9 +2,12 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils.timezone import now
-from django.db.models import Q
 import datetime
 from core.decorators import role_required
+from core.exportacao import resposta_csv, EXPORTACAO_CHUNK_SIZE
+from core.notas import ler_planilha_notas, aplicar_notas, CAMPOS_NOTA
+from core.diretorio import professor_leciona, professor_ve_aluno
+from core.caixa_entrada import documentos_da_caixa, tem_nao_lido
 from autenticacao.forms import AvaliacaoOrientadorForm
 from core.models import (
     ProfessorMateriaAnoCursoModalidade,
@@ -24,44 +27,9 @@ def professor_dashboard_view(request):
         professor=request.user
     ).select_related('materia', 'curso')
 
-    # 1. Documentos que realmente precisam da ação do professor
-    documentos_prof = DocumentoEstagio.objects.filter(
-        estagio__orientador=request.user
-    ).exclude(
-        tipo_documento='AVALIACAO_SUPERVISOR'
-    ).filter(
-        Q(status='AGUARDANDO_ASSINATURA_PROF')
-    )
-
-    # 2. Agora aplicamos a lógica para EXIBIR a Avaliação do Orientador
-    avaliacoes = []
-    avaliacoes_queryset = DocumentoEstagio.objects.filter(
-        estagio__orientador=request.user,
-        tipo_documento='AVALIACAO_ORIENTADOR',
-        status__in=['RASCUNHO', 'RASCUNHO_ORIENTADOR', 'AGUARDANDO_ASSINATURA_PROF']
-    )
-
-    for doc in avaliacoes_queryset:
-        estagio = doc.estagio
-
-        # buscar todos os outros documentos do estágio
-        outros_docs = DocumentoEstagio.objects.filter(
-            estagio=estagio
-        ).exclude(
-            tipo_documento__in=['AVALIACAO_ORIENTADOR', 'AVALIACAO_SUPERVISOR']
-        )
-
-        # verificar se todos eles estão finalizados / completos
-        tudo_ok = all(d.status == 'CONCLUIDO' for d in outros_docs)
-
-        if tudo_ok:
-            avaliacoes.append(doc)
-
-    # juntar tudo no mesmo queryset-like (lista)
-    documentos_pendentes = list(documentos_prof) + list(avaliacoes)
-
-    # ordenar pelo nome do aluno
-    documentos_pendentes.sort(key=lambda x: x.estagio.aluno.first_name)
+    # Pendências do orientador vêm da caixa de entrada (core.caixa_entrada),
+    # incluindo a Avaliação do Orientador quando os outros documentos estão concluídos
+    documentos_pendentes = documentos_da_caixa(request.user)
 
     context = {
         'vinculos': vinculos,
@@ -93,40 +61,129 @@ def listar_turmas_vinculadas(request, vinculo_id):
 @login_required
 @role_required('professor')
 def detalhar_turma_professor(request, materia_id, turma_id):
-    materia = get_object_or_404(Materia, id=materia_id)
-    turma = get_object_or_404(Turma, id=turma_id)
-
-    vinculado = ProfessorMateriaAnoCursoModalidade.objects.filter(
-        professor=request.user,
-        materia=materia,
-        curso=turma.curso,
-        ano_modulo=turma.ano_modulo,
-        modalidade=turma.modalidade
-    ).exists()
-
-    if not vinculado:
+    if not professor_leciona(request.user, turma_id, materia_id):
         messages.error(request, "Você não tem permissão para lecionar esta matéria nesta turma.")
         return redirect('professor_dashboard')
 
-    alunos = CustomUser.objects.filter(tipo='aluno', alunoturma__turma=turma).distinct()
+    materia = get_object_or_404(Materia, id=materia_id)
+    turma = get_object_or_404(Turma, id=turma_id)
+
+    alunos = CustomUser.objects.filter(tipo='aluno', alunoturma__turma=turma, alunoturma__ativo=True).distinct()
     notas_dict = {nota.aluno.id: nota for nota in Nota.objects.filter(materia=materia, turma=turma)}
     
     context = {
         'materia': materia, 'turma': turma, 'alunos': alunos, 'notas_dict': notas_dict
     }
     return render(request, 'professor/lescionação/detalhar_turma.html', context)
-    
+
+
 @login_required
 @role_required('professor')
-def ver_turma_professor(request, materia_id, turma_id):
+def exportar_notas_turma_professor(request, materia_id, turma_id):
+    if not professor_leciona(request.user, turma_id, materia_id):
+        messages.error(request, "Você não tem permissão para lecionar esta matéria nesta turma.")
+        return redirect('professor_dashboard')
+
     materia = get_object_or_404(Materia, id=materia_id)
     turma = get_object_or_404(Turma, id=turma_id)
 
-    if not ProfessorMateriaAnoCursoModalidade.objects.filter(professor=request.user, materia=materia, turma=turma).exists():
+    # Mesmos alunos da tela (matriculados na turma), com a nota da matéria quando existir
+    linhas = CustomUser.objects.filter(
+        tipo='aluno', alunoturma__turma=turma, alunoturma__ativo=True
+    ).values_list(
+        'numero_matricula', 'first_name', 'last_name',
+    ).order_by('first_name', 'last_name', 'id').distinct().iterator(chunk_size=EXPORTACAO_CHUNK_SIZE)
+
+    notas = {
+        matricula: valores
+        for matricula, *valores in Nota.objects.filter(materia=materia, turma=turma).values_list(
+            'aluno__numero_matricula', 'nota_1', 'nota_2', 'nota_3', 'nota_recuperacao', 'media_final', 'status_final'
+        )
+    }
+
+    def gerar_linhas():
+        for matricula, nome, sobrenome in linhas:
+            yield [matricula, nome, sobrenome, *notas.get(matricula, ['', '', '', '', '', 'Pendente'])]
+
+    cabecalho = ['Matrícula', 'Nome', 'Sobrenome', 'N1', 'N2', 'N3', 'Recuperação', 'Média', 'Situação']
+    return resposta_csv(f'notas_{materia.id}_turma_{turma.id}.csv', cabecalho, gerar_linhas())
+
+
+@login_required
+@role_required('professor')
+def importar_notas_turma_professor(request, materia_id, turma_id):
+    if not professor_leciona(request.user, turma_id, materia_id):
+        messages.error(request, "Você não tem permissão para lecionar esta matéria nesta turma.")
+        return redirect('professor_dashboard')
+
+    materia = get_object_or_404(Materia, id=materia_id)
+    turma = get_object_or_404(Turma, id=turma_id)
+
+    # A prévia fica na sessão entre o envio da planilha e a confirmação
+    chave_sessao = f'importacao_notas_{materia.id}_{turma.id}'
+    linhas, erros = [], []
+
+    if request.method == 'POST' and 'confirmar' in request.POST:
+        alteracoes = request.session.pop(chave_sessao, None)
+        if not alteracoes:
+            messages.error(request, "A prévia expirou. Envie a planilha novamente.")
+            return redirect('importar_notas_turma_professor', materia_id=materia.id, turma_id=turma.id)
+
+        total, conflitos = aplicar_notas(turma, materia, alteracoes)
+        messages.success(request, f"{total} nota(s) importada(s) com sucesso!")
+        if conflitos:
+            messages.warning(
+                request,
+                f"{len(conflitos)} aluno(s) tiveram notas alteradas depois da prévia e não foram importados. "
+                "Envie a planilha novamente para revisá-los."
+            )
+        return redirect('importar_notas_turma_professor', materia_id=materia.id, turma_id=turma.id)
+
+    if request.method == 'POST':
+        planilha = request.FILES.get('planilha')
+        if not planilha:
+            messages.error(request, "Nenhum arquivo selecionado.")
+        elif not planilha.name.lower().endswith('.csv'):
+            messages.error(request, "Envie a planilha no formato CSV.")
+        else:
+            linhas, erros = ler_planilha_notas(planilha, turma, materia)
+            # Só os campos que mudam, com o valor visto na prévia para detectar edições concorrentes
+            alteracoes = [
+                {
+                    'aluno_id': linha['aluno_id'],
+                    'notas': linha['alteradas'],
+                    'vistas': {campo: linha['atuais'][campo] for campo in linha['alteradas']},
+                }
+                for linha in linhas if linha['alterado']
+            ]
+            if erros or not alteracoes:
+                request.session.pop(chave_sessao, None)
+                if not erros:
+                    messages.info(request, "Nenhuma nota diferente das atuais foi encontrada na planilha.")
+            else:
+                request.session[chave_sessao] = alteracoes
+
+    context = {
+        'materia': materia,
+        'turma': turma,
+        'linhas': linhas,
+        'erros': erros,
+        'colunas': list(zip(CAMPOS_NOTA, ['N1', 'N2', 'N3', 'Recuperação'])),
+        'pode_confirmar': bool(linhas) and not erros and any(l['alterado'] for l in linhas),
+    }
+    return render(request, 'professor/lescionação/importar_notas.html', context)
+
+@login_required
+@role_required('professor')
+def ver_turma_professor(request, materia_id, turma_id):
+    if not professor_leciona(request.user, turma_id, materia_id):
         messages.error(request, "Você não tem acesso a essa turma.")
         return redirect('professor_dashboard')
 
-    alunos = CustomUser.objects.filter(tipo='aluno', alunoturma__turma=turma).distinct()
+    materia = get_object_or_404(Materia, id=materia_id)
+    turma = get_object_or_404(Turma, id=turma_id)
+
+    alunos = CustomUser.objects.filter(tipo='aluno', alunoturma__turma=turma, alunoturma__ativo=True).distinct()
     notas_dict = {nota.aluno_id: nota for nota in Nota.objects.filter(materia=materia, turma=turma)}
 
     return render(request, 'professor/lescionação/detalhar_turma.html', {
@@ -139,6 +196,11 @@ def ver_turma_professor(request, materia_id, turma_id):
 @login_required
 @role_required('professor')
 def ver_detalhes_aluno_professor(request, aluno_id):
+    # Só alunos matriculados em turmas onde o professor leciona
+    if not professor_ve_aluno(request.user, aluno_id):
+        messages.error(request, "Você não tem acesso a este aluno.")
+        return redirect('professor_dashboard')
+
     aluno = get_object_or_404(CustomUser, id=aluno_id, tipo='aluno')
     turmas = Turma.objects.filter(alunoturma__aluno=aluno)
     return render(request, 'professor/lescionação/detalhes_aluno.html', {'aluno': aluno, 'turmas': turmas})
@@ -173,7 +235,7 @@ def professor_assinar_documento(request, documento_id):
         documento.assinado_orientador_em = now()
         documento.assinado_por_orientador = request.user
         documento.status = 'CONCLUIDO'
-        documento.save()
+        documento.save(ator=request.user)
 
         messages.success(request, "Avaliação do orientador assinada e concluída com sucesso!")
         return redirect('professor_dashboard')
@@ -197,7 +259,7 @@ def professor_assinar_documento(request, documento_id):
     else:
         documento.status = 'AGUARDANDO_VERIFICACAO_ADMIN'
 
-    documento.save()
+    documento.save(ator=request.user)
 
     messages.success(request, f"Documento '{documento.get_tipo_documento_display()}' assinado e encaminhado!")
     return redirect('professor_dashboard')
@@ -213,6 +275,8 @@ def professor_visualizar_documento(request, documento_id):
         messages.error(request, "Você não tem permissão para visualizar este documento.")
         return redirect('professor_dashboard')
 
+    documento.nao_lido = tem_nao_lido(request.user, documento)
+
     dados = documento.dados_formulario or {}
     
     # 1. Converter datas do cabeçalho
@@ -295,7 +359,7 @@ def professor_visualizar_documento(request, documento_id):
         'dados': dados,
         'dados_termo': dados_termo, 
         'dados_reais': dados_reais, # IMPORTANTE PARA AVALIAÇÃO
-        'pdf_existe': documento.pdf_supervisor_assinado.storage.exists(documento.pdf_supervisor_assinado.name) if documento.pdf_supervisor_assinado else False,
+        'pdf_existe': documento.arquivo_presente('pdf_supervisor_assinado'),
         'pode_assinar_orientador': pode_assinar,
         'documento_ja_assinado_orientador': bool(documento.assinado_orientador_em),
     }
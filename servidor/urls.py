@@ -8,7 +8,10 @@ urlpatterns = [
     path('servidor/dashboard/', views.servidor_dashboard_view, name='servidor_dashboard'),
     
     # ESTÁGIO
+    path('servidor/painel/', views.painel_estagios, name='painel_estagios'),
+    path('servidor/prazos/', views.relatorio_prazos, name='relatorio_prazos'),
     path('servidor/monitorar/', views.servidor_monitorar_alunos, name='servidor_monitorar_alunos'),
+    path('servidor/monitorar/exportar/', views.servidor_exportar_alunos, name='servidor_exportar_alunos'),
     path('servidor/aluno/<int:aluno_id>/documentos/', views.servidor_ver_documentos_aluno, name='servidor_ver_documentos_aluno'),
     path('direcao/documento/<int:documento_id>/assinar/', views.direcao_assinar_documento, name='direcao_assinar_documento'),
     path('direcao/documento/<int:documento_id>/visualizar/', views.direcao_visualizar_documento, name='direcao_visualizar_documento'),
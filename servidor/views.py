@@ -1,11 +1,19 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.utils.timezone import now
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Sum, F
+from django.db.models.functions import TruncWeek
 import datetime
 from core.decorators import role_required
-from core.models import DocumentoEstagio, Estagio, CustomUser
+from core.models import (
+    DocumentoEstagio, Estagio, CustomUser, AlunoTurma, Curso, Turma,
+    ResumoPipeline, ResumoTempoStatus, ResumoVazaoDiaria,
+)
+from core.caixa_entrada import documentos_da_caixa, tem_nao_lido
+from core.prazos import documentos_atrasados, agrupar_por_responsavel, prazos
+from core.exportacao import resposta_csv, formatar_turma, EXPORTACAO_CHUNK_SIZE
 
 # === DASHBOARD ===
 
@@ -15,11 +23,7 @@ def servidor_dashboard_view(request):
     context = {'user': request.user}
     
     if request.user.tipo == 'direcao':
-        documentos_pendentes = DocumentoEstagio.objects.filter(
-            status='AGUARDANDO_ASSINATURA_DIR' 
-        ).select_related('estagio__aluno', 'estagio__orientador')
-        
-        context['documentos_pendentes'] = documentos_pendentes
+        context['documentos_pendentes'] = documentos_da_caixa(request.user)
         template_name = 'servidor/direcao/servidor-direcao_dashboard.html'
     
     elif request.user.tipo == 'servidor':
@@ -27,15 +31,152 @@ def servidor_dashboard_view(request):
         if request.user.eixo:
             alunos_no_eixo_count = CustomUser.objects.filter(
                 tipo='aluno',
-                alunoturma__turma__curso__eixo=request.user.eixo
-            ).distinct().count()
+                eixo=request.user.eixo
+            ).count()
         
         context['alunos_no_eixo_count'] = alunos_no_eixo_count
+        context['documentos_pendentes'] = documentos_da_caixa(request.user)
         template_name = 'servidor/administrativo/servidor-administrativo_dashboard.html'
         
     return render(request, template_name, context)
 
 
+# === PAINEL DE ESTÁGIOS (DIREÇÃO / ADMIN) ===
+
+# Semanas exibidas no gráfico de vazão
+PAINEL_SEMANAS = 12
+
+
+def _formatar_duracao(segundos):
+    if segundos is None:
+        return "-"
+    horas = int(segundos // 3600)
+    dias, horas = divmod(horas, 24)
+    if dias:
+        return f"{dias}d {horas}h"
+    return f"{horas}h {int(segundos % 3600 // 60)}min"
+
+
+@login_required
+@role_required('direcao', 'admin')
+def painel_estagios(request):
+    """
+    Pipeline de estágios por eixo/curso/turma. Lê só as tabelas de resumo,
+    mantidas por delta (core.pipeline e core.eventos), então o tempo de resposta
+    não cresce com os anos de dossiês acumulados.
+    """
+    filtros = {
+        'eixo': request.GET.get('eixo', ''),
+        'curso': request.GET.get('curso', ''),
+        'turma': request.GET.get('turma', ''),
+    }
+    if filtros['eixo'] not in dict(Curso.EIXO_CHOICES):
+        filtros['eixo'] = ''
+    if not filtros['curso'].isdigit():
+        filtros['curso'] = ''
+    if not filtros['turma'].isdigit():
+        filtros['turma'] = ''
+
+    contadores = ResumoPipeline.objects.filter(total__gt=0)
+    if filtros['eixo']:
+        contadores = contadores.filter(turma__curso__eixo=filtros['eixo'])
+    if filtros['curso']:
+        contadores = contadores.filter(turma__curso_id=filtros['curso'])
+    if filtros['turma']:
+        contadores = contadores.filter(turma_id=filtros['turma'])
+
+    # Dossiês por status_geral, no total e por curso
+    status_geral = Estagio.STATUS_GERAL_CHOICES
+    dossies = {}
+    por_curso = {}
+    for curso, status, total in contadores.filter(tipo_documento='').values_list(
+        'turma__curso__nome', 'status'
+    ).annotate(soma=Sum('total')).order_by():
+        dossies[status] = dossies.get(status, 0) + total
+        por_curso.setdefault(curso or "Sem turma", {})[status] = total
+
+    # Documentos por tipo x status
+    status_documento = DocumentoEstagio.STATUS_CHOICES
+    documentos = {}
+    for tipo, status, total in contadores.exclude(tipo_documento='').values_list(
+        'tipo_documento', 'status'
+    ).annotate(soma=Sum('total')).order_by():
+        documentos.setdefault(tipo, {})[status] = total
+
+    # Vazão semanal (transições e documentos concluídos), a partir do resumo diário
+    inicio = datetime.date.today() - datetime.timedelta(weeks=PAINEL_SEMANAS)
+    vazao = list(
+        ResumoVazaoDiaria.objects.filter(dia__gte=inicio).annotate(semana=TruncWeek('dia'))
+        .values('semana').annotate(
+            transicoes=Sum('total'),
+            concluidos=Sum('total', filter=Q(status_novo='CONCLUIDO')),
+        ).order_by('semana')
+    )
+    maior_vazao = max([linha['transicoes'] for linha in vazao], default=0)
+
+    etapas_lentas = [
+        {
+            'tipo': resumo.get_tipo_documento_display(),
+            'status': resumo.get_status_display(),
+            'saidas': resumo.saidas,
+            'media': _formatar_duracao(resumo.media_segundos),
+        }
+        for resumo in ResumoTempoStatus.objects.filter(saidas__gt=0).annotate(
+            media=F('segundos_total') * 1.0 / F('saidas')
+        ).order_by('-media')[:10]
+    ]
+
+    context = {
+        'filtros': filtros,
+        'eixos': Curso.EIXO_CHOICES,
+        'cursos': Curso.objects.order_by('nome'),
+        'turmas': Turma.objects.order_by('curso__nome', 'ano_modulo', 'turma'),
+        'status_geral': status_geral,
+        'dossies': [(nome, dossies.get(valor, 0)) for valor, nome in status_geral],
+        'total_dossies': sum(dossies.values()),
+        'por_curso': [
+            (curso, [contagem.get(valor, 0) for valor, _ in status_geral], sum(contagem.values()))
+            for curso, contagem in sorted(por_curso.items())
+        ],
+        'status_documento': status_documento,
+        'documentos': [
+            (nome, [documentos.get(tipo, {}).get(valor, 0) for valor, _ in status_documento])
+            for tipo, nome in DocumentoEstagio.TIPO_DOCUMENTO_CHOICES
+            if tipo in documentos
+        ],
+        'vazao': vazao,
+        'maior_vazao': maior_vazao,
+        'etapas_lentas': etapas_lentas,
+    }
+    return render(request, 'servidor/direcao/painel_estagios.html', context)
+
+
+@login_required
+@role_required('servidor', 'direcao', 'admin')
+def relatorio_prazos(request):
+    """
+    Documentos parados além do prazo da etapa (settings.PRAZOS_DOCUMENTOS),
+    agrupados por quem deve agir. O servidor vê só o seu eixo.
+    """
+    if request.user.tipo == 'servidor':
+        eixo = request.user.eixo
+    else:
+        eixo = request.GET.get('eixo', '')
+        if eixo not in dict(Curso.EIXO_CHOICES):
+            eixo = ''
+
+    documentos = documentos_atrasados(eixo=eixo or None)
+    status_nomes = dict(DocumentoEstagio.STATUS_CHOICES)
+    context = {
+        'eixo': eixo,
+        'eixos': Curso.EIXO_CHOICES,
+        'prazos': [(status_nomes[status], prazo.days) for status, prazo in prazos().items()],
+        'grupos': agrupar_por_responsavel(documentos),
+        'total_atrasados': len(documentos),
+    }
+    return render(request, 'servidor/relatorio_prazos.html', context)
+
+
 # === SERVIDOR / DIREÇÃO - ESTÁGIO ===
 
 @login_required
@@ -55,7 +196,7 @@ def direcao_assinar_documento(request, documento_id):
     documento.assinado_por_diretor = request.user 
     
     documento.status = 'AGUARDANDO_VERIFICACAO_ADMIN'
-    documento.save()
+    documento.save(ator=request.user)
     
     messages.success(request, f"Documento '{documento.get_tipo_documento_display()}' assinado e encaminhado para verificação final!")
     return redirect('servidor_dashboard')
@@ -70,6 +211,8 @@ def direcao_visualizar_documento(request, documento_id):
          messages.error(request, "Este documento não está (ou não está mais) aguardando sua assinatura.")
          return redirect('servidor_dashboard')
 
+    documento.nao_lido = tem_nao_lido(request.user, documento)
+
     dados = documento.dados_formulario or {}
     for campo in ['data_inicio', 'data_fim']:
         valor = dados.get(campo)
@@ -90,7 +233,7 @@ def direcao_visualizar_documento(request, documento_id):
         'estagio': estagio,
         'aluno': estagio.aluno,
         'dados': dados,
-        'pdf_existe': documento.pdf_supervisor_assinado.storage.exists(documento.pdf_supervisor_assinado.name) if documento.pdf_supervisor_assinado else False,
+        'pdf_existe': documento.arquivo_presente('pdf_supervisor_assinado'),
         'pode_assinar_direcao': documento.status == 'AGUARDANDO_ASSINATURA_DIR',
         'documento_ja_assinado_direcao': bool(documento.assinado_diretor_em),
     }
@@ -98,6 +241,13 @@ def direcao_visualizar_documento(request, documento_id):
     return render(request, template_name, context)
 
 
+# Alunos por página no monitoramento
+MONITORAMENTO_POR_PAGINA = 50
+
+# Valor do filtro de status para alunos sem dossiê
+STATUS_NAO_INICIADO = 'NAO_INICIADO'
+
+
 @login_required
 @role_required('servidor')
 def servidor_monitorar_alunos(request):
@@ -106,38 +256,207 @@ def servidor_monitorar_alunos(request):
         messages.error(request, "Seu usuário não está associado a um Eixo.")
         return redirect('servidor_dashboard')
 
-    alunos_no_eixo = CustomUser.objects.filter(
-        tipo='aluno',
-        alunoturma__turma__curso__eixo=eixo_servidor
-    ).distinct().order_by('first_name', 'last_name')
-
+    filtros = {
+        'q': request.GET.get('q', '').strip(),
+        'curso': request.GET.get('curso', ''),
+        'turma': request.GET.get('turma', ''),
+        'status': request.GET.get('status', ''),
+        'aguardando': request.GET.get('aguardando', '') == '1',
+    }
+    # Valores inválidos na URL são ignorados, em vez de quebrar o filtro
+    if not filtros['curso'].isdigit():
+        filtros['curso'] = ''
+    if not filtros['turma'].isdigit():
+        filtros['turma'] = ''
+    if filtros['status'] not in dict(Estagio.STATUS_GERAL_CHOICES) and filtros['status'] != STATUS_NAO_INICIADO:
+        filtros['status'] = ''
+
+    alunos = _filtrar_monitoramento(_alunos_do_eixo(eixo_servidor), eixo_servidor, filtros)
+    pagina = Paginator(alunos.only('id', 'first_name', 'last_name', 'numero_matricula'), MONITORAMENTO_POR_PAGINA).get_page(request.GET.get('page'))
+
+    # Dossiê, pendências e turma atual só dos alunos da página
+    ids_pagina = [aluno.id for aluno in pagina]
     estagios_map = {
         estagio.aluno_id: estagio
-        for estagio in Estagio.objects.filter(
-            aluno__in=alunos_no_eixo
-        ).annotate(
-            docs_pendentes_count=Count('documentos', filter=~Q(documentos__status='CONCLUIDO'))
+        for estagio in Estagio.objects.filter(aluno_id__in=ids_pagina).annotate(
+            docs_pendentes_count=Count('documentos', filter=~Q(documentos__status='CONCLUIDO')),
+            docs_aguardando_count=Count('documentos', filter=Q(documentos__status='AGUARDANDO_VERIFICACAO_ADMIN')),
         )
     }
+    turmas_map = {
+        matricula.aluno_id: matricula.turma
+        for matricula in AlunoTurma.objects.select_related('turma__curso').filter(aluno_id__in=ids_pagina, ativo=True)
+    }
 
     alunos_data = []
-    for aluno in alunos_no_eixo:
+    for aluno in pagina:
         estagio_data = estagios_map.get(aluno.id)
         alunos_data.append({
             'aluno': aluno,
+            'turma': turmas_map.get(aluno.id),
             'estagio_iniciado': bool(estagio_data),
             'docs_pendentes_count': estagio_data.docs_pendentes_count if estagio_data else 0,
+            'docs_aguardando_count': estagio_data.docs_aguardando_count if estagio_data else 0,
+            'estagio_status_codigo': estagio_data.status_geral if estagio_data else STATUS_NAO_INICIADO,
             'estagio_status': estagio_data.get_status_geral_display() if estagio_data else "Não Iniciado",
             'estagio_id': estagio_data.id if estagio_data else None,
         })
 
+    parametros = request.GET.copy()
+    parametros.pop('page', None)
+
     context = {
         'alunos_data': alunos_data,
+        'pagina': pagina,
+        'filtros': filtros,
+        'facetas': _facetas_monitoramento(eixo_servidor, filtros),
+        'parametros': parametros.urlencode(),
         'eixo_servidor': request.user.get_eixo_display
     }
     return render(request, 'servidor/administrativo/monitorar_alunos.html', context)
 
 
+def _filtrar_monitoramento(alunos, eixo, filtros, ignorar=None):
+    """
+    Aplica os filtros do monitoramento, exceto o indicado em 'ignorar'
+    (a contagem de cada faceta considera todos os outros filtros, menos ela mesma).
+    Cada filtro é um 'id IN (subconsulta)' sobre uma tabela com índice para ele.
+    """
+    if filtros['q']:
+        busca = filtros['q']
+        alunos = alunos.filter(
+            Q(first_name__icontains=busca) | Q(last_name__icontains=busca) | Q(numero_matricula=busca)
+        )
+    if filtros['curso'] and ignorar != 'curso':
+        alunos = alunos.filter(id__in=AlunoTurma.objects.filter(
+            ativo=True, turma__curso_id=filtros['curso']
+        ).values('aluno_id'))
+    if filtros['turma'] and ignorar != 'turma':
+        alunos = alunos.filter(id__in=AlunoTurma.objects.filter(
+            ativo=True, turma_id=filtros['turma']
+        ).values('aluno_id'))
+    if filtros['status'] and ignorar != 'status':
+        if filtros['status'] == STATUS_NAO_INICIADO:
+            alunos = alunos.filter(estagio__isnull=True)
+        else:
+            alunos = alunos.filter(id__in=Estagio.objects.filter(
+                eixo=eixo, status_geral=filtros['status']
+            ).values('aluno_id'))
+    if filtros['aguardando'] and ignorar != 'aguardando':
+        alunos = alunos.filter(id__in=_aguardando_servidor(eixo))
+    return alunos
+
+
+def _aguardando_servidor(eixo):
+    # Alunos do eixo com algum documento esperando a análise final do servidor
+    return DocumentoEstagio.objects.filter(
+        status='AGUARDANDO_VERIFICACAO_ADMIN',
+        estagio__eixo=eixo
+    ).values('estagio__aluno_id')
+
+
+def _facetas_monitoramento(eixo, filtros):
+    """ Contagens de alunos por curso, turma, status do dossiê e 'aguardando análise', agrupadas no banco. """
+    status_display = dict(Estagio.STATUS_GERAL_CHOICES)
+    por_status = dict(
+        _filtrar_monitoramento(_alunos_do_eixo(eixo), eixo, filtros, ignorar='status')
+        .order_by().values_list('estagio__status_geral').annotate(total=Count('id'))
+    )
+    status = [{'valor': STATUS_NAO_INICIADO, 'nome': 'Não Iniciado', 'total': por_status.get(None, 0)}]
+    status += [
+        {'valor': valor, 'nome': nome, 'total': por_status.get(valor, 0)}
+        for valor, nome in status_display.items()
+    ]
+
+    cursos = (
+        AlunoTurma.objects.filter(
+            ativo=True,
+            aluno_id__in=_filtrar_monitoramento(_alunos_do_eixo(eixo), eixo, filtros, ignorar='curso').values('id')
+        )
+        .order_by('turma__curso__nome')
+        .values('turma__curso_id', 'turma__curso__nome')
+        .annotate(total=Count('aluno_id', distinct=True))
+    )
+
+    turmas = [
+        {
+            'id': linha['turma_id'],
+            'nome': formatar_turma(
+                linha['turma__ano_modulo'], linha['turma__curso__nome'], linha['turma__turno'],
+                linha['turma__turma'], linha['turma__modalidade']
+            ),
+            'total': linha['total'],
+        }
+        for linha in AlunoTurma.objects.filter(
+            ativo=True,
+            aluno_id__in=_filtrar_monitoramento(_alunos_do_eixo(eixo), eixo, filtros, ignorar='turma').values('id')
+        )
+        .order_by('turma__curso__nome', 'turma__ano_modulo', 'turma__turma')
+        .values(
+            'turma_id', 'turma__ano_modulo', 'turma__curso__nome', 'turma__turno',
+            'turma__turma', 'turma__modalidade'
+        )
+        .annotate(total=Count('aluno_id', distinct=True))
+    ]
+
+    aguardando = _filtrar_monitoramento(
+        _alunos_do_eixo(eixo), eixo, filtros, ignorar='aguardando'
+    ).filter(id__in=_aguardando_servidor(eixo)).count()
+
+    return {'status': status, 'cursos': cursos, 'turmas': turmas, 'aguardando': aguardando}
+
+
+def _alunos_do_eixo(eixo):
+    # O eixo fica gravado no próprio aluno (core.eixos): filtro indexado, sem joins
+    return CustomUser.objects.filter(
+        tipo='aluno',
+        eixo=eixo
+    ).order_by('first_name', 'last_name')
+
+
+def _aluno_no_eixo(aluno, eixo):
+    return bool(eixo) and aluno.eixo == eixo
+
+
+@login_required
+@role_required('servidor')
+def servidor_exportar_alunos(request):
+    eixo_servidor = request.user.eixo
+    if not eixo_servidor:
+        messages.error(request, "Seu usuário não está associado a um Eixo.")
+        return redirect('servidor_dashboard')
+
+    status_estagio = dict(Estagio.STATUS_GERAL_CHOICES)
+
+    # Uma linha por matrícula no eixo; a contagem de pendências é feita pelo banco
+    linhas_db = AlunoTurma.objects.filter(
+        aluno__tipo='aluno',
+        aluno__eixo=eixo_servidor,
+        ativo=True
+    ).annotate(
+        docs_pendentes_count=Count(
+            'aluno__estagio__documentos',
+            filter=~Q(aluno__estagio__documentos__status='CONCLUIDO')
+        )
+    ).values_list(
+        'aluno__numero_matricula', 'aluno__first_name', 'aluno__last_name',
+        'turma__ano_modulo', 'turma__curso__nome', 'turma__turno', 'turma__turma', 'turma__modalidade',
+        'aluno__estagio__status_geral', 'docs_pendentes_count',
+    ).order_by('aluno__first_name', 'aluno__last_name', 'aluno_id').iterator(chunk_size=EXPORTACAO_CHUNK_SIZE)
+
+    def linhas():
+        for matricula, nome, sobrenome, ano_modulo, curso, turno, turma, modalidade, status, pendentes in linhas_db:
+            yield [
+                matricula, nome, sobrenome,
+                formatar_turma(ano_modulo, curso, turno, turma, modalidade),
+                status_estagio.get(status, 'Não Iniciado'),
+                pendentes if status else '',
+            ]
+
+    cabecalho = ['Matrícula', 'Nome', 'Sobrenome', 'Turma', 'Status do Dossiê', 'Documentos Pendentes']
+    return resposta_csv(f'alunos_eixo_{eixo_servidor.lower()}.csv', cabecalho, linhas())
+
+
 @login_required
 @role_required('servidor')
 def servidor_ver_documentos_aluno(request, aluno_id):
@@ -150,9 +469,7 @@ def servidor_ver_documentos_aluno(request, aluno_id):
         messages.error(request, "Este aluno ainda não iniciou seu dossiê de estágio.")
         return redirect('servidor_monitorar_alunos')
 
-    aluno_pertence_ao_eixo = aluno.alunoturma_set.filter(
-        turma__curso__eixo=eixo_servidor
-    ).exists()
+    aluno_pertence_ao_eixo = _aluno_no_eixo(aluno, eixo_servidor)
     
     if not aluno_pertence_ao_eixo:
         messages.error(request, "Você não tem permissão para ver este aluno.")
@@ -194,30 +511,14 @@ def servidor_visualizar_documento(request, documento_id):
         return redirect('servidor_monitorar_alunos')
 
     # 2. Validação de Permissão sobre o Aluno
-    aluno_pertence_ao_eixo = aluno.alunoturma_set.filter(
-        turma__curso__eixo=eixo_servidor
-    ).exists()
+    aluno_pertence_ao_eixo = _aluno_no_eixo(aluno, eixo_servidor)
     
     if not aluno_pertence_ao_eixo:
         messages.error(request, "Você não tem permissão para ver os documentos deste aluno.")
         return redirect('servidor_monitorar_alunos')
-    
-    # ==============================================================================
-    # === NOVA LÓGICA DE AUTO-CORREÇÃO (SELF-HEALING) ===
-    # Verifica a integridade do estágio ao visualizar qualquer documento dele
-    # ==============================================================================
-    documentos_do_estagio = estagio.documentos.all()
-    if documentos_do_estagio.exists():
-        pendencias = documentos_do_estagio.exclude(status='CONCLUIDO').exists()
-        
-        # Se não houver pendências (tudo concluído) e o status ainda não for APROVADO...
-        if not pendencias and estagio.status_geral != 'APROVADO':
-            estagio.status_geral = 'APROVADO'
-            estagio.save()
-            # O status atualiza silenciosamente para que, ao carregar a página, 
-            # as badges já apareçam corretas.
-    # ==============================================================================
 
+    documento.nao_lido = tem_nao_lido(servidor, documento)
+    
     dados = documento.dados_formulario or {}
     
     # Converter datas
@@ -298,7 +599,7 @@ def servidor_visualizar_documento(request, documento_id):
         'dados': dados,
         'dados_termo': dados_termo,
         'dados_reais': dados_reais, 
-        'pdf_existe': documento.pdf_supervisor_assinado.storage.exists(documento.pdf_supervisor_assinado.name) if documento.pdf_supervisor_assinado else False,
+        'pdf_existe': documento.arquivo_presente('pdf_supervisor_assinado'),
         'user_is_servidor': True,
         'pode_aprovar_servidor': documento.status == 'AGUARDANDO_VERIFICACAO_ADMIN',
         'pode_reprovar_servidor': documento.status == 'AGUARDANDO_VERIFICACAO_ADMIN',
@@ -317,9 +618,7 @@ def servidor_reprovar_documento(request, documento_id):
     estagio = documento.estagio
     aluno = estagio.aluno
     servidor = request.user
-    aluno_pertence_ao_eixo = aluno.alunoturma_set.filter(
-        turma__curso__eixo=servidor.eixo
-    ).exists()
+    aluno_pertence_ao_eixo = _aluno_no_eixo(aluno, servidor.eixo)
     
     if not aluno_pertence_ao_eixo:
         messages.error(request, "Você não tem permissão para gerenciar este documento.")
@@ -333,7 +632,7 @@ def servidor_reprovar_documento(request, documento_id):
         documento.pdf_supervisor_assinado.delete(save=False)
     
     documento.status = 'REPROVADO'
-    documento.save()
+    documento.save(ator=request.user)
     
     estagio.status_geral = 'PENDENTE_CORRECAO'
     estagio.save()
@@ -355,9 +654,7 @@ def servidor_aprovar_documento(request, documento_id):
     servidor = request.user
     
     # 2. Verificação de Segurança (Eixo)
-    aluno_pertence_ao_eixo = aluno.alunoturma_set.filter(
-        turma__curso__eixo=servidor.eixo
-    ).exists()
+    aluno_pertence_ao_eixo = _aluno_no_eixo(aluno, servidor.eixo)
     
     if not aluno_pertence_ao_eixo:
         messages.error(request, "Você não tem permissão para gerenciar este documento.")
@@ -369,22 +666,12 @@ def servidor_aprovar_documento(request, documento_id):
         return redirect('servidor_ver_documentos_aluno', aluno_id=aluno.id)
 
     # 4. APROVAÇÃO DO DOCUMENTO INDIVIDUAL
+    # Se era o último pendente, o save já aprova o dossiê inteiro (core.dossies)
     documento.status = 'CONCLUIDO'
-    documento.save()
-    
-    # ==============================================================================
-    # NOVA LÓGICA: VERIFICAÇÃO DE CONCLUSÃO DO DOSSIÊ
-    # ==============================================================================
+    documento.save(ator=request.user)
+    estagio.refresh_from_db(fields=['status_geral'])
     
-    # Pergunta ao banco: "Existe algum documento deste estágio que NÃO seja 'CONCLUIDO'?"
-    pendencias = DocumentoEstagio.objects.filter(estagio=estagio).exclude(status='CONCLUIDO').exists()
-    
-    if not pendencias:
-        # Se NÃO há pendências (a lista de 'não concluídos' está vazia),
-        # significa que tudo está pronto. Aprovamos o estágio geral!
-        estagio.status_geral = 'APROVADO'
-        estagio.save()
-        
+    if estagio.status_geral == 'APROVADO':
         messages.success(
             request, 
             f"O documento '{documento.get_tipo_documento_display()}' foi aprovado e o Dossiê de Estágio foi FINALIZADO com sucesso!"
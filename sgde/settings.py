@@ -50,6 +50,9 @@ INSTALLED_APPS = [
     'qr_code',
 ]
 
+# Todos os middlewares abaixo suportam async: sob o ASGI, as views async (SSE,
+# uploads, APIs de selects) rodam direto no event loop. Um middleware só síncrono
+# faria cada requisição voltar para uma thread; confira antes de incluir um novo.
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -74,6 +77,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.caixa_entrada',
             ],
         },
     },
@@ -93,6 +97,41 @@ DATABASES = {
 }
 
 
+# Cache usado pelos diretórios e listas pré-calculadas (core/diretorio.py).
+# Com vários processos em produção, use um backend compartilhado (Redis/Memcached)
+# para que a invalidação feita por um processo valha para todos. O índice de acesso
+# dos professores (permissões) não depende disso: a versão dele fica no banco.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Prazo (em dias) de cada etapa do fluxo de documentos de estágio. Documentos
+# parados há mais tempo entram no relatório de prazos e no comando verificar_prazos.
+PRAZOS_DOCUMENTOS = {
+    'AGUARDANDO_ASSINATURA_PROF': 7,
+    'AGUARDANDO_ASSINATURA_DIR': 5,
+    'AGUARDANDO_VERIFICACAO_ADMIN': 5,
+}
+
+
+# E-mail dos resumos de pendências (comando enviar_resumos). Localmente as
+# mensagens vão para o console; em produção, troque pelo backend SMTP.
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'nao-responda@localhost'
+# Endereço usado nos links dos e-mails
+SITE_URL = 'http://localhost:8000'
+
+# Atualização dos painéis em tempo real (SSE em /api/api/eventos/, servido pelo ASGI).
+# Cada processo avisa as próprias conexões quando um documento muda de status; com
+# vários workers, defina TEMPO_REAL_POLLING (segundos) para que cada conexão também
+# consulte o log de transições nesse intervalo e veja as mudanças dos outros processos.
+TEMPO_REAL_POLLING = None
+# Duração máxima de uma conexão; o navegador reconecta sozinho (retry) de onde parou
+TEMPO_REAL_DURACAO = 300
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -130,6 +169,31 @@ USE_TZ = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Quem transfere os arquivos de mídia depois da checagem de permissão (core/midia.py):
+# None (o Django, com suporte a Range), 'nginx' (X-Accel-Redirect) ou 'apache' (X-Sendfile).
+# Com nginx, MEDIA_INTERNA_URL é uma location 'internal' apontando para o MEDIA_ROOT:
+#     location /media-protegida/ { internal; alias /caminho/do/projeto/media/; }
+MEDIA_SERVIDOR = None
+MEDIA_INTERNA_URL = '/media-protegida/'
+
+# Uploads em partes (core/uploads.py): tamanho de cada parte, limite do arquivo,
+# validade de um upload interrompido e onde as partes ficam até a montagem
+# (fora do MEDIA_ROOT, não é servido). Use o mesmo disco do MEDIA_ROOT: o
+# arquivo montado é movido para lá, sem cópia.
+UPLOAD_TAMANHO_PARTE = 1024 * 1024
+UPLOAD_TAMANHO_MAXIMO = 25 * 1024 * 1024
+UPLOAD_VALIDADE_HORAS = 48
+UPLOAD_PARTES_DIR = os.path.join(BASE_DIR, 'uploads_parciais')
+
+# PDFs enviados (core/pdfs.py): limites validados no upload e a recompressão
+# das imagens feita depois pelo comando processar_pdfs (lado maior em pixels,
+# ~200 dpi numa folha A4, e a qualidade do JPEG).
+PDF_TAMANHO_MAXIMO = 20 * 1024 * 1024
+PDF_PAGINAS_MAXIMO = 50
+PDF_IMAGEM_LADO_MAXIMO = 2339
+PDF_QUALIDADE_JPEG = 75
+PDF_WORKERS = 2
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
@@ -15,10 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from autenticacao import views as auth_views
+from core import views as core_views
 from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -31,7 +31,6 @@ urlpatterns = [
     path('api/', include('api.urls')),
     path('assinatura_eletronica/', include('assinatura_eletronica.urls')),
     path('qr_code/', include('qr_code.urls', namespace='qr_code')),
+    # Uploads dos alunos: sempre pela checagem de permissão (core.midia), também em produção
+    re_path(r'^%s(?P<caminho>.+)$' % settings.MEDIA_URL.lstrip('/'), core_views.arquivo_protegido, name='arquivo_protegido'),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,47 @@
+// Busca de matérias para os selects com 'data-autocomplete-url'.
+// O select chega do servidor só com a opção selecionada; as outras
+// são pedidas ao endpoint conforme o usuário digita.
+document.addEventListener("DOMContentLoaded", function () {
+    const ESPERA_MS = 250;
+
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(function (select) {
+        const url = select.dataset.autocompleteUrl;
+        const linha = select.closest('.formset-row');
+        const cursoSelect = linha ? linha.querySelector('.curso-select') : null;
+
+        const busca = document.createElement('input');
+        busca.type = 'search';
+        busca.className = 'form-control form-control-sm mb-1';
+        busca.placeholder = 'Buscar matéria...';
+        select.parentNode.insertBefore(busca, select);
+
+        let temporizador = null;
+
+        function preencher(materias) {
+            const selecionada = select.value;
+            select.innerHTML = '';
+            select.appendChild(new Option('Selecione a matéria', ''));
+            materias.forEach(function (materia) {
+                const opcao = new Option(materia.nome, materia.id);
+                opcao.selected = String(materia.id) === selecionada;
+                select.appendChild(opcao);
+            });
+        }
+
+        function buscar() {
+            const params = new URLSearchParams({ q: busca.value });
+            if (cursoSelect && cursoSelect.value) {
+                params.append('curso_id', cursoSelect.value);
+            }
+            fetch(url + '?' + params.toString())
+                .then(function (resposta) { return resposta.json(); })
+                .then(function (dados) { preencher(dados.materias); })
+                .catch(function () { console.error("Erro ao buscar matérias."); });
+        }
+
+        busca.addEventListener('input', function () {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(buscar, ESPERA_MS);
+        });
+    });
+});
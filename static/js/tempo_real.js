@@ -0,0 +1,41 @@
+// Atualização dos painéis em tempo real (SSE, api.views.eventos_tempo_real).
+// Só mexe nas linhas com data-documento-id: atualiza o status (data-documento-status),
+// tira da lista da caixa de entrada (data-caixa-entrada) o que saiu dela e
+// atualiza o contador do menu, sem recarregar a página.
+(function () {
+  const script = document.currentScript;
+  const url = script && script.dataset.url;
+  if (!url || !window.EventSource) return;
+
+  const fonte = new EventSource(url);
+
+  fonte.addEventListener("documento", function (e) {
+    const evento = JSON.parse(e.data);
+    const linhas = document.querySelectorAll('[data-documento-id="' + evento.documento_id + '"]');
+
+    linhas.forEach(function (linha) {
+      const naCaixa = linha.closest("[data-caixa-entrada]");
+      if (naCaixa && !evento.na_caixa) {
+        linha.remove();
+        return;
+      }
+      linha.querySelectorAll("[data-documento-status]").forEach(function (status) {
+        status.textContent = evento.status_display;
+      });
+    });
+
+    // Documento novo na caixa de entrada: a linha não existe na página
+    if (evento.na_caixa && !document.querySelector('[data-caixa-entrada] [data-documento-id="' + evento.documento_id + '"]')) {
+      const aviso = document.getElementById("tempo-real-aviso");
+      if (aviso && document.getElementById("caixa-entrada-contador")) aviso.classList.remove("d-none");
+    }
+  });
+
+  fonte.addEventListener("caixa", function (e) {
+    const contador = document.getElementById("caixa-entrada-contador");
+    if (!contador) return;
+    const naoLidos = JSON.parse(e.data).nao_lidos;
+    contador.textContent = naoLidos;
+    contador.classList.toggle("d-none", !naoLidos);
+  });
+})();
@@ -0,0 +1,200 @@
+// Upload em partes (aluno.views.iniciar_upload_em_partes e seguintes).
+// Formulários com data-upload-url enviam os arquivos dos inputs com
+// data-upload-campo em partes, cada uma com SHA-256, retomando de onde o
+// servidor parou se a conexão cair. O SHA-256 do arquivo inteiro identifica
+// o upload a retomar e é conferido no servidor ao concluir. Depois:
+//   data-upload-concluir="redirecionar" -> vai para a página do documento;
+//   sem o atributo -> envia o formulário normalmente, já sem o arquivo.
+// Sem crypto.subtle (HTTP fora do localhost), o formulário segue o envio comum.
+(function () {
+  const TENTATIVAS = 5;
+
+  function esperar(ms) {
+    return new Promise(function (resolve) { setTimeout(resolve, ms); });
+  }
+
+  // Lido em blocos para o SHA-256 do arquivo inteiro: nunca fica todo na memória
+  const BLOCO_LEITURA = 4 * 1024 * 1024;
+
+  function hex(bytes) {
+    return Array.from(bytes).map(function (b) { return b.toString(16).padStart(2, "0"); }).join("");
+  }
+
+  async function sha256(buffer) {
+    return hex(new Uint8Array(await crypto.subtle.digest("SHA-256", buffer)));
+  }
+
+  // crypto.subtle só calcula o resumo de um buffer inteiro; este SHA-256
+  // incremental (FIPS 180-4) recebe o arquivo bloco a bloco.
+  const K = new Uint32Array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+  ]);
+
+  function Sha256() {
+    this.h = new Uint32Array([
+      0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+    ]);
+    this.w = new Uint32Array(64);
+    this.pendente = new Uint8Array(64);
+    this.usados = 0;
+    this.total = 0;
+  }
+
+  Sha256.prototype.bloco = function (dados, inicio) {
+    const w = this.w, h = this.h;
+    for (let i = 0; i < 16; i++) {
+      const j = inicio + 4 * i;
+      w[i] = (dados[j] << 24) | (dados[j + 1] << 16) | (dados[j + 2] << 8) | dados[j + 3];
+    }
+    for (let i = 16; i < 64; i++) {
+      const a = w[i - 15], b = w[i - 2];
+      const s0 = ((a >>> 7) | (a << 25)) ^ ((a >>> 18) | (a << 14)) ^ (a >>> 3);
+      const s1 = ((b >>> 17) | (b << 15)) ^ ((b >>> 19) | (b << 13)) ^ (b >>> 10);
+      w[i] = w[i - 16] + s0 + w[i - 7] + s1;
+    }
+    let a = h[0], b = h[1], c = h[2], d = h[3], e = h[4], f = h[5], g = h[6], k = h[7];
+    for (let i = 0; i < 64; i++) {
+      const t1 = k + (((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7)))
+        + ((e & f) ^ (~e & g)) + K[i] + w[i];
+      const t2 = (((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10)))
+        + ((a & b) ^ (a & c) ^ (b & c));
+      k = g; g = f; f = e; e = (d + t1) | 0; d = c; c = b; b = a; a = (t1 + t2) | 0;
+    }
+    h[0] += a; h[1] += b; h[2] += c; h[3] += d; h[4] += e; h[5] += f; h[6] += g; h[7] += k;
+  };
+
+  Sha256.prototype.atualizar = function (dados) {
+    let i = 0;
+    this.total += dados.length;
+    if (this.usados) {
+      i = Math.min(64 - this.usados, dados.length);
+      this.pendente.set(dados.subarray(0, i), this.usados);
+      this.usados += i;
+      if (this.usados < 64) return;
+      this.bloco(this.pendente, 0);
+      this.usados = 0;
+    }
+    for (; i + 64 <= dados.length; i += 64) this.bloco(dados, i);
+    this.pendente.set(dados.subarray(i), 0);
+    this.usados = dados.length - i;
+  };
+
+  Sha256.prototype.resumo = function () {
+    const bits = this.total * 8;
+    const final = new Uint8Array(this.usados < 56 ? 64 : 128);
+    final.set(this.pendente.subarray(0, this.usados));
+    final[this.usados] = 0x80;
+    const visao = new DataView(final.buffer);
+    visao.setUint32(final.length - 8, Math.floor(bits / 0x100000000));
+    visao.setUint32(final.length - 4, bits >>> 0);
+    for (let i = 0; i < final.length; i += 64) this.bloco(final, i);
+    const saida = new Uint8Array(32);
+    this.h.forEach(function (valor, i) { new DataView(saida.buffer).setUint32(4 * i, valor); });
+    return hex(saida);
+  };
+
+  async function sha256DoArquivo(arquivo) {
+    const hash = new Sha256();
+    for (let inicio = 0; inicio < arquivo.size; inicio += BLOCO_LEITURA) {
+      hash.atualizar(new Uint8Array(await arquivo.slice(inicio, inicio + BLOCO_LEITURA).arrayBuffer()));
+    }
+    return hash.resumo();
+  }
+
+  async function json(resposta) {
+    const dados = await resposta.json().catch(function () { return {}; });
+    if (!resposta.ok) throw new Error(dados.erro || "Falha no envio do arquivo.");
+    return dados;
+  }
+
+  async function enviarArquivo(form, campo, arquivo, progresso) {
+    const csrf = form.querySelector("[name=csrfmiddlewaretoken]").value;
+    const resumo = await sha256DoArquivo(arquivo);
+    const inicio = await json(await fetch(form.dataset.uploadUrl, {
+      method: "POST",
+      headers: { "X-CSRFToken": csrf },
+      body: new URLSearchParams({ campo: campo, nome: arquivo.name, tamanho: arquivo.size, sha256: resumo }),
+    }));
+
+    let recebido = inicio.recebido;
+    let falhas = 0;
+    while (recebido < arquivo.size) {
+      const parte = await arquivo.slice(recebido, recebido + inicio.tamanho_parte).arrayBuffer();
+      try {
+        const resposta = await fetch(inicio.parte_url, {
+          method: "POST",
+          headers: {
+            "X-CSRFToken": csrf,
+            "Content-Type": "application/octet-stream",
+            "X-Upload-Offset": recebido,
+            "X-Upload-Checksum": await sha256(parte),
+          },
+          body: parte,
+        });
+        if (resposta.status >= 500) throw new TypeError("servidor indisponível");
+        if (resposta.status === 409 || resposta.status === 422) {
+          // Fora de ordem ou corrompida: o servidor diz de onde reenviar
+          const dados = await resposta.json();
+          if (resposta.status === 422 && ++falhas > TENTATIVAS) throw new Error(dados.erro);
+          recebido = dados.recebido;
+          continue;
+        }
+        recebido = (await json(resposta)).recebido;
+        falhas = 0;
+      } catch (erro) {
+        // Rede caiu: espera e pergunta ao servidor de onde continuar
+        if (!(erro instanceof TypeError) || ++falhas > TENTATIVAS) throw erro;
+        await esperar(1000 * falhas);
+        recebido = (await json(await fetch(inicio.parte_url))).recebido;
+      }
+      progresso(Math.round((100 * recebido) / arquivo.size));
+    }
+
+    return json(await fetch(inicio.concluir_url, { method: "POST", headers: { "X-CSRFToken": csrf } }));
+  }
+
+  document.querySelectorAll("form[data-upload-url]").forEach(function (form) {
+    form.addEventListener("submit", async function (evento) {
+      const entradas = Array.from(form.querySelectorAll("input[type=file][data-upload-campo]"))
+        .filter(function (entrada) { return entrada.files.length; });
+      if (!entradas.length || !window.crypto || !crypto.subtle) return;
+
+      evento.preventDefault();
+      const botoes = form.querySelectorAll("button, [type=submit]");
+      botoes.forEach(function (botao) { botao.disabled = true; });
+      let status = form.querySelector(".upload-em-partes-status");
+      if (!status) {
+        status = document.createElement("small");
+        status.className = "upload-em-partes-status d-block text-muted mt-1";
+        form.appendChild(status);
+      }
+
+      try {
+        let resultado = null;
+        for (const entrada of entradas) {
+          const arquivo = entrada.files[0];
+          resultado = await enviarArquivo(form, entrada.dataset.uploadCampo, arquivo, function (pct) {
+            status.textContent = "Enviando " + arquivo.name + ": " + pct + "%";
+          });
+          entrada.disabled = true; // já anexado: não vai de novo no formulário
+        }
+        if (form.dataset.uploadConcluir === "redirecionar") {
+          window.location = resultado.redirecionar;
+        } else {
+          form.submit();
+        }
+      } catch (erro) {
+        status.textContent = erro.message + " Tente novamente: o envio continua de onde parou.";
+        status.className = "upload-em-partes-status d-block text-danger mt-1";
+        botoes.forEach(function (botao) { botao.disabled = false; });
+      }
+    });
+  });
+})();